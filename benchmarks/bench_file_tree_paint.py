@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Paint benchmark for FileTreeView under the Qt offscreen platform
+
+Builds a temporary workspace, expands it in a FileTreeView, selects a share of
+the rows and measures the median cost of one full viewport repaint, with the
+path normalization recomputed on every call (baseline) and memoized (cached):
+
+  - warm frames repaint the same viewport, the steady state while the user
+    hovers, selects or types in the filter (cache hits),
+  - cold frames scroll to rows that have not been painted yet (cache misses),
+  - row work is the per-frame part the cache targets: isSelected() and
+    data(DisplayRole) for every visible row, without the Qt drawing around it.
+
+Full frames are dominated by Qt drawing, so the few tenths of a millisecond the
+cache saves per frame are clearest in the row work line; medians are reported
+and a discarded pass runs first so neither variant pays for warming Qt's caches.
+
+With --fps the workspace is expanded to ~10k rows and scrolled frame by frame;
+the run fails (exit code 1) when the median frame rate drops below --target-fps.
+
+Usage:
+    python benchmarks/bench_file_tree_paint.py [--files 2000] [--frames 50]
+    python benchmarks/bench_file_tree_paint.py --fps [--files 10000] [--target-fps 60]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import unicodedata
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# Add the repository root to the path so we can import the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtWidgets, QtCore, QtGui
+
+from mcp_server_extension.utils import file_utils
+from mcp_server_extension.ui.file_tree import FileTreeView
+from mcp_server_extension.ui.styles import FileTypeIcons
+
+
+def _uncached_normalize(path_str):
+    """Reference implementation without memoization (pre-cache behaviour)"""
+    normalized = unicodedata.normalize('NFC', path_str)
+    return ''.join(char for char in normalized if ord(char) >= 32 or char in '\t\n\r')
+
+
+def build_workspace(root, file_count, dir_count=20):
+    """Create dir_count folders with file_count files spread across them"""
+    extensions = ["py", "js", "md", "json", "txt", "png", "ts", "css"]
+    for d in range(dir_count):
+        os.makedirs(os.path.join(root, f"dir_{d:03d}"), exist_ok=True)
+    for i in range(file_count):
+        folder = os.path.join(root, f"dir_{i % dir_count:03d}")
+        name = f"file_{i:05d}_tệp.{extensions[i % len(extensions)]}"
+        with open(os.path.join(folder, name), "w", encoding="utf-8") as f:
+            f.write("x")
+
+
+def wait_for_model(app, timeout=10.0):
+    """Process events until the model has finished loading expanded folders"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        app.processEvents(QtCore.QEventLoop.AllEvents, 50)
+        time.sleep(0.01)
+    app.processEvents()
+
+
+def expand_all_loaded(app, view, root):
+    """Expand every folder directly below root and wait until rows are loaded"""
+    model = view.model
+    root_index = model.index(root)
+    deadline = time.monotonic() + 10.0
+    while model.rowCount(root_index) == 0 and time.monotonic() < deadline:
+        app.processEvents(QtCore.QEventLoop.AllEvents, 50)
+    for row in range(model.rowCount(root_index)):
+        view.expand(model.index(row, 0, root_index))
+    wait_for_model(app, timeout=2.0)
+
+
+def select_rows(view, root, share=0.25):
+    """Mark a share of the visible rows as selected"""
+    model = view.model
+    index = view.indexAt(QtCore.QPoint(1, 1))
+    count = 0
+    step = max(int(1 / share), 1)
+    while index.isValid():
+        if count % step == 0:
+            model.setSelected(index, True)
+        count += 1
+        index = view.indexBelow(index)
+    return count
+
+
+def measure_frames(app, view, frames, scroll=True):
+    """
+    Return the median wall time in ms of one full viewport repaint
+
+    scroll=True moves to a new part of the tree before every frame (cold rows);
+    scroll=False repaints the same viewport (warm rows).
+    """
+    target = QtGui.QPixmap(view.viewport().size())
+    scrollbar = view.verticalScrollBar()
+    step = max(scrollbar.maximum() // max(frames, 1), 1)
+
+    # Warm-up frame
+    scrollbar.setValue(0)
+    view.viewport().render(target)
+
+    timings = []
+    for frame in range(frames):
+        if scroll:
+            scrollbar.setValue(((frame + 1) * step) % (scrollbar.maximum() + 1))
+        start = time.perf_counter()
+        view.viewport().render(target)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def visible_indexes(view):
+    indexes = []
+    index = view.indexAt(QtCore.QPoint(1, 1))
+    bottom = view.viewport().height()
+    while index.isValid() and view.visualRect(index).top() < bottom:
+        indexes.append(index)
+        index = view.indexBelow(index)
+    return indexes
+
+
+def measure_row_work(view, frames):
+    """Median wall time in ms of the model calls one repaint makes for the visible rows"""
+    model = view.model
+    view.verticalScrollBar().setValue(0)
+    indexes = visible_indexes(view)
+    timings = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        for index in indexes:
+            model.isSelected(index)
+            model.data(index, QtCore.Qt.DisplayRole)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def measure_all(app, view, frames):
+    return {
+        "warm": measure_frames(app, view, frames, scroll=False),
+        "cold": measure_frames(app, view, frames, scroll=True),
+        "rows": measure_row_work(view, frames)
+    }
+
+
+def run(file_count, frames):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "workspace")
+        os.makedirs(root)
+        build_workspace(root, file_count)
+
+        view = FileTreeView()
+        view.resize(600, 900)
+        view.show()
+        view.setRootPath(root)
+        expand_all_loaded(app, view, root)
+        rows = select_rows(view, root)
+
+        cached_fn = file_utils._normalize_path_cached
+
+        # Discarded pass: warms Qt's and the delegate's own caches so neither run pays for them
+        measure_all(app, view, frames)
+
+        # Baseline: normalization recomputed on every call
+        file_utils._normalize_path_cached = _uncached_normalize
+        baseline = measure_all(app, view, frames)
+
+        # Cached: bounded LRU normalization
+        file_utils._normalize_path_cached = cached_fn
+        cached_fn.cache_clear()
+        cached = measure_all(app, view, frames)
+
+        view.close()
+
+    print(f"Rows in expanded tree: {rows}, {frames} frames per measurement")
+    print(f"{'':28}{'uncached':>10}{'cached':>10}{'speed-up':>10}")
+    for key, label in (("warm", "Warm frame (same viewport)"), ("cold", "Cold frame (scrolling)"),
+                       ("rows", "Row work per frame")):
+        speedup = baseline[key] / cached[key] if cached[key] > 0 else float("inf")
+        print(f"{label:28}{baseline[key]:>8.2f}ms{cached[key]:>8.2f}ms{speedup:>9.2f}x")
+    print(f"Normalize cache: {file_utils._normalize_path_cached.cache_info()}")
+    return baseline, cached
+
+
+def run_fps(file_count, frames, target_fps):
+    """Scroll an expanded tree of ~file_count rows and check the frame rate"""
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "workspace")
+        os.makedirs(root)
+        build_workspace(root, file_count)
+
+        view = FileTreeView()
+        view.resize(600, 900)
+        view.show()
+        view.setRootPath(root)
+        expand_all_loaded(app, view, root)
+        select_rows(view, root)
+
+        model = view.model
+        root_index = model.index(root)
+        rows = sum(
+            1 + model.rowCount(model.index(row, 0, root_index))
+            for row in range(model.rowCount(root_index))
+        )
+
+        frame_ms = measure_frames(app, view, frames)
+        delegate = view.itemDelegate()
+        cache_entries = len(getattr(delegate, "_resource_cache", {}))
+        view.close()
+
+    fps = 1000.0 / frame_ms if frame_ms > 0 else float("inf")
+    print(f"Rows in expanded tree: {rows}")
+    print(f"Median frame time:     {frame_ms:.2f} ms ({fps:.0f} fps, target {target_fps} fps)")
+    print(f"Delegate resource cache entries: {cache_entries}")
+    print(f"Icon extension memo entries:     {len(FileTypeIcons._extension_icon_cache)}")
+    return fps >= target_fps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FileTreeView paint benchmark (offscreen)")
+    parser.add_argument("--files", type=int, default=None, help="Number of files in the workspace")
+    parser.add_argument("--frames", type=int, default=50, help="Number of frames to render")
+    parser.add_argument("--fps", action="store_true", help="Scroll a ~10k-row tree and check the frame rate")
+    parser.add_argument("--target-fps", type=float, default=60.0, help="Minimum frame rate for --fps")
+    args = parser.parse_args()
+    if args.fps:
+        ok = run_fps(args.files or 10000, args.frames, args.target_fps)
+        sys.exit(0 if ok else 1)
+    run(args.files or 2000, args.frames)
+
+
+if __name__ == "__main__":
+    main()
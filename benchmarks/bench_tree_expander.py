@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Expansion latency benchmark for TreeExpander under the Qt offscreen platform
+
+Builds a workspace with several 20-level-deep targets, asks the tree to expand
+to all of them at once and measures the time until the expander finishes. The
+run fails (exit code 1) if any target is not visible afterwards or if the
+expander needed its timeout guard.
+
+The previous timer chain waited 100 ms per ancestor plus 200 ms, i.e. about
+2.2 s for a single 20-level target regardless of disk speed.
+
+The same workspace is checked under pytest in benchmarks/test_bench_file_tree.py
+(ancestors expanded, finished emitted once, no fixed timer delays).
+
+Usage:
+    python benchmarks/bench_tree_expander.py [--depth 20] [--targets 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# Add the repository root to the path so we can import the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtWidgets, QtCore
+
+from mcp_server_extension.constants import TREE_EXPAND_TIMEOUT_MS
+from mcp_server_extension.ui.file_tree import FileTreeView
+
+
+def build_deep_workspace(root, depth, targets):
+    """Create `targets` chains of `depth` nested folders, each ending in a file"""
+    paths = []
+    for t in range(targets):
+        folder = root
+        for level in range(depth):
+            folder = os.path.join(folder, f"t{t}_level_{level:02d}")
+            os.makedirs(folder, exist_ok=True)
+            # Sibling files so every level has something to list
+            with open(os.path.join(folder, "sibling.txt"), "w", encoding="utf-8") as f:
+                f.write("x")
+        target = os.path.join(folder, "target.py")
+        with open(target, "w", encoding="utf-8") as f:
+            f.write("x")
+        paths.append(target)
+    return paths
+
+
+def is_visible(view, path):
+    """Target is visible when every ancestor up to the root index is expanded"""
+    index = view.model.index(path)
+    if not index.isValid():
+        return False
+    parent = index.parent()
+    while parent.isValid() and parent != view.rootIndex():
+        if not view.isExpanded(parent):
+            return False
+        parent = parent.parent()
+    return True
+
+
+def run(depth, target_count):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "workspace")
+        os.makedirs(root)
+        targets = build_deep_workspace(root, depth, target_count)
+
+        view = FileTreeView()
+        view.resize(600, 900)
+        view.show()
+        view.setRootPath(root)
+
+        done = []
+        start = time.perf_counter()
+        view.expandToPaths(targets, scroll_to=targets[0], on_finished=lambda: done.append(time.perf_counter()))
+
+        deadline = time.monotonic() + TREE_EXPAND_TIMEOUT_MS / 1000 + 2
+        while not done and time.monotonic() < deadline:
+            app.processEvents(QtCore.QEventLoop.AllEvents, 10)
+
+        elapsed_ms = (done[0] - start) * 1000 if done else float("inf")
+        visible = sum(1 for target in targets if is_visible(view, target))
+        view.close()
+
+    timed_out = elapsed_ms >= TREE_EXPAND_TIMEOUT_MS
+    print(f"Targets: {target_count} x depth {depth}")
+    print(f"Expansion finished in {elapsed_ms:.1f} ms (timer chain: ~{(depth * 100 + 200) / 1000:.1f} s per target)")
+    print(f"Visible targets: {visible}/{target_count}")
+    return visible == target_count and not timed_out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TreeExpander latency benchmark (offscreen)")
+    parser.add_argument("--depth", type=int, default=20, help="Nesting depth of each target")
+    parser.add_argument("--targets", type=int, default=5, help="Number of deep targets")
+    args = parser.parse_args()
+    sys.exit(0 if run(args.depth, args.targets) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Live filter benchmark for the workspace name index
+
+Builds a workspace with many files (plus an ignored node_modules tree that must
+never be indexed), then measures:
+  - name index build time,
+  - per-query match time for a few typical queries (substring and glob).
+
+The run fails (exit code 1) if an ignored entry shows up in the index or if a
+query takes longer than --max-query-ms.
+
+Usage:
+    python benchmarks/bench_tree_filter.py [--files 200000] [--max-query-ms 250]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add the repository root to the path so we can import the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp_server_extension.utils.ignore_rules import IgnoreRules
+from mcp_server_extension.utils.name_index import build_name_index
+
+QUERIES = ["util", "config", "module_1234", "*.py", "mod_1"]
+
+
+def build_workspace(root, files, per_dir=500):
+    """Create `files` files spread over folders of `per_dir` files, plus ignored trees"""
+    for i in range(files):
+        folder = os.path.join(root, "src", f"pkg_{i // (per_dir * 20):03d}", f"mod_{(i // per_dir) % 20:02d}")
+        if i % per_dir == 0:
+            os.makedirs(folder, exist_ok=True)
+        suffix = ".py" if i % 3 == 0 else ".ts"
+        open(os.path.join(folder, f"module_{i}{suffix}"), "w").close()
+
+    ignored = os.path.join(root, "node_modules", "pkg")
+    os.makedirs(ignored)
+    for i in range(1000):
+        open(os.path.join(ignored, f"util_{i}.js"), "w").close()
+    os.makedirs(os.path.join(root, "build"))
+    open(os.path.join(root, "build", "util.o"), "w").close()
+    with open(os.path.join(root, ".gitignore"), "w", encoding="utf-8") as f:
+        f.write("build/\n")
+
+
+def run(files, max_query_ms):
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "workspace")
+        os.makedirs(root)
+        print(f"Creating {files} files...")
+        build_workspace(root, files)
+
+        rules = IgnoreRules(root)
+        start = time.perf_counter()
+        index = build_name_index(root, rules)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        leaked = [path for path in index.paths if "node_modules" in path or os.sep + "build" in path]
+        print(f"Indexed {len(index)} entries in {build_ms:.1f} ms (truncated: {index.truncated})")
+        print(f"Ignored entries in index: {len(leaked)}")
+
+        worst_ms = 0.0
+        for query in QUERIES:
+            start = time.perf_counter()
+            matches, visible = index.match(query)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            worst_ms = max(worst_ms, elapsed_ms)
+            print(f"  {query!r:16} {len(matches):7d} matches, {len(visible):7d} visible rows, {elapsed_ms:7.1f} ms")
+
+    return not leaked and worst_ms <= max_query_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Workspace name index / live filter benchmark")
+    parser.add_argument("--files", type=int, default=200000, help="Number of files in the workspace")
+    parser.add_argument("--max-query-ms", type=float, default=250.0, help="Fail if a query is slower")
+    args = parser.parse_args()
+    sys.exit(0 if run(args.files, args.max_query_ms) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Huge-directory benchmark for the lazy FileSystemModel under the Qt offscreen platform
+
+Creates a folder with many entries (think node_modules or a build output dir),
+expands it in the tree and reports:
+  - time until the directory is listed (directoryLoaded),
+  - rows actually inserted into the model (capped by TREE_DIR_CHILD_LIMIT),
+  - the longest stall of the UI event loop while the scan runs.
+
+The run fails (exit code 1) if the directory never loads or the UI thread
+stalls for longer than --max-stall-ms.
+
+Usage:
+    python benchmarks/bench_tree_huge_dir.py [--entries 100000] [--max-stall-ms 100]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# Add the repository root to the path so we can import the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtWidgets, QtCore
+
+from mcp_server_extension.constants import TREE_DIR_CHILD_LIMIT
+from mcp_server_extension.ui.file_tree import FileTreeView
+
+
+def build_huge_dir(root, entries):
+    """Create `entries` empty files inside root/vendor_bundle (not a DEFAULT_TREE_EXCLUDES name, so it is shown)"""
+    big = os.path.join(root, "vendor_bundle")
+    os.makedirs(big)
+    for i in range(entries):
+        open(os.path.join(big, f"module_{i:06d}.js"), "w").close()
+    return big
+
+
+def run(entries, max_stall_ms):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "workspace")
+        os.makedirs(root)
+        print(f"Creating {entries} files...")
+        big = build_huge_dir(root, entries)
+
+        view = FileTreeView()
+        view.resize(600, 900)
+        view.show()
+        view.setRootPath(root)
+        model = view.model
+
+        loaded = []
+        model.directoryLoaded.connect(lambda path: loaded.append((path, time.perf_counter())))
+
+        deadline = time.monotonic() + 10
+        while not model.index(big).isValid() and time.monotonic() < deadline:
+            app.processEvents(QtCore.QEventLoop.AllEvents, 10)
+
+        start = time.perf_counter()
+        view.expand(model.index(big))
+
+        max_stall = 0.0
+        last_tick = time.perf_counter()
+        while not any(path == big for path, _ in loaded) and time.monotonic() < deadline:
+            app.processEvents(QtCore.QEventLoop.AllEvents, 10)
+            now = time.perf_counter()
+            max_stall = max(max_stall, now - last_tick)
+            last_tick = now
+
+        loaded_at = next((at for path, at in loaded if path == big), None)
+        rows = model.rowCount(model.index(big))
+        view.close()
+
+    if loaded_at is None:
+        print("Directory never finished loading")
+        return False
+
+    print(f"Entries: {entries}")
+    print(f"Listed in {(loaded_at - start) * 1000:.1f} ms")
+    print(f"Rows in model: {rows} (limit {TREE_DIR_CHILD_LIMIT} + load more row)")
+    print(f"Longest UI stall while scanning: {max_stall * 1000:.1f} ms")
+    return max_stall * 1000 <= max_stall_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lazy FileSystemModel huge directory benchmark (offscreen)")
+    parser.add_argument("--entries", type=int, default=100000, help="Number of files in the directory")
+    parser.add_argument("--max-stall-ms", type=float, default=100.0, help="Fail if the UI thread stalls longer")
+    args = parser.parse_args()
+    sys.exit(0 if run(args.entries, args.max_stall_ms) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# pytest configuration for the benchmark suite
+"""
+Opt-in regression gate against a baseline recorded on this machine
+
+    python -m pytest benchmarks --bench-record   # lưu một lần chạy vào baseline của máy này (nên record vài lần)
+    python -m pytest benchmarks --bench-gate     # fail nếu chậm hơn baseline đó (hoặc BENCH_GATE=1)
+
+Baselines are per host (hostname + arch + Python version) in benchmarks/baselines/local,
+which is not committed: timings from another box say nothing about this one.
+Each --bench-record run is kept (the last BENCH_BASELINE_RUNS), so recording a few
+times captures how much this machine jitters between runs.
+
+A benchmark regresses only when its min (the least noisy statistic) is slower than
+the median of the recorded mins by more than its relative threshold AND by more
+than the noise band: BENCH_IQR_FACTOR times the larger IQR, or the spread of the
+recorded mins if that is wider. Run-to-run jitter of microsecond benchmarks
+therefore does not fail the suite.
+"""
+
+import json
+import os
+import platform
+import re
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+LOCAL_BASELINE_DIR = os.path.join(BENCHMARKS_DIR, "baselines", "local")
+
+# Ngưỡng tương đối cho min theo group (hoặc theo tên test đầy đủ) - benchmark micro giây nhiễu hơn
+BENCH_THRESHOLDS = {
+    "response_text": 0.30,
+    "process_images": 0.30,
+    "read_file_content": 0.50,
+    "normalize_path_unicode": 0.50,
+    "validate_file_path_in_workspace": 0.40,
+}
+BENCH_DEFAULT_THRESHOLD = 0.30
+# Chênh lệch min phải vượt quá số lần IQR này mới tính là regression
+BENCH_IQR_FACTOR = 3.0
+# Số lần record giữ lại trong baseline
+BENCH_BASELINE_RUNS = 5
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmark regression gate")
+    group.addoption("--bench-record", action="store_true", default=False,
+                    help="Add this run to this machine's baseline (benchmarks/baselines/local)")
+    group.addoption("--bench-gate", action="store_true", default=False,
+                    help="Fail when a benchmark regresses against this machine's baseline (or BENCH_GATE=1)")
+
+
+def machine_id():
+    """Hostname + arch + Python - baseline chỉ so sánh được trên cùng một máy"""
+    raw = f"{platform.node()}-{platform.machine()}-{platform.python_implementation()}-{platform.python_version()}"
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", raw)
+
+
+def baseline_path():
+    return os.path.join(LOCAL_BASELINE_DIR, f"{machine_id()}.json")
+
+
+def threshold_for(name, group):
+    return BENCH_THRESHOLDS.get(name, BENCH_THRESHOLDS.get(group, BENCH_DEFAULT_THRESHOLD))
+
+
+def _results(benchmarks):
+    return {
+        bench.fullname: {
+            "group": bench.group,
+            "min": bench.stats.min,
+            "median": bench.stats.median,
+            "iqr": bench.stats.iqr,
+            "rounds": bench.stats.rounds
+        }
+        for bench in benchmarks if bench.stats.rounds
+    }
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+def find_regressions(runs, current):
+    """
+    Danh sách (name, base_min, min, threshold) của các benchmark chậm đi rõ rệt
+
+    Args:
+        runs: Các lần record (mỗi lần: fullname -> result)
+        current: Kết quả lần chạy này
+    """
+    regressions = []
+    for name, result in current.items():
+        recorded = [run[name] for run in runs if name in run]
+        if not recorded:
+            continue
+        mins = [base["min"] for base in recorded]
+        base_min = _median(mins)
+        threshold = threshold_for(name.rsplit("::", 1)[-1], result["group"])
+        delta = result["min"] - base_min
+        noise = max(
+            BENCH_IQR_FACTOR * max([result["iqr"]] + [base["iqr"] for base in recorded]),
+            max(mins) - min(mins)
+        )
+        if delta > base_min * threshold and delta > noise:
+            regressions.append((name, base_min, result["min"], threshold))
+    return regressions
+
+
+def _load_runs(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("runs", [])
+
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    benchmark_session = getattr(config, "_benchmarksession", None)
+    if benchmark_session is None or not benchmark_session.benchmarks:
+        return
+    gate = config.getoption("--bench-gate") or os.environ.get("BENCH_GATE", "") not in ("", "0")
+    record = config.getoption("--bench-record")
+    if not (gate or record):
+        return
+
+    current = _results(benchmark_session.benchmarks)
+    path = baseline_path()
+    runs = _load_runs(path)
+
+    if gate:
+        if not runs:
+            print(f"\n[bench-gate] No baseline for {machine_id()} - run with --bench-record first; gate skipped",
+                  file=sys.stderr)
+        else:
+            regressions = find_regressions(runs, current)
+            for name, base_min, new_min, threshold in regressions:
+                print(f"\n[bench-gate] REGRESSION {name}: min {base_min * 1e6:.1f} us -> {new_min * 1e6:.1f} us "
+                      f"(+{(new_min / base_min - 1) * 100:.0f}%, threshold {threshold * 100:.0f}%)",
+                      file=sys.stderr)
+            if regressions:
+                session.exitstatus = 1
+            else:
+                print(f"\n[bench-gate] {len(current)} benchmarks within thresholds of {path} "
+                      f"({len(runs)} recorded runs)", file=sys.stderr)
+
+    if record:
+        runs = (runs + [current])[-BENCH_BASELINE_RUNS:]
+        os.makedirs(LOCAL_BASELINE_DIR, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"machine": machine_id(), "updated_at": time.time(), "runs": runs}, f, indent=2)
+        print(f"\n[bench-gate] Baseline run {len(runs)}/{BENCH_BASELINE_RUNS} recorded at {path}", file=sys.stderr)
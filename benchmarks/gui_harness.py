@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Headless GUI benchmark harness (Qt offscreen platform)
+
+Runs the heavy widgets with scripted interactions and reports per-operation
+wall time and allocations:
+  - InputDialog construction and first show,
+  - attaching --images images through ImageAttachmentWidget (copy, base64,
+    add_image_preview); the widget runs standalone with the dialog's config
+    manager since InputDialog only shows an image placeholder,
+  - expanding a tree of ~--tree-nodes nodes in FileTreeView and painting it,
+  - opening ImageViewerDialog on a large image and zooming (update_image).
+
+Allocations are measured with tracemalloc (Python heap only: net change and
+peak during the operation); RSS change is read from /proc when available and
+covers Qt's native allocations too. tracemalloc slows down allocation-heavy
+Python code, so use --no-alloc for clean wall-clock timings. Any modal dialog that pops up is closed
+automatically so the run never blocks. The package config.json is restored
+and the copied images are removed afterwards.
+
+Usage:
+    python benchmarks/gui_harness.py [--images 50] [--tree-nodes 50000] [--zoom-steps 10] [--no-alloc] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# Add the repository root to the path so we can import the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtWidgets, QtCore, QtGui
+
+from mcp_server_extension.constants import TREE_DIR_CHILD_LIMIT
+from mcp_server_extension.core.config import ConfigManager
+from mcp_server_extension.core.dialog import InputDialog
+from mcp_server_extension.core.session_store import SessionStore
+from mcp_server_extension.ui.file_tree import FileTreeView
+from mcp_server_extension.ui.image_attachment import ImageAttachmentWidget
+from mcp_server_extension.ui.image_viewer import ImageViewerDialog
+
+
+def read_rss_bytes():
+    """Resident set size từ /proc (None trên hệ không có /proc)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Harness:
+    """Đo từng thao tác: thời gian, tracemalloc (net + peak) và RSS"""
+
+    def __init__(self, app, trace_alloc=True):
+        self.app = app
+        self.trace_alloc = trace_alloc
+        self.results = []
+
+    def process_events(self, duration_ms=0):
+        deadline = time.monotonic() + duration_ms / 1000
+        self.app.processEvents(QtCore.QEventLoop.AllEvents)
+        while time.monotonic() < deadline:
+            self.app.processEvents(QtCore.QEventLoop.AllEvents, 10)
+
+    def wait_until(self, predicate, timeout_s=30):
+        deadline = time.monotonic() + timeout_s
+        while not predicate():
+            if time.monotonic() > deadline:
+                return False
+            self.app.processEvents(QtCore.QEventLoop.AllEvents, 10)
+        return True
+
+    def measure(self, name, func, **details):
+        """Chạy func() (rồi xử lý các event còn pending) và ghi lại số liệu"""
+        if self.trace_alloc:
+            tracemalloc.reset_peak()
+        heap_before = tracemalloc.get_traced_memory()[0]
+        rss_before = read_rss_bytes()
+        start = time.perf_counter()
+
+        value = func()
+        self.app.processEvents(QtCore.QEventLoop.AllEvents)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        heap_after, heap_peak = tracemalloc.get_traced_memory()
+        rss_after = read_rss_bytes()
+        result = {
+            "operation": name,
+            "ms": round(elapsed_ms, 2),
+            "alloc_kb": round((heap_after - heap_before) / 1024, 1) if self.trace_alloc else None,
+            "peak_kb": round((heap_peak - heap_before) / 1024, 1) if self.trace_alloc else None,
+            "rss_kb": round((rss_after - rss_before) / 1024, 1) if rss_before is not None else None,
+        }
+        result.update(details)
+        self.results.append(result)
+        columns = [f"{result['ms']:10.2f} ms"]
+        for key in ("alloc_kb", "peak_kb", "rss_kb"):
+            amount = result[key]
+            columns.append(f"{key[:-3]} {amount if amount is not None else '-':>10} KB")
+        print(f"  {name:28} " + "  ".join(columns))
+        return value
+
+
+def close_modal_dialogs():
+    """Tự đóng mọi modal dialog (QMessageBox...) để run không bị treo"""
+    widget = QtWidgets.QApplication.activeModalWidget()
+    if widget is not None:
+        print(f"  (closing modal dialog: {widget.windowTitle()!r})")
+        widget.close()
+
+
+def create_images(folder, count, width=1280, height=800):
+    paths = []
+    for i in range(count):
+        image = QtGui.QImage(width, height, QtGui.QImage.Format_RGB32)
+        image.fill(QtGui.QColor.fromHsv((i * 37) % 360, 160, 220))
+        painter = QtGui.QPainter(image)
+        painter.drawText(image.rect(), QtCore.Qt.AlignCenter, f"image {i}")
+        painter.end()
+        path = os.path.join(folder, f"harness_image_{i:03d}.png")
+        image.save(path)
+        paths.append(path)
+    return paths
+
+
+def create_tree(root, nodes):
+    """~nodes file trong các thư mục TREE_DIR_CHILD_LIMIT file (hiển thị hết, không cần load more)"""
+    folders = []
+    per_dir = TREE_DIR_CHILD_LIMIT
+    for i in range(nodes):
+        if i % per_dir == 0:
+            folder = os.path.join(root, f"dir_{i // per_dir:03d}")
+            os.makedirs(folder)
+            folders.append(folder)
+        open(os.path.join(folder, f"file_{i:06d}.txt"), "w").close()
+    return folders
+
+
+def run(images, tree_nodes, zoom_steps, trace_alloc=True):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    harness = Harness(app, trace_alloc)
+
+    modal_guard = QtCore.QTimer()
+    modal_guard.timeout.connect(close_modal_dialogs)
+    modal_guard.start(50)
+
+    # Không để harness thay đổi config thật của người dùng
+    config_manager = ConfigManager()
+    config_path = config_manager.config_path
+    config_backup = None
+    if os.path.exists(config_path):
+        with open(config_path, "rb") as f:
+            config_backup = f.read()
+
+    tmp = tempfile.mkdtemp(prefix="gui_harness_")
+    if trace_alloc:
+        tracemalloc.start()
+    dialog = None
+    widget = None
+    user_images_dir = None
+    images_before = set()
+    try:
+        print("Preparing fixtures...")
+        image_dir = os.path.join(tmp, "images")
+        os.makedirs(image_dir)
+        image_paths = create_images(image_dir, images)
+        big_image = create_images(tmp, 1, 2400, 1800)[0]
+        tree_root = os.path.join(tmp, "workspace")
+        os.makedirs(tree_root)
+        folders = create_tree(tree_root, tree_nodes)
+
+        print("Running operations:")
+        dialog = harness.measure("dialog.construct", lambda: InputDialog(SessionStore(os.path.join(tmp, "sessions"))))
+        harness.measure("dialog.show", lambda: (dialog.show(), harness.process_events(100)))
+
+        widget = ImageAttachmentWidget(config_manager=dialog.config_manager)
+        widget.resize(800, 400)
+        widget.show()
+        harness.process_events(200)  # restore_images_from_session chạy sau 100 ms
+        user_images_dir = widget._get_user_images_dir()
+        images_before = set(os.listdir(user_images_dir))
+        harness.measure(f"images.attach_{images}", lambda: widget.handle_attached_images(image_paths),
+                        images=len(widget.attached_images))
+
+        view = FileTreeView()
+        view.resize(600, 900)
+        view.show()
+        model = view.model
+        loaded = set()
+        model.directoryLoaded.connect(loaded.add)
+
+        harness.measure("tree.set_root", lambda: (view.setRootPath(tree_root),
+                                                  harness.wait_until(lambda: tree_root in loaded)))
+
+        def expand_all():
+            for folder in folders:
+                view.expand(model.index(folder))
+            return harness.wait_until(lambda: all(folder in loaded for folder in folders))
+
+        harness.measure(f"tree.expand_{tree_nodes}", expand_all, folders=len(folders))
+        harness.measure("tree.paint", lambda: view.viewport().repaint())
+        harness.measure("tree.scroll_paint_x20", lambda: [
+            (view.verticalScrollBar().setValue(step * view.verticalScrollBar().maximum() // 20), view.viewport().repaint())
+            for step in range(1, 21)
+        ])
+        view.close()
+
+        viewer = harness.measure("viewer.open_2400x1800", lambda: ImageViewerDialog(big_image))
+        harness.measure("viewer.show", lambda: (viewer.show(), harness.process_events(50)))
+        # Zoom từ mức fit: mỗi bước x1.15, 10 bước ~ x4 (zoom từ 100% sẽ tạo pixmap hàng GB)
+        harness.measure("viewer.fit_to_window", viewer.fit_to_window)
+        harness.measure(f"viewer.zoom_in_x{zoom_steps}", lambda: [viewer.zoom_in() for _ in range(zoom_steps)])
+        harness.measure(f"viewer.zoom_out_x{zoom_steps}", lambda: [viewer.zoom_out() for _ in range(zoom_steps)])
+        viewer.close()
+
+        harness.measure("dialog.close", dialog.reject)
+    finally:
+        tracemalloc.stop()
+        modal_guard.stop()
+        # Ghi hết thay đổi pending rồi mới khôi phục, để không có gì ghi đè lên bản backup
+        config_manager.flush()
+        if dialog is not None:
+            dialog.config_manager.flush()
+        if config_backup is not None:
+            with open(config_path, "wb") as f:
+                f.write(config_backup)
+        if user_images_dir is not None:
+            for name in set(os.listdir(user_images_dir)) - images_before:
+                os.remove(os.path.join(user_images_dir, name))
+            if not images_before:
+                # Thư mục do harness tạo ra
+                os.rmdir(user_images_dir)
+        for window in (widget, dialog):
+            if window is not None:
+                window.deleteLater()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    return harness.results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless GUI benchmark harness (Qt offscreen)")
+    parser.add_argument("--images", type=int, default=50, help="Number of images to attach")
+    parser.add_argument("--tree-nodes", type=int, default=50000, help="Number of files in the expanded tree")
+    parser.add_argument("--zoom-steps", type=int, default=10, help="Zoom in/out steps in the image viewer (x1.15 each)")
+    parser.add_argument("--no-alloc", action="store_true", help="Skip tracemalloc (timings without its overhead)")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.images, args.tree_nodes, args.zoom_steps, trace_alloc=not args.no_alloc)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"platform": QtGui.QGuiApplication.platformName(), "results": results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
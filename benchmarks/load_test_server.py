@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Load test for the MCP server with the headless ScriptedResponder
+
+Every tool call is answered from a fixture queue instead of a dialog, so the
+whole server path (tool wrapper, response formatting, image processing,
+serialization) runs back to back without a human in the loop. The fixtures
+mix plain text, attached files, PNG images and continue/cancel answers.
+
+Two modes:
+  - in-process (default): create_server(responder=...) and FastMCP.call_tool,
+  - --stdio: spawn `python -m mcp_server_extension --responder scripted
+    --fixtures ...` and drive it over JSON-RPC with AsyncMCPClient
+    (--concurrency calls in flight).
+
+Reports calls/min, latency percentiles, Python heap (tracemalloc, in-process
+only) and RSS growth.
+
+Usage:
+    python benchmarks/load_test_server.py [--calls 2000] [--image-kb 256] [--stdio] [--concurrency 4]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Add the repository root to the path so we can import the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp_server_extension.core.responders import ScriptedResponder
+from mcp_server_extension.server import TOOL_NAME, create_server
+from mcp_server_extension.utils.mcp_client import AsyncMCPClient
+
+
+def read_rss_bytes():
+    """Resident set size từ /proc (None trên hệ không có /proc)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def write_png(path, size_kb):
+    """PNG hợp lệ ~size_kb KB (dữ liệu ngẫu nhiên trong một chunk phụ)"""
+    import struct
+    import zlib
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", 1, 1, 8, 0, 0, 0, 0)
+    pixels = zlib.compress(b"\x00\x80")
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"prVt", os.urandom(size_kb * 1024))
+                + chunk(b"IDAT", pixels) + chunk(b"IEND", b""))
+
+
+def build_fixtures(folder, image_kb):
+    """Fixture file JSONL: text, files, ảnh, continue và cancel"""
+    write_png(os.path.join(folder, "fixture_a.png"), image_kb)
+    write_png(os.path.join(folder, "fixture_b.png"), image_kb)
+    files = [
+        {"relative_path": f"src/module_{i}.py", "type": "file", "workspace_name": "load_test"} for i in range(20)
+    ] + [{"relative_path": "src/pkg", "type": "folder", "workspace_name": "load_test"}]
+    fixtures = [
+        {"text": "Plain answer " * 40, "continue_chat": True},
+        {"text": "Please review these files", "attached_files": files, "continue_chat": True},
+        {"text": "See the screenshot", "attached_images": [{"path": "fixture_a.png"}], "continue_chat": True},
+        {"text": "Two images and files", "attached_files": files[:5],
+         "attached_images": [{"path": "fixture_a.png"}, {"path": "fixture_b.png"}], "continue_chat": False},
+        {"cancel": True},
+    ]
+    path = os.path.join(folder, "fixtures.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for fixture in fixtures:
+            f.write(json.dumps(fixture) + "\n")
+    return path
+
+
+def report(mode, latencies_ms, elapsed_s, errors, heap=None, rss_delta=None):
+    calls = len(latencies_ms)
+    ordered = sorted(latencies_ms)
+    print(f"Mode: {mode}")
+    print(f"  calls        {calls} ({errors} errors) in {elapsed_s:.2f} s")
+    print(f"  throughput   {calls / elapsed_s * 60:,.0f} calls/min")
+    if ordered:
+        print(f"  latency ms   p50 {statistics.median(ordered):.2f}  "
+              f"p95 {ordered[int(len(ordered) * 0.95) - 1]:.2f}  max {ordered[-1]:.2f}")
+    if heap is not None:
+        print(f"  heap KB      net {heap[0] / 1024:,.1f}  peak {heap[1] / 1024:,.1f}")
+    if rss_delta is not None:
+        print(f"  rss KB       +{rss_delta / 1024:,.1f}")
+
+
+async def run_in_process(fixtures_path, calls, trace_alloc):
+    responder = ScriptedResponder.from_file(fixtures_path, loop=True)
+    server = create_server(responder=responder)
+
+    # Warm-up: import lazy modules và cache ảnh fixture trước khi đo
+    for _ in range(responder.pending()):
+        await server.call_tool(TOOL_NAME, {})
+
+    if trace_alloc:
+        tracemalloc.start()
+    rss_before = read_rss_bytes()
+    heap_before = tracemalloc.get_traced_memory()[0]
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for _ in range(calls):
+        call_start = time.perf_counter()
+        try:
+            await server.call_tool(TOOL_NAME, {})
+        except Exception as e:
+            errors += 1
+            print(f"[LoadTest] Tool call failed: {str(e)}", file=sys.stderr)
+        latencies.append((time.perf_counter() - call_start) * 1000)
+    elapsed = time.perf_counter() - start
+
+    heap = None
+    if trace_alloc:
+        current, peak = tracemalloc.get_traced_memory()
+        heap = (current - heap_before, peak - heap_before)
+        tracemalloc.stop()
+    rss_after = read_rss_bytes()
+    rss_delta = rss_after - rss_before if rss_before is not None else None
+    report("in-process", latencies, elapsed, errors, heap, rss_delta)
+    return errors == 0
+
+
+async def run_stdio(fixtures_path, calls, concurrency):
+    # Server con import package từ repo này
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [repo_root, os.environ.get("PYTHONPATH")]))
+    client = AsyncMCPClient(
+        sys.executable,
+        ["-m", "mcp_server_extension", "--responder", "scripted", "--fixtures", fixtures_path],
+        request_timeout=60
+    )
+    if not await client.start():
+        return False
+    try:
+        if await client.initialize() is None:
+            return False
+
+        latencies, errors = [], 0
+        remaining = iter(range(calls))
+
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                call_start = time.perf_counter()
+                try:
+                    response = await client.call_tool(TOOL_NAME, {}, timeout=60)
+                    if response.get("result", {}).get("isError", True):
+                        errors += 1
+                except Exception as e:
+                    errors += 1
+                    print(f"[LoadTest] Tool call failed: {str(e)}", file=sys.stderr)
+                latencies.append((time.perf_counter() - call_start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        report(f"stdio (concurrency {concurrency})", latencies, elapsed, errors)
+        return errors == 0
+    finally:
+        await client.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP server load test with the scripted responder")
+    parser.add_argument("--calls", type=int, default=2000, help="Number of tool calls")
+    parser.add_argument("--image-kb", type=int, default=256, help="Size of each fixture image")
+    parser.add_argument("--fixtures", help="Use this fixture file (JSON/JSONL) instead of the generated one")
+    parser.add_argument("--stdio", action="store_true", help="Drive a server subprocess over stdio")
+    parser.add_argument("--concurrency", type=int, default=4, help="Calls in flight in --stdio mode")
+    parser.add_argument("--no-alloc", action="store_true", help="Skip tracemalloc (in-process mode)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="load_test_") as tmp:
+        fixtures_path = args.fixtures or build_fixtures(tmp, args.image_kb)
+        if args.stdio:
+            ok = asyncio.run(run_stdio(fixtures_path, args.calls, args.concurrency))
+        else:
+            ok = asyncio.run(run_in_process(fixtures_path, args.calls, not args.no_alloc))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
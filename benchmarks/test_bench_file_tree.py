@@ -0,0 +1,164 @@
+"""
+Behaviour checks for the lazy file tree under the Qt offscreen platform
+
+Not timings: these guard the background-scan bookkeeping of FileSystemModel
+(root switches cancelling pending scans) and TreeExpander on 20-level-deep
+targets (every ancestor expanded, finished emitted once, no fixed timer
+delays) that the tree benchmarks rely on.
+
+Usage:
+    python -m pytest benchmarks/test_bench_file_tree.py
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# Add the repository root to the path so we can import the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QtWidgets = pytest.importorskip("PyQt5.QtWidgets")
+from PyQt5 import QtCore
+
+from mcp_server_extension.constants import TREE_EXPAND_TIMEOUT_MS
+from mcp_server_extension.ui import file_tree
+from mcp_server_extension.ui.file_tree import FileSystemModel, FileTreeView
+from mcp_server_extension.ui.workers import DirectoryScanWorker
+
+from bench_tree_expander import build_deep_workspace, is_visible
+
+TREE_DEPTH = 20
+TREE_TARGETS = 4
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def make_workspace(root, name, files):
+    path = os.path.join(root, name)
+    os.makedirs(path)
+    for i in range(files):
+        with open(os.path.join(path, f"file_{i}.txt"), "w", encoding="utf-8") as f:
+            f.write("x")
+    return path
+
+
+def wait_until(app, condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        app.processEvents(QtCore.QEventLoop.AllEvents, 10)
+    return condition()
+
+
+def test_root_switch_back_loads_with_held_workers(qapp, tmp_path, monkeypatch):
+    """A -> B -> A while no scan has run yet: the scans of the first A and of B are cancelled"""
+    root_a = make_workspace(str(tmp_path), "a", 3)
+    root_b = make_workspace(str(tmp_path), "b", 2)
+    held = []
+
+    def hold_scan(generation, path, is_cancelled, on_finished, ignore_rules=None):
+        worker = DirectoryScanWorker(generation, path, is_cancelled, ignore_rules)
+        worker.signals.finished.connect(on_finished)
+        held.append(worker)
+        return worker
+
+    monkeypatch.setattr(file_tree, "start_directory_scan", hold_scan)
+    model = FileSystemModel()
+    model.setRootPath(root_a)
+    model.setRootPath(root_b)
+    root_index = model.setRootPath(root_a)
+
+    assert len(held) == 3
+    for worker in held:
+        worker.run()
+
+    assert model.isLoaded(root_index)
+    assert model.rowCount(root_index) == 3
+    assert model._scan_workers == {}
+
+
+def test_quick_root_switch_back_loads(qapp, tmp_path):
+    """Same switch with the real thread pool: the root ends up loaded and no scan stays registered"""
+    root_a = make_workspace(str(tmp_path), "a", 3)
+    root_b = make_workspace(str(tmp_path), "b", 2)
+
+    model = FileSystemModel()
+    model.setRootPath(root_a)
+    model.setRootPath(root_b)
+    root_index = model.setRootPath(root_a)
+
+    assert wait_until(qapp, lambda: model.isLoaded(root_index) and not model._scan_workers)
+    assert model.rowCount(root_index) == 3
+
+
+@pytest.fixture
+def deep_view(qapp, tmp_path):
+    root = os.path.join(str(tmp_path), "workspace")
+    os.makedirs(root)
+    targets = build_deep_workspace(root, TREE_DEPTH, TREE_TARGETS)
+    view = FileTreeView()
+    view.resize(600, 900)
+    view.show()
+    view.setRootPath(root)
+    yield view, targets
+    view.close()
+
+
+def expand_and_wait(qapp, view, targets):
+    """expandToPaths + wait; returns (finished count, elapsed ms until the callback)"""
+    finished = []
+    done = []
+    view.expander.finished.connect(lambda: finished.append(True))
+    start = time.perf_counter()
+    view.expandToPaths(targets, scroll_to=targets[0], on_finished=lambda: done.append(time.perf_counter()))
+    assert wait_until(qapp, lambda: bool(done), TREE_EXPAND_TIMEOUT_MS / 1000 + 2)
+    # Thêm một lượt event loop để bắt lần emit thừa
+    wait_until(qapp, lambda: False, 0.1)
+    view.expander.finished.disconnect()
+    return len(finished), (done[0] - start) * 1000
+
+
+def test_expander_reaches_deep_targets(qapp, deep_view, monkeypatch):
+    view, targets = deep_view
+    delays = []
+    single_shot = QtCore.QTimer.singleShot
+
+    def record_single_shot(msec, *args):
+        delays.append(msec)
+        return single_shot(msec, *args)
+
+    monkeypatch.setattr(QtCore.QTimer, "singleShot", staticmethod(record_single_shot))
+    finished, elapsed_ms = expand_and_wait(qapp, view, targets)
+
+    assert all(is_visible(view, target) for target in targets)
+    assert finished == 1
+    # Kết thúc theo directoryLoaded, không phải timer guard hay delay cố định mỗi level
+    assert elapsed_ms < TREE_EXPAND_TIMEOUT_MS
+    assert not view.expander._guard_timer.isActive()
+    assert [delay for delay in delays if delay > 0] == []
+
+
+def test_expander_finishes_once_when_listings_are_cached(qapp, deep_view, monkeypatch):
+    """Rebuilt from cached listings, each directory loads synchronously inside expand()"""
+    view, targets = deep_view
+    expand_and_wait(qapp, view, targets)
+    view.model.setVisiblePaths(None)
+    expand = view.expand
+
+    def expand_and_fetch(index):
+        # Như QTreeView gọi fetchMore ngay trong expand: directoryLoaded tới trước khi expand() trả về
+        expand(index)
+        if view.model.canFetchMore(index):
+            view.model.fetchMore(index)
+
+    monkeypatch.setattr(view, "expand", expand_and_fetch)
+    finished, _ = expand_and_wait(qapp, view, targets)
+
+    assert finished == 1
+    assert all(is_visible(view, target) for target in targets)
@@ -0,0 +1,167 @@
+"""
+pytest-benchmark suite for the non-GUI hot paths
+
+Covers response text building with large attachment lists, process_images with
+many / large images, read_file_content across encodings and binaries,
+normalize_path_unicode (cold and warm cache) and validate_file_path_in_workspace
+on a deep tree (cold and warm stat cache).
+
+A plain run only reports timings. The regression gate is opt-in and compares
+against a baseline recorded on the same machine, with per-group thresholds on
+the min and an IQR noise band (see benchmarks/conftest.py).
+
+Usage:
+    python -m pytest benchmarks                   # report only
+    python -m pytest benchmarks --bench-record    # record this machine's baseline
+    python -m pytest benchmarks --bench-gate      # fail on regressions against it
+"""
+
+import base64
+import os
+import random
+import sys
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+# Add the repository root to the path so we can import the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp_server_extension.core.response_formatter import _build_text_content_with_tags
+from mcp_server_extension.utils.file_utils import (
+    _normalize_path_cached,
+    invalidate_stat_cache,
+    normalize_path_unicode,
+    read_file_content,
+    validate_file_path_in_workspace,
+)
+from mcp_server_extension.utils.image_processing import process_images
+
+TREE_DEPTH = 30
+TREE_FILES = 1000
+
+
+def make_attached_files(count):
+    """Typed records như dialog gửi lên: xen kẽ files, folders và vài lỗi"""
+    records = []
+    for i in range(count):
+        if i % 50 == 49:
+            records.append({"name": f"broken_{i}.txt", "error": "File/folder does not exist"})
+        else:
+            records.append({
+                "relative_path": f"workspace/src/pkg_{i // 100:03d}/module_{i}.py",
+                "workspace_name": "workspace",
+                "type": "folder" if i % 10 == 0 else "file",
+            })
+    return records
+
+
+def make_images(count, size):
+    rng = random.Random(size)
+    data = base64.b64encode(rng.randbytes(size)).decode("ascii")
+    return [
+        {"base64_data": data, "media_type": "image/png", "filename": f"image_{i}.png"}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture(scope="module")
+def sample_files(tmp_path_factory):
+    """Các file ~1 MB với encoding khác nhau và một file binary"""
+    root = tmp_path_factory.mktemp("encodings")
+    line = "Xin chào thế giới - hello world - café naïve\n"
+    text = line * (1024 * 1024 // len(line.encode("utf-8")))
+    rng = random.Random(0)
+
+    files = {
+        "utf8": ("sample_utf8.txt", text.encode("utf-8")),
+        "utf8_sig": ("sample_utf8_sig.txt", text.encode("utf-8-sig")),
+        "utf16": ("sample_utf16.txt", text.encode("utf-16")),
+        "latin1": ("sample_latin1.txt", text.replace("ế", "e").replace("à", "a").replace("ớ", "o").encode("latin-1")),
+        "binary": ("sample.bin", rng.randbytes(1024 * 1024)),
+    }
+    paths = {}
+    for key, (name, data) in files.items():
+        path = root / name
+        path.write_bytes(data)
+        paths[key] = str(path)
+    return paths
+
+
+@pytest.fixture(scope="module")
+def deep_tree(tmp_path_factory):
+    """Workspace với một chuỗi TREE_DEPTH thư mục lồng nhau, TREE_FILES file ở đáy"""
+    workspace = tmp_path_factory.mktemp("workspace")
+    folder = workspace
+    for level in range(TREE_DEPTH):
+        folder = folder / f"level_{level:02d}_thư_mục"
+    folder.mkdir(parents=True)
+    files = []
+    for i in range(TREE_FILES):
+        path = folder / f"file_{i:04d}.py"
+        path.touch()
+        files.append(str(path))
+    return str(workspace), files
+
+
+@pytest.mark.benchmark(group="response_text")
+@pytest.mark.parametrize("count", [1000, 20000])
+def test_build_text_content_with_tags(benchmark, count):
+    attached_files = make_attached_files(count)
+    text = benchmark(_build_text_content_with_tags, "Please review these files", attached_files, True)
+    assert text.endswith("</AI_EXTENSION_CONTINUE_CHAT>")
+
+
+@pytest.mark.benchmark(group="process_images")
+@pytest.mark.parametrize("count,size", [(50, 64 * 1024), (5, 5 * 1024 * 1024)], ids=["50x64KB", "5x5MB"])
+def test_process_images(benchmark, count, size):
+    images = make_images(count, size)
+    result = benchmark(process_images, images)
+    assert len(result) == count
+
+
+@pytest.mark.benchmark(group="read_file_content")
+@pytest.mark.parametrize("kind", ["utf8", "utf8_sig", "utf16", "latin1", "binary"])
+def test_read_file_content(benchmark, sample_files, kind):
+    result = benchmark(read_file_content, sample_files[kind])
+    assert result["success"]
+
+
+@pytest.mark.benchmark(group="normalize_path_unicode")
+@pytest.mark.parametrize("alphabet", ["ascii", "vietnamese_nfd"])
+@pytest.mark.parametrize("cache", ["cold", "warm"])
+def test_normalize_path_unicode(benchmark, alphabet, cache):
+    if alphabet == "ascii":
+        paths = [f"/home/user/project/src/module_{i}/file_{i}.py" for i in range(5000)]
+    else:
+        # "Tiếng Việt" ở dạng NFD (dấu tách rời) như macOS trả về
+        paths = [f"/home/user/dụ án/thư mục_{i}/tệp_{i}.py" for i in range(5000)]
+
+    def normalize_all():
+        for path in paths:
+            normalize_path_unicode(path)
+
+    if cache == "cold":
+        benchmark.pedantic(normalize_all, setup=_normalize_path_cached.cache_clear, rounds=20)
+    else:
+        normalize_all()
+        benchmark(normalize_all)
+
+
+@pytest.mark.benchmark(group="validate_file_path_in_workspace")
+@pytest.mark.parametrize("cache", ["cold", "warm"])
+def test_validate_file_path_in_workspace(benchmark, deep_tree, cache):
+    workspace, files = deep_tree
+
+    def validate_all():
+        for path in files:
+            result = validate_file_path_in_workspace(path, workspace)
+        return result
+
+    if cache == "cold":
+        result = benchmark.pedantic(validate_all, setup=invalidate_stat_cache, rounds=20)
+    else:
+        validate_all()
+        result = benchmark(validate_all)
+    assert result["valid"]
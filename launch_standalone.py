@@ -1,17 +1,54 @@
 #!/usr/bin/env python3
 """
 Launcher script for AI extension Tool standalone UI
+
+Usage:
+    python launch_standalone.py                       # run the UI in this process
+    python launch_standalone.py --mcp [--repeat N]    # run it through pre-warmed MCP servers
 """
 
+import argparse
 import sys
 import os
 
 # Add the current directory to the path so we can import the module
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+def run_via_mcp(pool_size, repeat):
+    """
+    Run the tool through MCP servers leased from a pool of pre-warmed processes.
+    While one session is open the pool already starts the next server, so every
+    session after the first skips interpreter and Qt startup.
+    """
+    from AI_EXTENSION_tool.utils.mcp_client import MCPServerPool
+
+    results = []
+    with MCPServerPool(size=pool_size) as pool:
+        for session in range(repeat):
+            with pool.leased() as client:
+                if client is None:
+                    print("Could not start an MCP server.")
+                    return None
+                tools = client.list_tools() or []
+                if not tools:
+                    print("The MCP server reported no tools.")
+                    return None
+                print(f"Launching AI extension Tool via MCP (session {session + 1}/{repeat})...")
+                results.append(client.call_tool(tools[0]["name"], {}))
+    print("AI extension Tool closed.")
+    return results[-1] if results else None
+
 def main():
     """Launch the AI extension Tool standalone UI"""
+    parser = argparse.ArgumentParser(description="Launch the AI extension Tool UI")
+    parser.add_argument("--mcp", action="store_true", help="Run the UI through an MCP server instead of in-process")
+    parser.add_argument("--pool-size", type=int, default=1, help="Number of pre-warmed MCP servers (with --mcp)")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of sessions to run (with --mcp)")
+    args = parser.parse_args()
+
     try:
+        if args.mcp:
+            return run_via_mcp(args.pool_size, max(1, args.repeat))
         from AI_EXTENSION_tool.engine import run_ui
         print("Launching AI extension Tool...")
         result = run_ui()
@@ -26,4 +63,4 @@ def main():
         return None
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main() 
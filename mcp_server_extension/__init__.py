@@ -57,7 +57,7 @@ from .utils import (
     get_mcp_server_config,
     setup_mcp_config,
     get_server_command,
-    mcp_config_manager
+    get_mcp_config_manager
 )
 
 # Export main components
@@ -95,6 +95,7 @@ __all__ = [
     'get_mcp_server_config',
     'setup_mcp_config',
     'get_server_command',
+    'get_mcp_config_manager',
     'mcp_config_manager',
     
     # Metadata
@@ -105,6 +106,12 @@ __all__ = [
     '__description__'
 ]
 
+def __getattr__(name):
+    # mcp_config_manager được tạo lazily khi truy cập lần đầu
+    if name == 'mcp_config_manager':
+        return get_mcp_config_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 def AI_EXTENSION():
     """Entry point for the AI extension tool"""
     from .core.mcp_handler import AI_EXTENSION_tool
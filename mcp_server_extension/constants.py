@@ -9,14 +9,79 @@ MAX_FILE_LIST_HEIGHT = 80
 
 # File settings
 CONFIG_FILENAME = "config.json"
+CONFIG_SAVE_DELAY = 0.5       # Giây - gom các lần ghi config liên tiếp thành một lần
+CONFIG_RELOAD_INTERVAL = 1.0  # Giây - tần suất tối đa kiểm tra mtime để reload config
+
+# Session settings (state theo từng workspace)
+SESSIONS_DIRNAME = "sessions"
+SESSION_HISTORY_SIZE = 10     # Số bộ attachment gần nhất giữ lại mỗi workspace
+SESSION_MAX_WORKSPACES = 50   # Số workspace tối đa trước khi xóa workspace cũ nhất (LRU)
 SUPPORTED_ENCODINGS = ["utf-8", "utf-8-sig", "latin-1", "cp1252"]
 
 # UI settings
 TREE_DEPTH_EXPANSION = 0
+TREE_EXPAND_TIMEOUT_MS = 10000  # Guard cho TreeExpander nếu directoryLoaded không bao giờ tới
+TREE_DIR_CHILD_LIMIT = 1000     # Số item tối đa mỗi lần hiển thị trong một thư mục (phần còn lại sau "load more")
+TREE_FILTER_DEBOUNCE_MS = 250   # Chờ người dùng ngừng gõ trước khi lọc cây thư mục
+TREE_FILTER_EXPAND_LIMIT = 50   # Số kết quả lọc đầu tiên được tự động expand tới
+TREE_INDEX_MAX_ENTRIES = 500000 # Giới hạn số entry trong name index của workspace
+# Luôn ẩn khỏi cây thư mục (cú pháp .gitignore); người dùng thêm pattern qua config
+DEFAULT_TREE_EXCLUDES = [
+    ".git/",
+    "node_modules/",
+    "__pycache__/",
+    "venv/",
+    ".venv/",
+    "*.pyc"
+]
 SHADOW_BLUR_RADIUS = 15
 SHADOW_OFFSET = (0, 0)
 SHADOW_OPACITY = 80
 
+# Cache settings
+NORMALIZE_CACHE_SIZE = 8192   # Số path đã chuẩn hóa được giữ trong LRU cache
+STAT_CACHE_TTL = 2.0          # Giây - thời gian sống của kết quả stat
+STAT_CACHE_MAX_ENTRIES = 4096
+
+# Background validation settings
+VALIDATION_WORKERS = 8        # Số thread stat song song khi validate attachments đã lưu
+VALIDATION_CHUNK_SIZE = 64    # Số path mỗi chunk
+
+# MCP client settings
+MCP_PROTOCOL_VERSION = "2024-11-05"
+MCP_REQUEST_TIMEOUT = 30.0             # Giây - timeout mặc định cho mỗi request (tool call không giới hạn)
+MCP_STREAM_LIMIT = 64 * 1024 * 1024    # Byte - độ dài tối đa một dòng JSON-RPC (response có ảnh base64)
+MCP_START_TIMEOUT = 15.0               # Giây - deadline chờ server trả lời initialize khi khởi động
+MCP_POOL_SIZE = 1                      # Số server process được khởi động sẵn trong MCPServerPool
+
+# VS Code bridge settings (socket/named pipe do VS Code extension mở)
+VSCODE_BRIDGE_ENV_VAR = "AI_EXTENSION_VSCODE_SOCKET"  # Đường dẫn socket/pipe (mặc định: vscode_bridge.default_bridge_path())
+VSCODE_BRIDGE_NAME = "ai-extension-vscode"
+VSCODE_BRIDGE_CONNECT_TIMEOUT = 2.0            # Giây - không kết nối được thì fallback sang Qt dialog
+VSCODE_BRIDGE_MAX_FRAME = 64 * 1024 * 1024     # Byte - kích thước tối đa một frame (một ảnh)
+VSCODE_BRIDGE_POLL_INTERVAL = 0.2              # Giây - chu kỳ kiểm tra cancel khi chờ người dùng
+
+# Tracing settings (tắt mặc định; bật bằng biến môi trường TRACE_ENV_VAR)
+TRACE_ENV_VAR = "AI_EXTENSION_TRACE"   # Đường dẫn file JSONL, "1" = file mặc định, "otel" = OpenTelemetry SDK
+TRACE_DEFAULT_FILE = os.path.join(os.path.expanduser("~"), ".ai_extension_trace.jsonl")
+TRACE_SERVICE_NAME = "ai-extension"
+
+# Logging settings (log luôn ghi ra stderr - stdout là kênh JSON-RPC của stdio transport)
+LOG_LEVEL_ENV_VAR = "AI_EXTENSION_LOG_LEVEL"     # DEBUG, INFO (mặc định), WARNING, ERROR
+LOG_FORMAT_ENV_VAR = "AI_EXTENSION_LOG_FORMAT"   # "text" (mặc định, "[Component] message") hoặc "json"
+
+# Metrics settings
+METRICS_PREFIX = "ai_extension"
+METRICS_RESERVOIR_SIZE = 1024   # Số giá trị gần nhất mỗi histogram giữ để tính percentile
+METRICS_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, 120.0, 600.0)  # Giây
+
+# Memory profiling settings (tắt mặc định; bật bằng biến môi trường MEMPROFILE_ENV_VAR)
+MEMPROFILE_ENV_VAR = "AI_EXTENSION_MEMPROFILE"   # Đường dẫn file JSONL, "1" = file mặc định
+MEMPROFILE_DEFAULT_FILE = os.path.join(os.path.expanduser("~"), ".ai_extension_memory.jsonl")
+MEMPROFILE_TOP_N = 10          # Số allocation site / object type trong mỗi report
+MEMPROFILE_HISTORY = 50        # Số report gần nhất giữ trong bộ nhớ (debug resource)
+MEMPROFILE_FRAMES = 1          # Số frame tracemalloc lưu cho mỗi allocation
+
 # Default paths
 DEFAULT_PATH = os.path.expanduser("~")
 
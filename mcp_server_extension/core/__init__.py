@@ -2,22 +2,31 @@
 # Contains configuration management, response formatting, and MCP handler
 
 from .config import ConfigManager
+from .session_store import SessionStore
 from .dialog import InputDialog
 from .response_formatter import (
     format_mixed_response, 
+    iter_mixed_response,
     format_text_only_response, 
     build_error_response,
     validate_response_data
 )
 from .mcp_handler import AI_EXTENSION_tool, get_tool_description
+from .responders import QtResponder, VSCodeResponder, ScriptedResponder, create_responder
 
 __all__ = [
     'ConfigManager',
+    'SessionStore',
     'InputDialog',
     'format_mixed_response',
+    'iter_mixed_response',
     'format_text_only_response', 
     'build_error_response',
     'validate_response_data',
     'AI_EXTENSION_tool',
-    'get_tool_description'
+    'get_tool_description',
+    'QtResponder',
+    'VSCodeResponder',
+    'ScriptedResponder',
+    'create_responder'
 ] 
\ No newline at end of file
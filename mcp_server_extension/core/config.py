@@ -1,12 +1,73 @@
 # Configuration management for AI extension Tool
+import atexit
+import contextlib
+import copy
 import json
 import os
-import sys
-from ..constants import CONFIG_FILENAME, DEFAULT_LANGUAGE
+import threading
+import time
+import weakref
+from ..utils.log import get_logger
+from ..utils.metrics import get_metrics
+from ..constants import CONFIG_FILENAME, CONFIG_SAVE_DELAY, CONFIG_RELOAD_INTERVAL, DEFAULT_LANGUAGE
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = get_logger("ConfigManager")
+_config_writes = get_metrics().counter("config_writes_total", "config.json writes by result")
+
+# Các ConfigManager còn sống - flush khi process thoát
+_live_managers = weakref.WeakSet()
+
+
+def _flush_all_managers():
+    """Ghi các thay đổi còn pending của mọi ConfigManager khi thoát"""
+    for manager in list(_live_managers):
+        manager.flush()
+
+
+atexit.register(_flush_all_managers)
+
+
+@contextlib.contextmanager
+def _locked_file(lock_path):
+    """
+    Exclusive lock liên process trên lock_path (fcntl trên POSIX, msvcrt trên Windows)
+    """
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
 
 class ConfigManager:
     """
     Quản lý cấu hình cho AI extension Tool
+    
+    Các setter chỉ đánh dấu dirty và hẹn ghi (write-behind); các lần ghi
+    liên tiếp trong CONFIG_SAVE_DELAY giây được gom thành một. Gọi flush()
+    để ghi ngay (đóng dialog, thoát process).
+    
+    Nhiều process (mỗi IDE window một MCP server) dùng chung config.json:
+    flush() giữ file lock, đọc lại bản trên disk và chỉ ghi đè các key đã
+    thay đổi; get() reload khi mtime/size của file đổi (kiểm tra tối đa
+    mỗi CONFIG_RELOAD_INTERVAL giây).
     """
     
     def __init__(self):
@@ -17,12 +78,21 @@ class ConfigManager:
             os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
             CONFIG_FILENAME
         )
+        self.lock_path = self.config_path + '.lock'
         self.config = self._load_default_config()
+        self._lock = threading.RLock()
+        # Dotted keys đã set nhưng chưa ghi xuống disk
+        self._dirty_keys = set()
+        self._save_timer = None
+        # (mtime_ns, size) của file lần cuối đọc/ghi, dùng để phát hiện process khác ghi
+        self._disk_signature = None
+        self._last_reload_check = 0.0
         self.load_config()
+        _live_managers.add(self)
         
         # Ensure config file exists - create it if this is first run
         if not os.path.exists(self.config_path):
-            print(f"[ConfigManager] First run detected, creating config file at {self.config_path}", file=sys.stderr)
+            logger.info(f"First run detected, creating config file at {self.config_path}")
             self.save_config()
     
     def _load_default_config(self):
@@ -42,6 +112,9 @@ class ConfigManager:
                 'continue_chat_default': True,
                 'remember_last_path': True,
                 'auto_expand_folders': True
+            },
+            'file_tree': {
+                'exclude_globs': []
             }
         }
     
@@ -51,21 +124,21 @@ class ConfigManager:
         """
         try:
             if os.path.exists(self.config_path):
+                self._disk_signature = self._get_disk_signature()
                 with open(self.config_path, 'r', encoding='utf-8') as f:
                     loaded_config = json.load(f)
                     # Merge với config mặc định để đảm bảo có đủ các key
                     # Use recursive merge để preserve nested structure
                     self._deep_merge(self.config, loaded_config)
-                    print(f"[ConfigManager] Đã tải cấu hình từ {self.config_path}", file=sys.stderr)
+                    logger.info(f"Đã tải cấu hình từ {self.config_path}")
             else:
-                print(f"[ConfigManager] File cấu hình không tồn tại, sử dụng cấu hình mặc định", file=sys.stderr)
+                logger.info("File cấu hình không tồn tại, sử dụng cấu hình mặc định")
         except (json.JSONDecodeError, FileNotFoundError, PermissionError) as e:
-            print(f"[ConfigManager] Lỗi khi tải cấu hình: {str(e)}", file=sys.stderr)
-            print(f"[ConfigManager] Sử dụng cấu hình mặc định", file=sys.stderr)
+            logger.error(f"Lỗi khi tải cấu hình: {str(e)} - sử dụng cấu hình mặc định")
             # Reset to default config on any error
             self.config = self._load_default_config()
         except Exception as e:
-            print(f"[ConfigManager] Lỗi không mong đợi khi tải cấu hình: {str(e)}", file=sys.stderr)
+            logger.exception(f"Lỗi không mong đợi khi tải cấu hình: {str(e)}")
             # Sử dụng cấu hình mặc định nếu có lỗi
             self.config = self._load_default_config()
     
@@ -83,45 +156,172 @@ class ConfigManager:
             else:
                 base_dict[key] = value
     
+    def _get_disk_signature(self):
+        """(mtime_ns, size) của config file, None nếu không tồn tại"""
+        try:
+            stat_result = os.stat(self.config_path)
+            return stat_result.st_mtime_ns, stat_result.st_size
+        except OSError:
+            return None
+    
+    def _read_disk_config(self):
+        """Đọc config trên disk, None nếu không tồn tại hoặc không hợp lệ"""
+        try:
+            with open(self.config_path, 'r', encoding='utf-8') as f:
+                loaded_config = json.load(f)
+            return loaded_config if isinstance(loaded_config, dict) else None
+        except (OSError, ValueError):
+            return None
+    
+    @staticmethod
+    def _get_path(config_dict, key):
+        """Lấy (found, value) theo dotted key"""
+        value = config_dict
+        for k in key.split('.'):
+            if isinstance(value, dict) and k in value:
+                value = value[k]
+            else:
+                return False, None
+        return True, value
+    
+    @staticmethod
+    def _set_path(config_dict, key, value):
+        """Đặt value theo dotted key, tạo dict trung gian nếu cần"""
+        keys = key.split('.')
+        config_ref = config_dict
+        for k in keys[:-1]:
+            if not isinstance(config_ref.get(k), dict):
+                config_ref[k] = {}
+            config_ref = config_ref[k]
+        config_ref[keys[-1]] = value
+    
+    def _apply_dirty_keys(self, target):
+        """Ghi giá trị của các dirty key (từ self.config) lên target, key cha trước"""
+        for key in sorted(self._dirty_keys, key=lambda k: k.count('.')):
+            found, value = self._get_path(self.config, key)
+            if found:
+                self._set_path(target, key, copy.deepcopy(value))
+    
+    def _adopt_disk_config(self, disk_config):
+        """Thay self.config bằng defaults + disk, giữ lại các thay đổi chưa ghi"""
+        merged = self._load_default_config()
+        self._deep_merge(merged, disk_config)
+        self._apply_dirty_keys(merged)
+        self.config = merged
+    
+    def reload_if_changed(self, force=False):
+        """
+        Reload config nếu process khác đã ghi file (so sánh mtime/size).
+        Không đọc lại quá một lần mỗi CONFIG_RELOAD_INTERVAL giây trừ khi force.
+        
+        Returns:
+            bool: True nếu đã reload
+        """
+        now = time.monotonic()
+        if not force and now - self._last_reload_check < CONFIG_RELOAD_INTERVAL:
+            return False
+        
+        with self._lock:
+            self._last_reload_check = now
+            signature = self._get_disk_signature()
+            if signature is None or signature == self._disk_signature:
+                return False
+            
+            disk_config = self._read_disk_config()
+            if disk_config is None:
+                return False
+            
+            self._adopt_disk_config(disk_config)
+            self._disk_signature = signature
+            return True
+    
+    def request_save(self):
+        """
+        Đánh dấu config dirty và hẹn ghi sau CONFIG_SAVE_DELAY giây.
+        Các request trong cùng khoảng thời gian được gom thành một lần ghi.
+        """
+        with self._lock:
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(CONFIG_SAVE_DELAY, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+    
+    def flush(self):
+        """
+        Ghi ngay các thay đổi còn pending (no-op nếu không có gì thay đổi)
+        
+        Returns:
+            bool: True nếu không có lỗi
+        """
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty_keys:
+                return True
+            if self._write_config():
+                self._dirty_keys.clear()
+                return True
+            return False
+    
     def save_config(self):
         """
-        Lưu cấu hình vào file config.json
+        Lưu cấu hình vào file config.json ngay lập tức
+        
+        Returns:
+            bool: True nếu lưu thành công, False nếu có lỗi
+        """
+        with self._lock:
+            self._dirty_keys.update(self.config.keys())
+            return self.flush()
+    
+    def _write_config(self):
+        """
+        Dưới file lock: đọc bản trên disk, ghi đè các dirty key, serialize
+        (compact) và thay file bằng một lần os.replace
         
         Returns:
             bool: True nếu lưu thành công, False nếu có lỗi
         """
+        temp_path = f"{self.config_path}.{os.getpid()}.tmp"
         try:
             # Validate config before saving
             if not isinstance(self.config, dict):
-                print(f"[ConfigManager] Cấu hình không hợp lệ (không phải dict)", file=sys.stderr)
+                logger.error("Cấu hình không hợp lệ (không phải dict)")
+                _config_writes.inc(result="error")
                 return False
             
             # Tạo thư mục nếu chưa tồn tại
             config_dir = os.path.dirname(self.config_path)
             os.makedirs(config_dir, exist_ok=True)
             
-            # Write to temporary file first, then rename (atomic operation)
-            temp_path = self.config_path + '.tmp'
-            with open(temp_path, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, ensure_ascii=False, indent=2)
-            
-            # Atomic rename to prevent corruption
-            if os.path.exists(self.config_path):
-                # Backup existing config before replace
-                backup_path = self.config_path + '.bak'
-                if os.path.exists(backup_path):
-                    os.remove(backup_path)
-                os.rename(self.config_path, backup_path)
-            
-            os.rename(temp_path, self.config_path)
+            with _locked_file(self.lock_path):
+                # Merge per-key lên bản mới nhất để không ghi đè thay đổi của process khác
+                disk_config = self._read_disk_config()
+                if disk_config is None:
+                    merged = copy.deepcopy(self.config)
+                else:
+                    merged = disk_config
+                    self._apply_dirty_keys(merged)
+                
+                data = json.dumps(merged, ensure_ascii=False, separators=(',', ':'))
+                
+                # Write to temporary file first, then replace (atomic operation)
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                
+                os.replace(temp_path, self.config_path)
+                self._disk_signature = self._get_disk_signature()
             
-            print(f"[ConfigManager] Đã lưu cấu hình vào {self.config_path}", file=sys.stderr)
+            if disk_config is not None:
+                self._adopt_disk_config(merged)
+            _config_writes.inc(result="ok")
             return True
             
         except (PermissionError, OSError) as e:
-            print(f"[ConfigManager] Lỗi quyền truy cập khi lưu cấu hình: {str(e)}", file=sys.stderr)
+            logger.error(f"Lỗi quyền truy cập khi lưu cấu hình: {str(e)}")
+            _config_writes.inc(result="error")
             # Clean up temp file if exists
-            temp_path = self.config_path + '.tmp'
             if os.path.exists(temp_path):
                 try:
                     os.remove(temp_path)
@@ -129,9 +329,9 @@ class ConfigManager:
                     pass
             return False
         except Exception as e:
-            print(f"[ConfigManager] Lỗi không mong đợi khi lưu cấu hình: {str(e)}", file=sys.stderr)
+            logger.exception(f"Lỗi không mong đợi khi lưu cấu hình: {str(e)}")
+            _config_writes.inc(result="error")
             # Clean up temp file if exists
-            temp_path = self.config_path + '.tmp'
             if os.path.exists(temp_path):
                 try:
                     os.remove(temp_path)
@@ -150,6 +350,7 @@ class ConfigManager:
         Returns:
             Giá trị cấu hình hoặc default
         """
+        self.reload_if_changed()
         try:
             keys = key.split('.')
             value = self.config
@@ -174,18 +375,20 @@ class ConfigManager:
         """
         try:
             keys = key.split('.')
-            config_ref = self.config
-            
-            # Navigate to the parent of the target key
-            for k in keys[:-1]:
-                if k not in config_ref:
-                    config_ref[k] = {}
-                config_ref = config_ref[k]
-            
-            # Set the value
-            config_ref[keys[-1]] = value
+            with self._lock:
+                config_ref = self.config
+                
+                # Navigate to the parent of the target key
+                for k in keys[:-1]:
+                    if k not in config_ref:
+                        config_ref[k] = {}
+                    config_ref = config_ref[k]
+                
+                # Set the value
+                config_ref[keys[-1]] = value
+                self._dirty_keys.add(key)
         except Exception as e:
-            print(f"[ConfigManager] Lỗi khi đặt cấu hình {key}: {str(e)}", file=sys.stderr)
+            logger.error(f"Lỗi khi đặt cấu hình {key}: {str(e)}")
     
     def get_language(self):
         """
@@ -198,13 +401,13 @@ class ConfigManager:
     
     def set_language(self, language):
         """
-        Đặt ngôn ngữ và lưu cấu hình
+        Đặt ngôn ngữ và hẹn lưu cấu hình
         
         Args:
             language (str): Mã ngôn ngữ
         """
         self.set('language', language)
-        self.save_config()
+        self.request_save()
     
     def get_window_size(self):
         """
@@ -225,7 +428,7 @@ class ConfigManager:
             height (int): Chiều cao
         """
         self.set('window_size', {'width': width, 'height': height})
-        self.save_config()
+        self.request_save()
     
     def get_last_workspace(self):
         """
@@ -252,7 +455,7 @@ class ConfigManager:
         else:
             # Clear workspace
             self.set('last_workspace', None)
-        self.save_config()
+        self.request_save()
     
     def get_last_workspace_name(self):
         """
@@ -282,4 +485,24 @@ class ConfigManager:
         if attached_files is None:
             attached_files = []
         self.set('last_workspace.attached_files', attached_files)
-        self.save_config() 
\ No newline at end of file
+        self.request_save()
+    
+    def get_tree_exclude_globs(self):
+        """
+        Lấy các exclude patterns của người dùng cho cây thư mục
+        
+        Returns:
+            list: Patterns theo cú pháp .gitignore
+        """
+        globs = self.get('file_tree.exclude_globs', [])
+        return list(globs) if isinstance(globs, list) else []
+    
+    def set_tree_exclude_globs(self, exclude_globs):
+        """
+        Lưu các exclude patterns của người dùng cho cây thư mục
+        
+        Args:
+            exclude_globs (list): Patterns theo cú pháp .gitignore
+        """
+        self.set('file_tree.exclude_globs', list(exclude_globs or []))
+        self.request_save()
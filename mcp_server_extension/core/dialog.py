@@ -6,6 +6,7 @@ import tempfile
 import uuid
 from pathlib import Path
 from .config import ConfigManager
+from .session_store import SessionStore
 from ..ui.file_dialog import FileAttachDialog
 from ..ui.image_attachment import ImageAttachmentWidget
 from ..ui.styles import (
@@ -17,6 +18,8 @@ from ..ui.styles import (
     get_main_input_textedit_stylesheet
 )
 from ..utils.translations import get_translations, get_translation
+from ..utils.tracing import span
+from ..utils.image_handles import file_handle
 from ..constants import (
     SHADOW_BLUR_RADIUS, SHADOW_OFFSET, SHADOW_OPACITY
 )
@@ -72,11 +75,14 @@ class PasteImageTextEdit(QtWidgets.QTextEdit):
         super().insertFromMimeData(source)
 
 class InputDialog(QtWidgets.QDialog):
-    def __init__(self):
+    def __init__(self, session_store=None):
         super().__init__()
         # Initialize config manager
         self.config_manager = ConfigManager()
         
+        # State theo từng workspace (attached files, lịch sử, draft) - load lazy
+        self.session_store = session_store or SessionStore()
+        
         # Set responsive sizing instead of fixed
         self.setMinimumSize(800, 700)  # Much larger minimum size for comfortable UX
         
@@ -96,10 +102,14 @@ class InputDialog(QtWidgets.QDialog):
         if last_workspace and os.path.exists(last_workspace):
             self.current_workspace_path = last_workspace
             self.current_workspace_name = self.config_manager.get_last_workspace_name()
-            # Load attached files from config
-            saved_files = self.config_manager.get_last_attached_files()
-            if saved_files:
-                self.attached_files = saved_files
+            # Load attached files của workspace này từ session store
+            if self.session_store.has_workspace(last_workspace):
+                self.attached_files = self.session_store.get_attached_files(last_workspace)
+            else:
+                # Migrate từ config cũ (chỉ lưu một workspace)
+                saved_files = self.config_manager.get_last_attached_files()
+                if saved_files:
+                    self.attached_files = saved_files
         else:
             # Clear invalid workspace from config
             self.current_workspace_path = None
@@ -151,6 +161,12 @@ class InputDialog(QtWidgets.QDialog):
         
         # Restore attached files UI if any
         self._restore_attached_files_ui()
+        self._update_recent_btn_state()
+        
+        # Restore draft chưa gửi của workspace
+        draft = self.session_store.get_draft(self.current_workspace_path)
+        if draft:
+            self.input.setPlainText(draft)
         
         # Force refresh button styles to apply semantic colors
         self._refresh_button_styles()
@@ -262,9 +278,19 @@ class InputDialog(QtWidgets.QDialog):
         self.clear_all_btn.clicked.connect(self.clear_all_files)
         self.clear_all_btn.setEnabled(False)
         
+        # Recent button - các bộ attachment đã gửi gần đây của workspace
+        self.recent_btn = QtWidgets.QPushButton(self.get_translation("recent_btn"), self)
+        self.recent_btn.setObjectName("recentBtn")
+        self.recent_btn.setToolTip(self.get_translation("recent_tooltip"))
+        self.recent_menu = QtWidgets.QMenu(self.recent_btn)
+        self.recent_menu.setStyleSheet(get_context_menu_stylesheet())
+        self.recent_menu.aboutToShow.connect(self._populate_recent_menu)
+        self.recent_btn.setMenu(self.recent_menu)
+        
         file_buttons_layout.addWidget(self.attach_btn)
         file_buttons_layout.addWidget(self.clear_selected_btn)
         file_buttons_layout.addWidget(self.clear_all_btn)
+        file_buttons_layout.addWidget(self.recent_btn)
         file_layout.addLayout(file_buttons_layout)
         
         # File drop area with updated styling
@@ -392,15 +418,14 @@ class InputDialog(QtWidgets.QDialog):
             if hasattr(self, 'image_attachment_widget'):
                 # Image is already in database, just add to UI
                 if os.path.exists(db_image_path) and "user_images" in db_image_path:
-                    # Convert to base64 from database
-                    base64_data = self.image_attachment_widget.image_to_base64(db_image_path)
-                    if base64_data:
+                    handle = file_handle(db_image_path)
+                    if handle:
                         # Add directly to attached_images
                         # SECURITY: Only store database-relative information
                         image_info = {
                             "path": db_image_path,
                             "filename": Path(db_image_path).name,
-                            "base64_data": base64_data,
+                            "handle": handle,
                             "media_type": "image/png",
                             "source_type": "pasted",
                             "db_filename": Path(db_image_path).name,
@@ -538,6 +563,8 @@ class InputDialog(QtWidgets.QDialog):
         self.close_btn.setText(self.get_translation("close_btn"))
         self.clear_selected_btn.setText(self.get_translation("clear_selected_btn"))
         self.clear_all_btn.setText(self.get_translation("clear_all_btn"))
+        self.recent_btn.setText(self.get_translation("recent_btn"))
+        self.recent_btn.setToolTip(self.get_translation("recent_tooltip"))
         
         # Cập nhật image component language
         if hasattr(self, 'image_attachment_widget'):
@@ -563,14 +590,19 @@ class InputDialog(QtWidgets.QDialog):
         Mở hộp thoại chọn file/folder và thêm file được chọn vào danh sách đính kèm
         """
         # Sử dụng hộp thoại chọn file nâng cao với workspace support
-        dialog = FileAttachDialog(self, self.current_language, self.translations)
+        dialog = FileAttachDialog(
+            self, self.current_language, self.translations,
+            session_store=self.session_store,
+            exclude_globs=self.config_manager.get_tree_exclude_globs()
+        )
+        dialog.excludeGlobsChanged.connect(self.config_manager.set_tree_exclude_globs)
         
         # Khôi phục workspace state nếu có
         if self.current_workspace_path:
             dialog.restore_workspace_state(self.current_workspace_path, self.attached_files)
         
         if dialog.exec_() == QtWidgets.QDialog.Accepted:
-            selected_items = dialog.get_selected_files()
+            selected_records = dialog.get_selected_records()
             workspace_name = dialog.get_workspace_path()
             
             # Lưu workspace state để lần sau sử dụng
@@ -579,7 +611,10 @@ class InputDialog(QtWidgets.QDialog):
             
             # Persist workspace state vào config
             self.config_manager.set_last_workspace(self.current_workspace_path)
-            self.config_manager.set_last_attached_files(self.attached_files)
+            
+            # Ảnh đính kèm được lưu theo workspace
+            if hasattr(self, 'image_attachment_widget'):
+                self.image_attachment_widget.set_workspace(self.current_workspace_path)
             
             if not workspace_name:
                 QtWidgets.QMessageBox.warning(
@@ -590,31 +625,52 @@ class InputDialog(QtWidgets.QDialog):
                 return
 
             # Sync lại toàn bộ attached_files từ dialog
-            self._sync_attached_files_from_dialog(selected_items, workspace_name)
+            self._sync_attached_files_from_dialog(selected_records, workspace_name)
             
             # Save attached files state ngay sau khi sync từ dialog
-            self.config_manager.set_last_attached_files(self.attached_files)
+            self._save_attached_files()
+            self._update_recent_btn_state()
+    
+    def _update_recent_btn_state(self):
+        """Recent button chỉ bật khi workspace hiện tại có lịch sử attachment"""
+        self.recent_btn.setEnabled(bool(self.session_store.get_history(self.current_workspace_path)))
     
-    def _sync_attached_files_from_dialog(self, selected_items, workspace_name):
+    def _populate_recent_menu(self):
+        """Dựng menu các bộ attachment đã gửi gần đây (mới nhất trước) khi menu mở"""
+        self.recent_menu.clear()
+        for attached_files in self.session_store.get_history(self.current_workspace_path):
+            paths = [item.get("relative_path") or item.get("name", "") for item in attached_files]
+            label = ", ".join(paths[:3])
+            if len(paths) > 3:
+                label += f" (+{len(paths) - 3})"
+            action = self.recent_menu.addAction(label)
+            action.setToolTip("\n".join(paths))
+            action.triggered.connect(lambda checked=False, files=attached_files: self._restore_history_entry(files))
+    
+    def _restore_history_entry(self, attached_files):
+        """Thay attached files hiện tại bằng một bộ trong lịch sử"""
+        self.attached_files = attached_files
+        self.file_list.clear()
+        self._restore_attached_files_ui()
+        self._save_attached_files()
+    
+    def _save_attached_files(self):
+        """Lưu attached files của workspace hiện tại vào session store"""
+        self.session_store.set_attached_files(self.current_workspace_path, self.attached_files)
+    
+    def _sync_attached_files_from_dialog(self, selected_records, workspace_name):
         """Sync toàn bộ attached_files từ dialog về main UI"""
         # Clear UI hiện tại
         self.file_list.clear()
         self.attached_files.clear()
         
-        # Rebuild từ selected_items trong dialog
-        for relative_path in selected_items:
-            item_name = os.path.basename(relative_path)
-            item_type = self._determine_item_type(item_name, relative_path)
-            
-            item_info = {
-                "relative_path": relative_path,
-                "workspace_name": workspace_name,
-                "name": item_name,
-                "type": item_type
-            }
+        # Rebuild từ typed records trong dialog (type lấy từ stat lúc chọn)
+        for item_info in selected_records:
+            item_info["workspace_name"] = workspace_name
+            relative_path = item_info["relative_path"]
             self.attached_files.append(item_info)
             
-            display_name = f"[{item_type.upper()}] {relative_path}"
+            display_name = f"[{item_info['type'].upper()}] {relative_path}"
             list_item = QtWidgets.QListWidgetItem(display_name)
             list_item.setToolTip(self.get_translation("file_item_tooltip").format(path=relative_path))
             self.file_list.addItem(list_item)
@@ -683,7 +739,7 @@ class InputDialog(QtWidgets.QDialog):
         self.update_clear_buttons_state()
         
         # Save state sau khi thay đổi
-        self.config_manager.set_last_attached_files(self.attached_files)
+        self._save_attached_files()
         
         # Show placeholder if no files left
         if self.file_list.count() == 0:
@@ -712,7 +768,7 @@ class InputDialog(QtWidgets.QDialog):
             self.attached_files.clear()
             
             # Save empty state
-            self.config_manager.set_last_attached_files(self.attached_files)
+            self._save_attached_files()
             
             # Hide UI elements that should be hidden
             self.file_list.setVisible(False)
@@ -721,59 +777,6 @@ class InputDialog(QtWidgets.QDialog):
             # Update button states để reset số trong ngoặc
             self.update_clear_buttons_state()
     
-    def _determine_item_type(self, item_name, relative_path):
-        """
-        Xác định loại item (file hoặc folder) dựa trên tên và đường dẫn
-        """
-        # Danh sách các file đặc biệt không có extension nhưng vẫn là file
-        known_files_without_ext = {
-            'dockerfile', 'makefile', 'readme', 'license', 'changelog',
-            'authors', 'contributors', 'copying', 'install', 'news',
-            'procfile', 'rakefile', 'gemfile', 'vagrantfile'
-        }
-        
-        # Tên file thường (lowercase để so sánh)
-        lower_name = item_name.lower()
-        
-        # 1. Kiểm tra hidden files/folders (bắt đầu bằng dấu chấm)
-        if item_name.startswith('.'):
-            # Hidden files thường có extension (như .gitignore, .env)
-            # Hidden folders thường không có (như .git, .vscode)
-            if '.' in item_name[1:]:  # Có dấu chấm sau dấu chấm đầu
-                return "file"
-            else:
-                return "folder"
-        
-        # 2. Kiểm tra các file đặc biệt không có extension
-        if lower_name in known_files_without_ext:
-            return "file"
-        
-        # 3. Kiểm tra có extension không
-        if '.' in item_name and not item_name.endswith('.'):
-            # Có extension -> likely file
-            return "file"
-        
-        # 4. Kiểm tra pattern của folder common
-        folder_patterns = [
-            'src', 'lib', 'bin', 'test', 'tests', 'docs', 'doc',
-            'build', 'dist', 'node_modules', 'vendor', 'assets',
-            'static', 'public', 'components', 'utils', 'helpers',
-            'config', 'configs', 'scripts', 'tools'
-        ]
-        
-        if lower_name in folder_patterns:
-            return "folder"
-        
-        # 5. Kiểm tra path depth - thường folder có nhiều level hơn
-        path_parts = relative_path.split('/')
-        if len(path_parts) > 2:  # workspace/folder/...
-            # Nếu là item cuối cùng và không có extension -> có thể là folder
-            if not ('.' in item_name and not item_name.endswith('.')):
-                return "folder"
-        
-        # 6. Default: nếu không có extension thì coi là folder
-        return "folder" if '.' not in item_name or item_name.endswith('.') else "file"
-    
     def show_context_menu(self, position):
         """
         Hiển thị menu ngữ cảnh cho danh sách file đính kèm
@@ -795,7 +798,7 @@ class InputDialog(QtWidgets.QDialog):
                 self.attached_files.pop(row)
                 
                 # Save state sau khi remove
-                self.config_manager.set_last_attached_files(self.attached_files)
+                self._save_attached_files()
                 
                 # Show placeholder if no files left
                 if self.file_list.count() == 0:
@@ -824,6 +827,9 @@ class InputDialog(QtWidgets.QDialog):
             'continue_chat': continue_chat
         }
         
+        # Lưu bộ attachment vừa gửi vào lịch sử của workspace
+        self.session_store.push_history(self.current_workspace_path, self.attached_files)
+        
         # Set results
         self.result_text = text
         self.result_continue = continue_chat
@@ -843,18 +849,32 @@ class InputDialog(QtWidgets.QDialog):
         """Save current window size to config"""
         self.config_manager.set_window_size(self.width(), self.height())
     
+    def done(self, result):
+        """Lưu draft và session state của workspace khi dialog kết thúc"""
+        if self.current_workspace_path:
+            draft = "" if self.result_ready else self.input.toPlainText()
+            self.session_store.set_draft(self.current_workspace_path, draft)
+        self.session_store.flush()
+        # Ảnh không được gửi trong response: trả reference mà handle giữ từ lúc đính kèm
+        if hasattr(self, 'image_attachment_widget'):
+            self.image_attachment_widget.release_image_handles()
+        super().done(result)
+    
     def closeEvent(self, event):
         """Save window size và images khi đóng dialog"""
         self.save_window_size()
         
         # Save images to config if widget exists
         if hasattr(self, 'image_attachment_widget'):
-            self.image_attachment_widget.save_images_to_config()
+            self.image_attachment_widget.save_images_to_session()
             
         # Save checkbox state for next session
         if hasattr(self, 'image_attachment_widget') and hasattr(self.image_attachment_widget, 'save_images_checkbox'):
             checkbox_state = self.image_attachment_widget.save_images_checkbox.isChecked()
             self.config_manager.set('ui_preferences.save_images_enabled', checkbox_state)
+        
+        # Ghi các thay đổi config còn pending trước khi đóng
+        self.config_manager.flush()
             
         super().closeEvent(event)
     
@@ -882,8 +902,12 @@ class InputDialog(QtWidgets.QDialog):
 
     @staticmethod
     def getText():
-        dialog = InputDialog()
-        result = dialog.exec_()
+        with span("ui.dialog_construct"):
+            dialog = InputDialog()
+        # Thời gian người dùng suy nghĩ/gõ - tách khỏi machine time trong trace
+        with span("ui.wait_for_user", human=True):
+            result = dialog.exec_()
+        dialog.config_manager.flush()
         if dialog.result_ready:
             return dialog.result_text, dialog.result_continue, True
         else:
@@ -6,6 +6,7 @@ import tempfile
 import uuid
 from pathlib import Path
 from .config import ConfigManager
+from .session_store import SessionStore
 from ..ui.file_dialog import FileAttachDialog
 from ..ui.image_attachment import ImageAttachmentWidget
 from ..ui.styles import (
@@ -317,7 +318,10 @@ class InputDialog(QtWidgets.QDialog):
     def _create_image_attachment_section(self):
         """Tạo section đính kèm hình ảnh - sử dụng component riêng"""
         # Sử dụng ImageAttachmentWidget component
-        self.image_attachment_widget = ImageAttachmentWidget(self, self.current_language, self.translations, self.config_manager)
+        self.image_attachment_widget = ImageAttachmentWidget(
+            self, self.current_language, self.translations, self.config_manager,
+            session_store=SessionStore(), workspace_path=self.current_workspace_path
+        )
         
         # Reference các thành phần cần thiết từ component
         self.attach_image_btn = self.image_attachment_widget.attach_image_btn
@@ -573,6 +577,8 @@ class InputDialog(QtWidgets.QDialog):
             # Persist workspace state vào config
             self.config_manager.set_last_workspace(self.current_workspace_path)
             self.config_manager.set_last_attached_files(self.attached_files)
+            # Ảnh đính kèm được lưu theo workspace
+            self.image_attachment_widget.set_workspace(self.current_workspace_path)
             
             if not workspace_name:
                 QtWidgets.QMessageBox.warning(
@@ -840,15 +846,20 @@ class InputDialog(QtWidgets.QDialog):
                         })
             
             # Thêm thông tin về hình ảnh đính kèm nếu có
-            attached_images = self.image_attachment_widget.get_attached_images() if hasattr(self, 'image_attachment_widget') else self.attached_images
-            if attached_images:
-                result_dict["attached_images"] = []
-                for img_info in attached_images:
-                    result_dict["attached_images"].append({
+            # Ảnh từ widget gửi dạng handle - reference của handle chuyển sang response
+            if hasattr(self, 'image_attachment_widget'):
+                attached_images = self.image_attachment_widget.take_image_handles()
+            else:
+                attached_images = [
+                    {
                         "base64_data": img_info["base64_data"],
                         "media_type": img_info["media_type"],
                         "filename": img_info["filename"]
-                    })
+                    }
+                    for img_info in self.attached_images
+                ]
+            if attached_images:
+                result_dict["attached_images"] = attached_images
             
             self.result_text = json.dumps(result_dict, ensure_ascii=False)
             self.result_continue = self.continue_checkbox.isChecked()
@@ -861,7 +872,7 @@ class InputDialog(QtWidgets.QDialog):
             
             # Save images to config before closing
             if hasattr(self, 'image_attachment_widget'):
-                self.image_attachment_widget.save_images_to_config()
+                self.image_attachment_widget.save_images_to_session()
             
             self.input.clear()
             self.accept()
@@ -877,13 +888,19 @@ class InputDialog(QtWidgets.QDialog):
         """Save current window size to config"""
         self.config_manager.set_window_size(self.width(), self.height())
     
+    def done(self, result):
+        """Release handle của các ảnh không được gửi"""
+        if hasattr(self, 'image_attachment_widget'):
+            self.image_attachment_widget.release_image_handles()
+        super().done(result)
+    
     def closeEvent(self, event):
         """Save window size và images khi đóng dialog"""
         self.save_window_size()
         
         # Save images to config if widget exists
         if hasattr(self, 'image_attachment_widget'):
-            self.image_attachment_widget.save_images_to_config()
+            self.image_attachment_widget.save_images_to_session()
             
         # Save checkbox state for next session
         if hasattr(self, 'image_attachment_widget') and hasattr(self.image_attachment_widget, 'save_images_checkbox'):
@@ -3,23 +3,32 @@ MCP handler utilities for AI Interactive Tool
 Contains the main MCP tool function logic
 """
 
-from typing import List
+from typing import Iterable, Iterator, List
 from ..engine import run_ui
+from ..utils.tracing import span
+from ..utils.metrics import get_metrics
 from .response_formatter import (
     format_mixed_response, 
+    iter_mixed_response,
     format_text_only_response, 
     build_error_response,
     validate_response_data
 )
 
+_ui_wait = get_metrics().histogram("ui_wait_seconds", "Time spent waiting for the user (or the responder)")
 
-def AI_EXTENSION_tool(use_vscode_ui: bool = False) -> List:
+
+def AI_EXTENSION_tool(use_vscode_ui: bool = False, responder=None, stream: bool = False) -> Iterable:
     """
     Main AI Interactive tool function with image support
     Returns mixed content using modular response formatting
     
     Args:
         use_vscode_ui: If True, uses VS Code extension UI instead of standalone window
+        responder: Responder backend (see responders.py) that answers instead of a UI;
+            overrides use_vscode_ui
+        stream: Return a generator for mixed responses (text first, then one image at a
+            time) so the caller can serialize items as they are produced
     
     This function handles:
     - Running the UI dialog
@@ -28,33 +37,55 @@ def AI_EXTENSION_tool(use_vscode_ui: bool = False) -> List:
     - Error handling
     
     Returns:
-        List containing TextContent and/or MCPImage objects
+        List (or generator when stream=True) of TextContent and/or MCPImage objects
     """
     try:
-        if use_vscode_ui:
-            # Use VS Code extension UI
-            from ..vscode_engine import run_vscode_ui
-            result = run_vscode_ui()
-        else:
-            # Use standalone PyQt5 UI
-            result = run_ui()
+        backend = responder.name if responder is not None else ("vscode" if use_vscode_ui else "qt")
+        with span("tool.run_ui", {"ui.backend": backend}), _ui_wait.time():
+            if responder is not None:
+                result = responder.respond()
+            elif use_vscode_ui:
+                # Use VS Code extension UI
+                from ..vscode_engine import run_vscode_ui
+                result = run_vscode_ui()
+            else:
+                # Use standalone PyQt5 UI
+                result = run_ui()
         
         # Validate response data
-        is_valid, error_msg = validate_response_data(result)
+        with span("tool.validate"):
+            is_valid, error_msg = validate_response_data(result)
         if not is_valid:
             return build_error_response(error_msg)
         
-        # Check if result has images (structured data)
-        if isinstance(result, dict) and 'attached_images' in result:
-            return format_mixed_response(result)
-        else:
-            # Standard text-only response
-            return format_text_only_response(result)
+        with span("tool.format_response") as format_span:
+            # Check if result has images (structured data)
+            if isinstance(result, dict) and 'attached_images' in result:
+                format_span.set_attribute("response.mixed", True)
+                if stream:
+                    # Formatting chạy lazily khi caller lấy từng item
+                    format_span.set_attribute("response.streamed", True)
+                    return _iter_with_error_fallback(iter_mixed_response(result))
+                return format_mixed_response(result)
+            else:
+                # Standard text-only response
+                return format_text_only_response(result)
             
     except Exception as e:
         return build_error_response(str(e))
 
 
+def _iter_with_error_fallback(items: Iterator) -> Iterator:
+    """
+    Lỗi xảy ra khi caller lấy item (formatting chạy lazily) được trả về như
+    build_error_response thay vì làm hỏng cả MCP call
+    """
+    try:
+        yield from items
+    except Exception as e:
+        yield from build_error_response(str(e))
+
+
 def get_tool_description() -> str:
     """
     Get the AI Interactive tool description for MCP registration
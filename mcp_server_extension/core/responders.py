@@ -0,0 +1,172 @@
+"""
+Responder backends for AI Interactive Tool
+A responder produces the user's answer to one tool call (what run_ui returns)
+"""
+
+import json
+import mimetypes
+import os
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Optional
+from ..utils.image_handles import file_handle
+from ..utils.log import get_logger
+
+logger = get_logger("ScriptedResponder")
+
+
+class QtResponder:
+    """Hỏi người dùng qua InputDialog (PyQt5) - backend mặc định"""
+
+    name = "qt"
+
+    def respond(self):
+        from ..engine import run_ui
+        return run_ui()
+
+
+class VSCodeResponder:
+    """Để VS Code extension UI trả lời"""
+
+    name = "vscode"
+
+    def respond(self):
+        from ..vscode_engine import run_vscode_ui
+        return run_vscode_ui()
+
+
+class ScriptedResponder:
+    """
+    Headless responder trả lời tool calls từ một hàng đợi fixtures (dùng cho load test).
+
+    Mỗi fixture là dict giống nội dung người dùng gửi từ dialog:
+        {
+            "text": "...",
+            "attached_files": [{"relative_path": ..., "type": "file", "workspace_name": ...}],
+            "attached_images": [{"path": "fixture.png"} hoặc {"base64_data": ..., "media_type": ...}],
+            "continue_chat": true,
+            "cancel": false          # true = người dùng đóng dialog không gửi
+        }
+    Fixture được đưa qua build_ui_response giống hệt kết quả của dialog nên đi
+    cùng đường formatting với UI thật. Thread-safe.
+    """
+
+    name = "scripted"
+
+    def __init__(self, responses: Iterable[Dict[str, Any]] = None, loop: bool = False,
+                 default: Optional[Dict[str, Any]] = None,
+                 script: Optional[Callable[[int], Optional[Dict[str, Any]]]] = None):
+        """
+        Args:
+            responses: Fixtures trả lời lần lượt
+            loop: Hết hàng đợi thì quay lại từ đầu
+            default: Fixture dùng khi hàng đợi rỗng (None = trả lời như dialog bị đóng)
+            script: Callable(call_index) -> fixture, ưu tiên hơn hàng đợi
+        """
+        self._responses = deque(responses or [])
+        self._initial = list(self._responses) if loop else None
+        self.default = default
+        self.script = script
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str, loop: bool = True) -> "ScriptedResponder":
+        """Load fixtures từ file JSON (list) hoặc JSONL (mỗi dòng một fixture)"""
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        try:
+            data = json.loads(content)
+            responses = data if isinstance(data, list) else [data]
+        except json.JSONDecodeError:
+            responses = [json.loads(line) for line in content.splitlines() if line.strip()]
+
+        # Path ảnh tương đối tính từ thư mục chứa file fixtures
+        base_dir = os.path.dirname(os.path.abspath(path))
+        for response in responses:
+            for image in response.get("attached_images", []):
+                if "path" in image and not os.path.isabs(image["path"]):
+                    image["path"] = os.path.join(base_dir, image["path"])
+        return cls(responses, loop=loop)
+
+    def add(self, response: Dict[str, Any]) -> None:
+        """Thêm một fixture vào cuối hàng đợi"""
+        with self._lock:
+            self._responses.append(response)
+
+    def extend(self, responses: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._responses.extend(responses)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._responses)
+
+    def _next_fixture(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            index = self.calls
+            self.calls += 1
+            if self.script is None:
+                if not self._responses and self._initial:
+                    self._responses.extend(self._initial)
+                if self._responses:
+                    return self._responses.popleft()
+                return self.default
+        return self.script(index)
+
+    def _load_image(self, image: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Fixture ảnh -> image dict giống ImageAttachmentWidget (handle hoặc base64_data, media_type, filename)"""
+        if image.get("base64_data"):
+            return {
+                "base64_data": image["base64_data"],
+                "media_type": image.get("media_type", "image/png"),
+                "filename": image.get("filename", "image.png")
+            }
+
+        path = image.get("path")
+        if not path:
+            return None
+        handle = file_handle(path)
+        if handle is None:
+            logger.warning(f"Không thể đọc ảnh fixture {path}")
+            return None
+        return {
+            "handle": handle,
+            "media_type": image.get("media_type", mimetypes.guess_type(path)[0] or "image/png"),
+            "filename": image.get("filename", os.path.basename(path))
+        }
+
+    def respond(self):
+        from ..engine import build_ui_response
+
+        fixture = self._next_fixture()
+        if fixture is None or fixture.get("cancel"):
+            return build_ui_response("", False, False)
+
+        images = [self._load_image(image) for image in fixture.get("attached_images", [])]
+        payload = {
+            "text": fixture.get("text", ""),
+            "attached_files": fixture.get("attached_files", []),
+            "attached_images": [image for image in images if image],
+            "language": fixture.get("language", "en")
+        }
+        return build_ui_response(json.dumps(payload), bool(fixture.get("continue_chat", False)), True)
+
+
+def create_responder(kind: str = "qt", fixtures: Optional[str] = None):
+    """
+    Tạo responder theo tên ("qt", "vscode", "scripted")
+
+    Args:
+        kind: Loại responder
+        fixtures: File fixtures cho "scripted" (lặp lại vòng tròn)
+    """
+    if kind == "qt":
+        return QtResponder()
+    if kind == "vscode":
+        return VSCodeResponder()
+    if kind == "scripted":
+        if fixtures:
+            return ScriptedResponder.from_file(fixtures, loop=True)
+        return ScriptedResponder(default={"text": "", "continue_chat": False})
+    raise ValueError(f"Unknown responder: {kind}")
@@ -4,8 +4,10 @@ Handles mixed content responses with text, images, and control tags
 """
 
 from mcp.types import TextContent
-from typing import List, Dict, Any, Union
-from ..utils.image_processing import process_images
+from typing import List, Dict, Any, Iterator, Union
+from ..utils.image_processing import iter_process_images
+from ..utils.image_handles import is_image_handle
+from ..utils.tracing import span
 
 
 def format_mixed_response(result: Dict[str, Any]) -> List:
@@ -18,8 +20,23 @@ def format_mixed_response(result: Dict[str, Any]) -> List:
     Returns:
         List containing TextContent and MCPImage objects
     """
-    response_items = []
+    return list(iter_mixed_response(result))
+
+
+def iter_mixed_response(result: Dict[str, Any]) -> Iterator:
+    """
+    Generator version of format_mixed_response
     
+    Yields the TextContent first, then each image as soon as it is processed,
+    so a consumer that serializes item by item keeps only one decoded image
+    in memory instead of all of them.
+    
+    Args:
+        result: Dictionary containing text_content, attached_images, attached_files, etc.
+        
+    Yields:
+        TextContent, then MCPImage objects
+    """
     # Extract components from result
     user_text = result.get('text_content', '')
     attached_files = result.get('attached_files', [])
@@ -28,19 +45,24 @@ def format_mixed_response(result: Dict[str, Any]) -> List:
 
     
     # Build complete text content with all tags
-    full_text_content = _build_text_content_with_tags(
-        user_text, attached_files, continue_chat
-    )
+    with span("response.build_text", {"response.attached_files": len(attached_files)}):
+        full_text_content = _build_text_content_with_tags(
+            user_text, attached_files, continue_chat
+        )
     
     # Add text content with ALL tags
-    response_items.append(TextContent(type="text", text=full_text_content))
+    yield TextContent(type="text", text=full_text_content)
     
     # Add images as MCPImage objects if any
-    if attached_images:
-        mcp_images = process_images(attached_images)
-        response_items.extend(mcp_images)  # Direct extend like mcp-feedback-enhanced
-    
-    return response_items
+    # Span chỉ bao việc xử lý từng ảnh, không giữ qua yield: khi generator tạm dừng,
+    # span hiện tại của caller (response.serialize...) không bị đổi
+    images = iter_process_images(attached_images)
+    for index in range(len(attached_images)):
+        with span("image.process_image", {"image.index": index, "image.streamed": True}):
+            image = next(images, None)
+        if image is None:
+            break
+        yield image
 
 
 def format_text_only_response(result: Union[str, Dict[str, Any]]) -> List[TextContent]:
@@ -170,7 +192,8 @@ def validate_response_data(result: Any) -> tuple[bool, str]:
             for img in result['attached_images']:
                 if not isinstance(img, dict):
                     return False, "Each image must be a dictionary"
-                if 'base64_data' not in img:
+                if ('base64_data' not in img and not isinstance(img.get('data'), (bytes, bytearray))
+                        and not is_image_handle(img.get('handle'))):
                     return False, "Image missing base64_data field"
         
         return True, ""
@@ -0,0 +1,244 @@
+# Per-workspace session state store for AI extension Tool
+import atexit
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from ..constants import SESSIONS_DIRNAME, SESSION_HISTORY_SIZE, SESSION_MAX_WORKSPACES
+from .config import _locked_file
+from ..utils.log import get_logger
+
+logger = get_logger("SessionStore")
+
+INDEX_FILENAME = "index.json"
+
+# Các SessionStore còn sống - flush khi process thoát
+_live_stores = weakref.WeakSet()
+
+
+def _flush_all_stores():
+    """Ghi các session còn pending của mọi SessionStore khi thoát"""
+    for store in list(_live_stores):
+        store.flush()
+
+
+atexit.register(_flush_all_stores)
+
+
+def workspace_key(workspace_path):
+    """Key ổn định cho workspace root (hash của path đã chuẩn hóa)"""
+    normalized = os.path.normcase(os.path.abspath(workspace_path))
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+class SessionStore:
+    """
+    Lưu session state theo workspace root.
+
+    index.json chỉ chứa metadata nhỏ (path, name, last_used) của từng workspace;
+    state đầy đủ (attached files hiện tại, lịch sử N bộ attachment, draft,
+    image references) nằm trong một file riêng cho mỗi workspace và chỉ được
+    đọc khi workspace đó được dùng đến. Khi số workspace vượt quá giới hạn,
+    workspace dùng lâu nhất bị xóa (LRU).
+    """
+
+    def __init__(self, base_dir=None, max_history=SESSION_HISTORY_SIZE, max_workspaces=SESSION_MAX_WORKSPACES):
+        """
+        Khởi tạo SessionStore
+
+        Args:
+            base_dir (str): Thư mục chứa session files (mặc định: <package>/sessions)
+            max_history (int): Số bộ attachment giữ lại cho mỗi workspace
+            max_workspaces (int): Số workspace tối đa trước khi evict LRU
+        """
+        self.base_dir = base_dir or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            SESSIONS_DIRNAME
+        )
+        self.index_path = os.path.join(self.base_dir, INDEX_FILENAME)
+        self.lock_path = self.index_path + '.lock'
+        self.max_history = max_history
+        self.max_workspaces = max_workspaces
+
+        self._lock = threading.RLock()
+        self._index = self._read_json(self.index_path) or {"workspaces": {}}
+        self._index.setdefault("workspaces", {})
+        # key -> session dict đã load (lazy)
+        self._sessions = {}
+        self._dirty_sessions = set()
+        self._index_dirty = False
+        _live_stores.add(self)
+
+    @staticmethod
+    def _read_json(path):
+        """Đọc JSON file, None nếu không tồn tại hoặc không hợp lệ"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else None
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_json(path, data):
+        """Ghi compact JSON qua temp file + os.replace"""
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+        os.replace(temp_path, path)
+
+    def _session_path(self, key):
+        return os.path.join(self.base_dir, f"{key}.json")
+
+    def _empty_session(self, workspace_path):
+        return {
+            "path": workspace_path,
+            "attached_files": [],
+            "history": [],
+            "draft": "",
+            "images": []
+        }
+
+    def _get_session(self, workspace_path):
+        """Lấy session của workspace, đọc từ disk ở lần truy cập đầu tiên"""
+        key = workspace_key(workspace_path)
+        session = self._sessions.get(key)
+        if session is None:
+            if key in self._index["workspaces"]:
+                session = self._read_json(self._session_path(key))
+            if session is None:
+                session = self._empty_session(workspace_path)
+            self._sessions[key] = session
+        return key, session
+
+    def _touch(self, key, workspace_path):
+        """Cập nhật last_used của workspace trong index và evict LRU nếu cần"""
+        self._index["workspaces"][key] = {
+            "path": workspace_path,
+            "name": os.path.basename(workspace_path),
+            "last_used": time.time()
+        }
+        self._index_dirty = True
+        self._evict_if_needed()
+
+    def _evict_if_needed(self):
+        """Xóa các workspace dùng lâu nhất khi vượt quá max_workspaces"""
+        workspaces = self._index["workspaces"]
+        overflow = len(workspaces) - self.max_workspaces
+        if overflow <= 0:
+            return
+
+        oldest = sorted(workspaces, key=lambda k: workspaces[k].get("last_used", 0))[:overflow]
+        for key in oldest:
+            workspaces.pop(key, None)
+            self._sessions.pop(key, None)
+            self._dirty_sessions.discard(key)
+            try:
+                os.remove(self._session_path(key))
+            except OSError:
+                pass
+
+    def _update(self, workspace_path, field, value):
+        """Đặt một field trong session của workspace và đánh dấu dirty"""
+        if not workspace_path:
+            return
+        with self._lock:
+            key, session = self._get_session(workspace_path)
+            session[field] = value
+            self._dirty_sessions.add(key)
+            self._touch(key, workspace_path)
+
+    def has_workspace(self, workspace_path):
+        """Kiểm tra workspace đã có session được lưu chưa (không đọc session file)"""
+        return bool(workspace_path) and workspace_key(workspace_path) in self._index["workspaces"]
+
+    def get_attached_files(self, workspace_path):
+        """Lấy danh sách attached files hiện tại của workspace"""
+        if not workspace_path:
+            return []
+        with self._lock:
+            return copy.deepcopy(self._get_session(workspace_path)[1]["attached_files"])
+
+    def set_attached_files(self, workspace_path, attached_files):
+        """Lưu danh sách attached files hiện tại của workspace"""
+        self._update(workspace_path, "attached_files", copy.deepcopy(attached_files or []))
+
+    def get_history(self, workspace_path):
+        """Lấy các bộ attachment đã gửi gần đây (mới nhất trước)"""
+        if not workspace_path:
+            return []
+        with self._lock:
+            return copy.deepcopy(self._get_session(workspace_path)[1]["history"])
+
+    def push_history(self, workspace_path, attached_files):
+        """Thêm một bộ attachment vào lịch sử, bỏ trùng và giới hạn max_history"""
+        if not workspace_path or not attached_files:
+            return
+        with self._lock:
+            key, session = self._get_session(workspace_path)
+            entry = copy.deepcopy(attached_files)
+            history = [item for item in session["history"] if item != entry]
+            history.insert(0, entry)
+            session["history"] = history[:self.max_history]
+            self._dirty_sessions.add(key)
+            self._touch(key, workspace_path)
+
+    def get_draft(self, workspace_path):
+        """Lấy draft text chưa gửi của workspace"""
+        if not workspace_path:
+            return ""
+        with self._lock:
+            return self._get_session(workspace_path)[1]["draft"]
+
+    def set_draft(self, workspace_path, text):
+        """Lưu draft text chưa gửi của workspace"""
+        self._update(workspace_path, "draft", text or "")
+
+    def get_images(self, workspace_path):
+        """Lấy image references (metadata trong user_images) của workspace"""
+        if not workspace_path:
+            return []
+        with self._lock:
+            return copy.deepcopy(self._get_session(workspace_path)[1]["images"])
+
+    def set_images(self, workspace_path, image_refs):
+        """Lưu image references của workspace"""
+        self._update(workspace_path, "images", copy.deepcopy(image_refs or []))
+
+    def flush(self):
+        """
+        Ghi các session đã thay đổi và index xuống disk
+
+        Returns:
+            bool: True nếu không có lỗi
+        """
+        with self._lock:
+            if not self._dirty_sessions and not self._index_dirty:
+                return True
+            try:
+                os.makedirs(self.base_dir, exist_ok=True)
+                with _locked_file(self.lock_path):
+                    for key in self._dirty_sessions:
+                        session = self._sessions.get(key)
+                        if session is not None:
+                            self._write_json(self._session_path(key), session)
+
+                    # Merge index với bản trên disk để giữ workspace của process khác
+                    disk_index = self._read_json(self.index_path) or {}
+                    merged = dict(disk_index.get("workspaces", {}))
+                    for key, entry in self._index["workspaces"].items():
+                        if key not in merged or merged[key].get("last_used", 0) <= entry.get("last_used", 0):
+                            merged[key] = entry
+                    self._index["workspaces"] = merged
+                    self._evict_if_needed()
+                    self._write_json(self.index_path, self._index)
+
+                self._dirty_sessions.clear()
+                self._index_dirty = False
+                return True
+            except Exception as e:
+                logger.error(f"Lỗi khi lưu session: {str(e)}")
+                return False
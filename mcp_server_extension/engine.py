@@ -4,6 +4,7 @@ from PyQt5 import QtWidgets, QtGui
 import sys
 import json
 from .core.dialog import InputDialog
+from .utils.tracing import span
 
 # Legacy classes for backward compatibility (now imported from separate modules)
 from .ui.file_tree import FileSystemModel, FileTreeView, FileTreeDelegate
@@ -14,14 +15,23 @@ def run_ui(*args, **kwargs):
     Hàm chính để chạy giao diện người dùng và trả về kết quả.
     Đây là entry point chính cho AI Interactive Tool.
     """
-    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
-    
-    # Thiết lập font mặc định cho toàn ứng dụng
-    font = QtGui.QFont("Segoe UI", 10)
-    app.setFont(font)
+    with span("ui.qt_startup") as startup_span:
+        app = QtWidgets.QApplication.instance()
+        startup_span.set_attribute("ui.qapplication_reused", app is not None)
+        app = app or QtWidgets.QApplication(sys.argv)
+        
+        # Thiết lập font mặc định cho toàn ứng dụng
+        font = QtGui.QFont("Segoe UI", 10)
+        app.setFont(font)
     
     text, continue_chat, ok = InputDialog.getText()
 
+    with span("ui.build_response"):
+        return build_ui_response(text, continue_chat, ok)
+
+
+def build_ui_response(text, continue_chat, ok):
+    """Chuyển kết quả của dialog thành response (text có tags, hoặc dict nếu có ảnh)"""
     if ok:
         # Phân tích nội dung từ dialog
         try:
@@ -1,29 +1,131 @@
 import argparse
+import json
 import os
+import time
 from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.utilities.types import Image as MCPImage
 
 # Import from the core module using relative import
-from .core import AI_EXTENSION_tool, get_tool_description
+from .core import AI_EXTENSION_tool, get_tool_description, create_responder
+from .utils.tracing import span
+from .utils.memory_profiler import configure_memory_profiling, memory_report, profile_call
+from .utils.metrics import get_metrics
+from .utils.log import get_logger
+
+TOOL_NAME = "mcp_ai-extension_ai_extension_tool"
+
+logger = get_logger("Server")
+
+_metrics = get_metrics()
+_tool_calls = _metrics.counter("tool_calls_total", "Tool calls by outcome")
+_tool_call_duration = _metrics.histogram("tool_call_duration_seconds", "Tool call duration, including the wait for the user")
+_response_bytes = _metrics.counter("response_bytes_total", "Bytes of serialized response content")
 
 def is_running_in_vscode():
     """Detect if we're running in VS Code"""
     return bool(os.environ.get('VSCODE_PID') or os.environ.get('VSCODE_CWD'))
 
-def create_server():
-    """Create and configure the MCP server instance"""
+def serialize_content(items):
+    """
+    Convert MCPImage items to ImageContent (base64) here instead of inside FastMCP,
+    so the encoding cost shows up in the trace. Other items pass through unchanged.
+    items may be a generator: each image is encoded (and its raw bytes dropped)
+    before the next one is produced. An image whose bytes cannot be read (handle
+    file deleted, segment gone) is logged and skipped; the rest of the response
+    is still returned.
+
+    Memory bound: only one image's raw bytes are alive at a time, but the encoded
+    ImageContent items are all collected here - FastMCP takes the tool result as
+    one list and sends it as a single JSON-RPC message, so peak memory still holds
+    every base64 payload (~4/3 of the image bytes). That is as tight as the
+    transport allows.
+    """
+    try:
+        content = []
+        image_index = 0
+        for item in items:
+            if isinstance(item, MCPImage):
+                image_index += 1
+                try:
+                    item = item.to_image_content()
+                except (OSError, ValueError) as e:
+                    logger.error(f"Error processing image {image_index}: {e}")
+                    continue
+            content.append(item)
+        return content
+    finally:
+        # Đóng generator nếu dừng giữa chừng để span bên trong kết thúc đúng context
+        close = getattr(items, "close", None)
+        if close is not None:
+            close()
+
+def content_size(content):
+    """Bytes của response đã serialize (text + base64 data)"""
+    return sum(len(getattr(item, "text", None) or getattr(item, "data", None) or "") for item in content)
+
+def create_server(responder=None):
+    """
+    Create and configure the MCP server instance
+    
+    Args:
+        responder: Responder backend answering tool calls for this server
+            (default: Qt dialog, or the VS Code UI when running inside VS Code)
+    """
     mcp = FastMCP("AI extension Extension")
     
     # Create a wrapper that sets use_vscode_ui based on context
-    def tool_wrapper(*args, **kwargs):
-        kwargs['use_vscode_ui'] = is_running_in_vscode()
-        return AI_EXTENSION_tool(*args, **kwargs)
+    # (no parameters: FastMCP turns *args/**kwargs into required "args"/"kwargs" fields)
+    def tool_wrapper():
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            with profile_call() as profiler, span("mcp.tool_call", {"mcp.tool": TOOL_NAME}) as call_span:
+                result = AI_EXTENSION_tool(use_vscode_ui=is_running_in_vscode(), responder=responder, stream=True)
+                with span("response.serialize") as serialize_span:
+                    content = serialize_content(result)
+                    serialize_span.set_attribute("response.items", len(content))
+                call_span.set_attribute("response.items", len(content))
+                size = content_size(content)
+                _response_bytes.inc(size)
+                if profiler is not None:
+                    profiler.record_response(size)
+                outcome = "ok"
+                return content
+        finally:
+            _tool_calls.inc(outcome=outcome)
+            _tool_call_duration.observe(time.perf_counter() - start)
     
     # Register the wrapped tool
     mcp.add_tool(
         tool_wrapper, 
-        name="mcp_ai-extension_ai_extension_tool", 
+        name=TOOL_NAME, 
         description=get_tool_description()
     )
+    
+    @mcp.resource(
+        "debug://memory",
+        name="memory_report",
+        description="Per-call memory reports (stage peaks, top allocation sites, retained objects)",
+        mime_type="application/json"
+    )
+    def memory_resource() -> str:
+        return json.dumps(memory_report(), indent=2)
+    
+    @mcp.resource(
+        "debug://metrics",
+        name="metrics",
+        description="Server counters: calls, latency percentiles, bytes sent, images, cache hit rates, config writes",
+        mime_type="application/json"
+    )
+    def metrics_resource() -> str:
+        return json.dumps(_metrics.snapshot(), indent=2)
+    
+    # Prometheus scrape endpoint - chỉ có khi chạy với HTTP transport (sse / streamable-http)
+    @mcp.custom_route("/metrics", methods=["GET"])
+    async def prometheus_metrics(request):
+        from starlette.responses import PlainTextResponse
+        return PlainTextResponse(_metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+    
     return mcp
 
 def main():
@@ -34,10 +136,33 @@ def main():
         default="stdio", 
         help="Transport mechanism (default: stdio)"
     )
+    parser.add_argument(
+        "--responder",
+        choices=["qt", "vscode", "scripted"],
+        default=None,
+        help="Who answers tool calls (default: Qt dialog, VS Code UI inside VS Code)"
+    )
+    parser.add_argument(
+        "--fixtures",
+        default=None,
+        help="JSON/JSONL fixture file for --responder scripted (replayed in a loop)"
+    )
+    parser.add_argument(
+        "--memory-profile",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="FILE",
+        help="Profile memory per tool call with tracemalloc (report JSONL, default ~/.ai_extension_memory.jsonl)"
+    )
     args = parser.parse_args()
     
+    if args.memory_profile is not None:
+        configure_memory_profiling(args.memory_profile or None)
+    
     # Create and run the server
-    server = create_server()
+    responder = create_responder(args.responder, args.fixtures) if args.responder else None
+    server = create_server(responder=responder)
     server.run(transport=args.transport)
 
 if __name__ == "__main__":
@@ -3,6 +3,7 @@
 
 from .file_dialog import FileAttachDialog
 from .file_tree import FileTreeView, FileSystemModel, FileTreeDelegate
+from .selected_items_model import SelectedItemsModel
 from .image_attachment import ImageAttachmentWidget, DragDropImageWidget
 from .styles import get_main_stylesheet, get_file_list_stylesheet
 
@@ -11,6 +12,7 @@ __all__ = [
     'FileTreeView', 
     'FileSystemModel',
     'FileTreeDelegate',
+    'SelectedItemsModel',
     'ImageAttachmentWidget',
     'DragDropImageWidget',
     'get_main_stylesheet',
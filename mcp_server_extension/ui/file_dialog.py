@@ -2,24 +2,47 @@
 from PyQt5 import QtWidgets, QtCore
 import os
 from .file_tree import FileTreeView, FileTreeDelegate
+from .selected_items_model import SelectedItemsModel
+from .workers import start_path_validation, start_name_index, start_name_filter
 from .styles import get_file_list_stylesheet, get_context_menu_stylesheet, ModernTheme
 from ..utils.translations import get_translation
-from ..constants import DEFAULT_PATH
+from ..constants import DEFAULT_PATH, TREE_FILTER_DEBOUNCE_MS, TREE_FILTER_EXPAND_LIMIT
+from ..utils.log import get_logger
 from ..utils.file_utils import (
     validate_workspace_path, 
     validate_file_path_in_workspace,
+    validate_file_paths_in_workspace,
     create_relative_path_with_workspace,
     normalize_path_unicode
 )
 
+logger = get_logger("FileAttachDialog")
+
 class FileAttachDialog(QtWidgets.QDialog):
     """
     Hộp thoại cho phép duyệt và chọn file/folder để đính kèm với workspace support
     """
-    def __init__(self, parent=None, language="en", translations=None):
+    # Exclude patterns của cây thư mục thay đổi - caller lưu vào config
+    excludeGlobsChanged = QtCore.pyqtSignal(list)
+    
+    def __init__(self, parent=None, language="en", translations=None, session_store=None, exclude_globs=None):
         super().__init__(parent)
         self.language = language
         self.translations = translations or {}
+        self.session_store = session_store
+        self._exclude_globs = list(exclude_globs or [])
+        
+        # Live filter của cây thư mục: name index build ở background, lọc trên index
+        self._name_index = None
+        self._index_generation = 0
+        self._index_worker = None
+        self._filter_generation = 0
+        self._filter_worker = None
+        
+        # Background validation của các items được khôi phục
+        self._restore_generation = 0
+        self._pending_restore = []
+        self._validation_worker = None
         
         self.setWindowTitle(self._get_translation("file_dialog_title"))
         self.setMinimumSize(700, 500)
@@ -27,11 +50,16 @@ class FileAttachDialog(QtWidgets.QDialog):
         # Workspace root path
         self.workspace_path = ""
         
+        # Danh sách file/folder đã chọn (relative paths, giữ thứ tự chèn)
+        self.selected_model = SelectedItemsModel(self)
+        
         # Khởi tạo UI
         self.init_ui()
-        
-        # Danh sách file/folder đã chọn (relative paths)
-        self.selected_items = []
+    
+    @property
+    def selected_items(self):
+        """Danh sách relative paths đã chọn (read-only, theo thứ tự hiển thị)"""
+        return self.selected_model.paths()
         
     def _get_translation(self, key):
         """Lấy bản dịch cho key dựa trên ngôn ngữ hiện tại"""
@@ -119,7 +147,25 @@ class FileAttachDialog(QtWidgets.QDialog):
         # Cây thư mục
         self.file_tree = FileTreeView(self)
         self.file_tree.setItemDelegate(FileTreeDelegate(self))
+        load_more_text = self._get_translation("tree_load_more")
+        if "{count}" in load_more_text:
+            self.file_tree.model.setLoadMoreText(load_more_text)
         self.file_tree.itemSelected.connect(self.update_selected_items)
+        self.file_tree.itemsSelected.connect(self.update_selected_items_batch)
+        self.file_tree.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.file_tree.customContextMenuRequested.connect(self.show_tree_context_menu)
+        self.file_tree.model.setExcludeGlobs(self._exclude_globs)
+        
+        # Ô lọc theo tên - debounce để không lọc lại sau mỗi phím
+        self.tree_filter_input = QtWidgets.QLineEdit(self)
+        self.tree_filter_input.setPlaceholderText(self._get_translation("tree_filter_placeholder"))
+        self.tree_filter_input.setClearButtonEnabled(True)
+        self._tree_filter_timer = QtCore.QTimer(self)
+        self._tree_filter_timer.setSingleShot(True)
+        self._tree_filter_timer.timeout.connect(self._apply_tree_filter)
+        self.tree_filter_input.textChanged.connect(self._schedule_tree_filter)
+        self.file_tree.model.rootPathChanged.connect(self._on_tree_root_changed)
+        layout.addWidget(self.tree_filter_input)
         
         # Thiết lập đường dẫn mặc định
         default_path = DEFAULT_PATH
@@ -165,13 +211,15 @@ class FileAttachDialog(QtWidgets.QDialog):
         
         selected_layout.addLayout(paste_select_layout)
         
-        self.selected_list = QtWidgets.QListWidget(self)
+        self.selected_list = QtWidgets.QListView(self)
+        self.selected_list.setModel(self.selected_model)
+        self.selected_list.setUniformItemSizes(True)  # Virtualized layout cho danh sách lớn
         self.selected_list.setAlternatingRowColors(False)  # Disable to maintain dark theme consistency
         self.selected_list.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)  # Multi-select
         self.selected_list.setToolTip(self._get_translation("selected_list_tooltip"))
         self.selected_list.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
         self.selected_list.customContextMenuRequested.connect(self.show_selected_context_menu)
-        self.selected_list.itemSelectionChanged.connect(self.update_selected_button_state)
+        self.selected_list.selectionModel().selectionChanged.connect(self.update_selected_button_state)
         
         selected_layout.addWidget(self.selected_list)
         selected_group.setLayout(selected_layout)
@@ -244,6 +292,8 @@ class FileAttachDialog(QtWidgets.QDialog):
             
             # Update workspace input field với current workspace
             self.workspace_input.setText(self.workspace_path)
+            
+            self._restore_session_selection()
     
     def set_workspace_from_input(self):
         """Set workspace từ đường dẫn đã nhập/paste"""
@@ -300,6 +350,8 @@ class FileAttachDialog(QtWidgets.QDialog):
         # Update workspace input với final normalized path
         self.workspace_input.setText(self.workspace_path)
         
+        self._restore_session_selection()
+        
         # Success feedback
         QtWidgets.QMessageBox.information(
             self,
@@ -415,33 +467,15 @@ class FileAttachDialog(QtWidgets.QDialog):
                 return
             
             if selected:
-                if full_relative_path not in self.selected_items:
-                    self.selected_items.append(full_relative_path)
-                    
-                    item_type = "FOLDER" if validation_result["is_dir"] else "FILE"
-                    
-                    if validation_result["is_symlink"]:
-                        item_type += " (SYMLINK)"
-                    
-                    basename = validation_result["basename"]
-                    display_name = f"[{item_type}] {basename}"
-                    
-                    if len(full_relative_path) > 60:
-                        short_path = "..." + full_relative_path[-57:]
-                        display_name += f" ({short_path})"
-                    else:
-                        display_name += f" ({full_relative_path})"
-                    
-                    list_item = QtWidgets.QListWidgetItem(display_name)
-                    list_item.setToolTip(self._get_translation("file_item_tooltip").format(path=full_relative_path))
-                    self.selected_list.addItem(list_item)
+                if full_relative_path not in self.selected_model:
+                    self.selected_model.add(
+                        full_relative_path,
+                        self._format_display_name(validation_result, full_relative_path),
+                        self._get_translation("file_item_tooltip").format(path=full_relative_path),
+                        self._make_item_record(validation_result, full_relative_path)
+                    )
             else:
-                if full_relative_path in self.selected_items:
-                    index = self.selected_items.index(full_relative_path)
-                    self.selected_items.pop(index)
-                    item = self.selected_list.takeItem(index)
-                    if item:
-                        del item
+                self.selected_model.remove(full_relative_path)
                         
         except Exception as e:
             QtWidgets.QMessageBox.critical(
@@ -450,6 +484,177 @@ class FileAttachDialog(QtWidgets.QDialog):
                 self._get_translation("unexpected_error_msg").format(error=str(e))
             )
     
+    def update_selected_items_batch(self, item_paths, selected):
+        """Cập nhật danh sách items đã chọn cho nhiều path trong một lượt"""
+        if not item_paths:
+            return
+        
+        if not self.workspace_path:
+            self._revert_tree_selection(item_paths, selected)
+            QtWidgets.QMessageBox.warning(
+                self,
+                self._get_translation("no_workspace"),
+                self._get_translation("no_workspace_msg")
+            )
+            return
+        
+        validations = validate_file_paths_in_workspace(item_paths, self.workspace_path)
+        
+        if selected:
+            existing = self.selected_model
+            new_entries = []
+            invalid_paths = []
+            errors = []
+            
+            for item_path, validation_result in zip(item_paths, validations):
+                if not validation_result["valid"]:
+                    invalid_paths.append(item_path)
+                    errors.append(validation_result["error"])
+                    continue
+                
+                full_relative_path = validation_result["full_relative_path"]
+                if full_relative_path in existing:
+                    continue
+                new_entries.append((
+                    full_relative_path,
+                    self._format_display_name(validation_result, full_relative_path),
+                    self._get_translation("file_item_tooltip").format(path=full_relative_path),
+                    self._make_item_record(validation_result, full_relative_path)
+                ))
+            
+            # Model gộp toàn bộ batch vào một lần beginInsertRows
+            self.selected_model.add_many(new_entries)
+            
+            if invalid_paths:
+                self._revert_tree_selection(invalid_paths, selected)
+                QtWidgets.QMessageBox.warning(
+                    self,
+                    self._get_translation("invalid_selection"),
+                    self._get_translation("invalid_selection_batch_msg").format(
+                        count=len(errors),
+                        errors="\n".join(errors[:5])
+                    )
+                )
+        else:
+            to_remove = {
+                validation_result["full_relative_path"]
+                for validation_result in validations
+                if validation_result["valid"]
+            }
+            workspace_name = os.path.basename(self.workspace_path)
+            for item_path, validation_result in zip(item_paths, validations):
+                if not validation_result["valid"]:
+                    # Path đã bị xóa khỏi disk - vẫn tính relative path để gỡ khỏi list
+                    relative_path = os.path.relpath(item_path, self.workspace_path).replace(os.sep, '/')
+                    to_remove.add(f"{workspace_name}/{relative_path}")
+            
+            self.selected_model.remove_many(to_remove)
+        
+        self.update_selected_button_state()
+    
+    def _revert_tree_selection(self, item_paths, selected):
+        """Hoàn tác trạng thái chọn trên tree cho các path không hợp lệ"""
+        self.file_tree.model.setPathsSelected(item_paths, not selected)
+        self.file_tree.viewport().update()
+    
+    def _make_item_record(self, validation_result, full_relative_path):
+        """Typed record của item từ kết quả stat lúc chọn (không cần I/O thêm)"""
+        return {
+            "relative_path": full_relative_path,
+            "workspace_name": os.path.basename(self.workspace_path),
+            "name": validation_result["basename"],
+            "type": "folder" if validation_result["is_dir"] else "file",
+            "size": validation_result["size"],
+            "mtime": validation_result["mtime"],
+            "is_symlink": validation_result["is_symlink"]
+        }
+    
+    def _format_display_name(self, validation_result, full_relative_path):
+        """Tạo tên hiển thị cho item trong danh sách đã chọn"""
+        item_type = "FOLDER" if validation_result["is_dir"] else "FILE"
+        
+        if validation_result["is_symlink"]:
+            item_type += " (SYMLINK)"
+        
+        display_name = f"[{item_type}] {validation_result['basename']}"
+        
+        if len(full_relative_path) > 60:
+            short_path = "..." + full_relative_path[-57:]
+            display_name += f" ({short_path})"
+        else:
+            display_name += f" ({full_relative_path})"
+        
+        return display_name
+    
+    def show_tree_context_menu(self, position):
+        """Hiển thị menu ngữ cảnh cho tree: chọn hàng loạt trong folder"""
+        model = self.file_tree.model
+        index = self.file_tree.indexAt(position)
+        
+        item_path = None
+        if index.isValid() and not model.isLoadMore(index):
+            item_path = model.filePath(index)
+            folder_path = item_path if model.isDir(index) else os.path.dirname(item_path)
+        else:
+            folder_path = model.filePath(self.file_tree.rootIndex())
+        
+        if not folder_path:
+            return
+        
+        menu = QtWidgets.QMenu()
+        menu.setStyleSheet(get_context_menu_stylesheet())
+        
+        select_all_action = menu.addAction("☑️ " + self._get_translation("select_all_in_folder"))
+        deselect_all_action = menu.addAction("⬜ " + self._get_translation("deselect_all_in_folder"))
+        menu.addSeparator()
+        select_matching_action = menu.addAction("🔎 " + self._get_translation("select_matching"))
+        menu.addSeparator()
+        exclude_action = None
+        if item_path and item_path != model.rootPath():
+            exclude_action = menu.addAction("🙈 " + self._get_translation("exclude_from_tree"))
+        edit_excludes_action = menu.addAction("⚙️ " + self._get_translation("edit_exclude_patterns"))
+        
+        action = menu.exec_(self.file_tree.viewport().mapToGlobal(position))
+        
+        if action is None:
+            return
+        
+        if action == exclude_action:
+            # Pattern neo vào workspace root để chỉ ẩn đúng item này
+            relative = os.path.relpath(item_path, model.rootPath()).replace(os.sep, '/')
+            pattern = "/" + relative + ("/" if model.isDir(index) else "")
+            if pattern not in self._exclude_globs:
+                self._set_exclude_globs(self._exclude_globs + [pattern])
+            return
+        
+        if action == edit_excludes_action:
+            text, ok = QtWidgets.QInputDialog.getMultiLineText(
+                self,
+                self._get_translation("edit_exclude_patterns"),
+                self._get_translation("edit_exclude_patterns_prompt"),
+                "\n".join(self._exclude_globs)
+            )
+            if ok:
+                self._set_exclude_globs([line.strip() for line in text.splitlines() if line.strip()])
+            return
+        
+        if action == select_all_action:
+            self.file_tree.selectChildren(folder_path, True)
+        
+        elif action == deselect_all_action:
+            self.file_tree.selectChildren(folder_path, False)
+        
+        elif action == select_matching_action:
+            pattern, ok = QtWidgets.QInputDialog.getText(
+                self,
+                self._get_translation("select_matching"),
+                self._get_translation("select_matching_prompt").format(folder=os.path.basename(folder_path)),
+                QtWidgets.QLineEdit.Normal,
+                "*.py"
+            )
+            if ok and pattern.strip():
+                self.file_tree.selectMatching(folder_path, pattern.strip(), True)
+    
     def _is_safe_path(self, path):
         """Kiểm tra xem path có an toàn không (deprecated - sử dụng utils functions)"""
         # Chuyển sang sử dụng function từ utils
@@ -458,7 +663,7 @@ class FileAttachDialog(QtWidgets.QDialog):
     
     def show_selected_context_menu(self, position):
         """Hiển thị menu ngữ cảnh cho danh sách items đã chọn"""
-        if not self.selected_list.count():
+        if not len(self.selected_model):
             return
             
         menu = QtWidgets.QMenu()
@@ -467,11 +672,10 @@ class FileAttachDialog(QtWidgets.QDialog):
         menu.setStyleSheet(get_context_menu_stylesheet())
         
         # Get current item để check if valid for scroll action
-        current_item = self.selected_list.itemAt(position)
-        current_row = self.selected_list.row(current_item) if current_item else -1
+        current_row = self.selected_list.indexAt(position).row()
         
         scroll_action = menu.addAction("🔍 " + self._get_translation("scroll_to_location"))
-        scroll_action.setEnabled(current_row >= 0 and current_row < len(self.selected_items))
+        scroll_action.setEnabled(self.selected_model.path_at(current_row) is not None)
         scroll_action.setToolTip("Automatically scroll tree view to this item's location")
         
         menu.addSeparator()
@@ -486,18 +690,15 @@ class FileAttachDialog(QtWidgets.QDialog):
         
         if action == scroll_action:
             # Scroll to location in tree view
-            if current_row >= 0 and current_row < len(self.selected_items):
+            if self.selected_model.path_at(current_row) is not None:
                 self._scroll_to_item_location(current_row)
         
         elif action == remove_action:
-            current_row = self.selected_list.currentRow()
-            if current_row >= 0 and current_row < len(self.selected_items):
+            current_row = self.selected_list.currentIndex().row()
+            relative_path = self.selected_model.path_at(current_row)
+            if relative_path is not None:
                 try:
-                    relative_path = self.selected_items[current_row]
-                    self.selected_items.pop(current_row)
-                    list_item = self.selected_list.takeItem(current_row)
-                    if list_item:
-                        del list_item
+                    self.selected_model.remove(relative_path)
                     
                     workspace_name = os.path.basename(self.workspace_path)
                     if relative_path.startswith(f"{workspace_name}/"):
@@ -505,13 +706,8 @@ class FileAttachDialog(QtWidgets.QDialog):
                         full_path = os.path.join(self.workspace_path, path_without_workspace.replace('/', os.sep))
                         normalized_full_path = normalize_path_unicode(full_path)
                         
-                        # Use model.setSelected instead of deselectItem để avoid expand side effects
-                        index = self.file_tree.model.index(normalized_full_path)
-                        if index.isValid():
-                            self.file_tree.model.setSelected(index, False)
-                        
-                        # Single refresh instead of potential multiple refreshes
-                        self.file_tree.refreshView()
+                        # Model emit dataChanged cho đúng row bị bỏ chọn
+                        self.file_tree.model.setPathSelected(normalized_full_path, False)
                     
                     # Update button state after removal
                     self.update_selected_button_state()
@@ -528,12 +724,12 @@ class FileAttachDialog(QtWidgets.QDialog):
     
     def update_selected_button_state(self):
         """Cập nhật trạng thái Clear Selected button"""
-        selected_items = self.selected_list.selectedItems()
-        has_selection = len(selected_items) > 0
+        selected_rows = self.selected_list.selectionModel().selectedRows()
+        has_selection = len(selected_rows) > 0
         
         self.clear_selected_btn.setEnabled(has_selection)
         if has_selection:
-            self.clear_selected_btn.setText(f"{self._get_translation('clear_selected')} ({len(selected_items)})")
+            self.clear_selected_btn.setText(f"{self._get_translation('clear_selected')} ({len(selected_rows)})")
             self.clear_selected_btn.setToolTip(self._get_translation("clear_selected_enabled_tooltip"))
         else:
             self.clear_selected_btn.setText(self._get_translation("clear_selected"))
@@ -541,8 +737,8 @@ class FileAttachDialog(QtWidgets.QDialog):
     
     def clear_selected_items(self):
         """Xóa các items đã chọn trong list"""
-        selected_items = self.selected_list.selectedItems()
-        if not selected_items:
+        selected_rows = self.selected_list.selectionModel().selectedRows()
+        if not selected_rows:
             QtWidgets.QMessageBox.information(
                 self,
                 self._get_translation("no_selection"), 
@@ -550,24 +746,10 @@ class FileAttachDialog(QtWidgets.QDialog):
             )
             return
         
-        # Get rows to remove và corresponding relative paths
-        rows_to_remove = []
-        relative_paths_to_remove = []
-        
-        for item in selected_items:
-            row = self.selected_list.row(item)
-            if row < len(self.selected_items):
-                rows_to_remove.append(row)
-                relative_paths_to_remove.append(self.selected_items[row])
-        
-        # Sort descending để xóa từ cuối
-        rows_to_remove.sort(reverse=True)
-        
-        # Remove from UI list
-        for row in rows_to_remove:
-            self.selected_list.takeItem(row)
-            if row < len(self.selected_items):
-                self.selected_items.pop(row)
+        # Remove from model - các row liên tiếp được xóa trong một lần
+        relative_paths_to_remove = self.selected_model.remove_rows(
+            [index.row() for index in selected_rows]
+        )
         
         # Deselect in tree view - batch operation để minimize refreshes
         if relative_paths_to_remove:
@@ -578,13 +760,8 @@ class FileAttachDialog(QtWidgets.QDialog):
                     full_path = os.path.join(self.workspace_path, path_without_workspace.replace('/', os.sep))
                     normalized_full_path = normalize_path_unicode(full_path)
                     
-                    # Tìm index và deselect trực tiếp - NO expansion side effects
-                    index = self.file_tree.model.index(normalized_full_path)
-                    if index.isValid():
-                        self.file_tree.model.setSelected(index, False)
-            
-            # Single refresh sau khi tất cả deselections complete
-            self.file_tree.refreshView()
+                    # Deselect theo path - NO expansion side effects
+                    self.file_tree.model.setPathSelected(normalized_full_path, False)
         
         # Update button state
         self.update_selected_button_state()
@@ -592,8 +769,9 @@ class FileAttachDialog(QtWidgets.QDialog):
     def clear_selection(self):
         """Xóa tất cả các lựa chọn"""
         try:
-            self.selected_items.clear()
-            self.selected_list.clear()
+            # Bỏ qua kết quả validate của lần restore đang chạy (nếu có)
+            self._restore_generation += 1
+            self.selected_model.clear()
             self.file_tree.clearSelection()
             self.update_selected_button_state()
         except Exception as e:
@@ -603,26 +781,94 @@ class FileAttachDialog(QtWidgets.QDialog):
                 self._get_translation("clear_error_msg").format(error=str(e))
             )
     
-    def get_selected_files(self):
-        """Trả về danh sách các items đã chọn"""
-        validated_items = []
+    def _set_exclude_globs(self, exclude_globs):
+        """Áp dụng exclude patterns mới cho cây thư mục và báo cho caller lưu lại"""
+        self._exclude_globs = list(exclude_globs)
+        self.file_tree.model.setExcludeGlobs(self._exclude_globs)
+        self.excludeGlobsChanged.emit(list(self._exclude_globs))
+    
+    def _schedule_tree_filter(self, _text=None):
+        """Debounce: chỉ lọc khi người dùng ngừng gõ TREE_FILTER_DEBOUNCE_MS"""
+        self._tree_filter_timer.start(TREE_FILTER_DEBOUNCE_MS)
+    
+    def _apply_tree_filter(self):
+        """Lọc cây theo text trong ô filter (build name index trước nếu chưa có)"""
+        query = self.tree_filter_input.text().strip()
+        self._filter_generation += 1
+        model = self.file_tree.model
+        
+        if not query:
+            if model.isFiltered():
+                model.setVisiblePaths(None)
+            return
         
-        for relative_path in self.selected_items:
-            try:
-                workspace_name = os.path.basename(self.workspace_path)
-                if relative_path.startswith(f"{workspace_name}/"):
-                    path_without_workspace = relative_path[len(workspace_name)+1:]
-                    full_path = os.path.join(self.workspace_path, path_without_workspace.replace('/', os.sep))
-                    
-                    if os.path.exists(full_path) and os.access(full_path, os.R_OK):
-                        validated_items.append(relative_path)
-                else:
-                    validated_items.append(relative_path)
-                    
-            except Exception:
-                continue
+        if self._name_index is None:
+            # Lọc lại khi index build xong
+            self._start_name_index()
+            return
+        
+        self._filter_worker = start_name_filter(
+            self._filter_generation, self._name_index, query, self._on_tree_filter_finished
+        )
+    
+    def _start_name_index(self):
+        """Build name index của root hiện tại ở background (nếu chưa build)"""
+        if self._index_worker is not None:
+            return
+        model = self.file_tree.model
+        if not model.rootPath():
+            return
         
-        return validated_items
+        generation = self._index_generation
+        self._index_worker = start_name_index(
+            generation,
+            model.rootPath(),
+            model.ignoreRules(),
+            lambda: self._index_generation != generation,
+            self._on_name_index_finished
+        )
+    
+    def _on_name_index_finished(self, generation, index):
+        if generation != self._index_generation:
+            return
+        self._index_worker = None
+        if index is None:
+            return
+        
+        self._name_index = index
+        if index.truncated:
+            logger.warning(f"Name index bị giới hạn ở {len(index)} entries")
+        if self.tree_filter_input.text().strip():
+            self._apply_tree_filter()
+    
+    def _on_tree_filter_finished(self, generation, query, result):
+        if generation != self._filter_generation:
+            return
+        
+        matches, visible = result
+        self.file_tree.model.setVisiblePaths(visible)
+        if matches:
+            self.file_tree.expandToPaths(matches[:TREE_FILTER_EXPAND_LIMIT], scroll_to=matches[0])
+    
+    def _on_tree_root_changed(self, root_path):
+        """Root hoặc ignore rules đổi: bỏ name index cũ và lọc lại nếu đang có filter"""
+        self._index_generation += 1
+        self._index_worker = None
+        self._name_index = None
+        self._filter_generation += 1
+        if self.tree_filter_input.text().strip():
+            self._schedule_tree_filter()
+    
+    def get_selected_records(self):
+        """
+        Trả về typed records (relative_path, workspace_name, name, type, size,
+        mtime, is_symlink) của các items đã chọn, bỏ qua items không còn tồn tại
+        """
+        return [dict(record) for record in self.selected_model.records()]
+    
+    def get_selected_files(self):
+        """Trả về danh sách relative paths của các items đã chọn"""
+        return [record["relative_path"] for record in self.get_selected_records()]
     
     def get_workspace_path(self):
         """Trả về tên workspace gốc"""
@@ -658,105 +904,104 @@ class FileAttachDialog(QtWidgets.QDialog):
             # Auto-expand workspace root để show immediate subdirectories
             self._expand_workspace_root()
             
-            # Khôi phục selected items
-            for item_info in current_attached_files:
-                try:
-                    relative_path = item_info["relative_path"]
-                    if relative_path not in self.selected_items:
-                        self.selected_items.append(relative_path)
-                        
-                        # Thêm vào UI list
-                        item_type = item_info.get("type", "unknown").upper()
-                        basename = item_info.get("name", "unknown")
-                        display_name = f"[{item_type}] {basename}"
-                        
-                        if len(relative_path) > 60:
-                            short_path = "..." + relative_path[-57:]
-                            display_name += f" ({short_path})"
-                        else:
-                            display_name += f" ({relative_path})"
-                        
-                        list_item = QtWidgets.QListWidgetItem(display_name)
-                        list_item.setToolTip(self._get_translation("file_item_tooltip").format(path=relative_path))
-                        self.selected_list.addItem(list_item)
-                        
-                        # Highlight và auto-expand trong tree nếu tìm thấy
-                        workspace_name_prefix = f"{workspace_name}/"
-                        if relative_path.startswith(workspace_name_prefix):
-                            path_without_workspace = relative_path[len(workspace_name_prefix):]
-                            full_path = os.path.join(self.workspace_path, path_without_workspace.replace('/', os.sep))
-                            # Use delayed method để ensure proper expand timing
-                            self._auto_expand_and_highlight_delayed(full_path)
-                            
-                except Exception:
-                    continue
-            
-            # Update button state after restore
-            self.update_selected_button_state()
+            # Khôi phục selected items - validate ở background
+            self._restore_selected_items(current_attached_files)
     
-    def _highlight_item_in_tree(self, full_path):
-        """Highlight một item trong tree view"""
-        try:
-            normalized_path = normalize_path_unicode(full_path)
-            if os.path.exists(normalized_path):
-                # Tìm index của item trong model
-                index = self.file_tree.model.index(normalized_path)
-                if index.isValid():
-                    self.file_tree.model.setSelected(index, True)
-                    self.file_tree.refreshView()
-        except Exception:
-            pass
+    def _restore_session_selection(self):
+        """Khôi phục bộ items đã chọn gần nhất của workspace từ session store"""
+        if not self.session_store or not self.workspace_path:
+            return
+        
+        attached_files = self.session_store.get_attached_files(self.workspace_path)
+        if attached_files:
+            self._restore_selected_items(attached_files)
     
-    def _auto_expand_and_highlight(self, full_path):
-        """Auto-expand parent directories và highlight item trong tree view"""
-        try:
-            normalized_path = normalize_path_unicode(full_path)
-            if not os.path.exists(normalized_path):
-                return
-            
-            # Tìm index của target item
-            target_index = self.file_tree.model.index(normalized_path)
-            if not target_index.isValid():
-                return
-            
-            # Auto-expand tất cả parent directories
-            current_path = normalized_path
-            paths_to_expand = []
-            
-            # Collect tất cả parent paths từ target đến workspace root
-            while current_path and current_path != self.workspace_path:
-                parent_path = os.path.dirname(current_path)
-                if parent_path and parent_path != current_path:
-                    paths_to_expand.append(parent_path)
-                    current_path = parent_path
-                else:
-                    break
-            
-            # Reverse để expand từ root down to target
-            paths_to_expand.reverse()
-            
-            # Expand each parent directory
-            for path_to_expand in paths_to_expand:
-                try:
-                    index = self.file_tree.model.index(path_to_expand)
-                    if index.isValid():
-                        self.file_tree.expand(index)
-                except Exception:
-                    continue
-            
-            # Highlight target item
-            self.file_tree.model.setSelected(target_index, True)
+    def _restore_selected_items(self, attached_files):
+        """
+        Thêm các items đã lưu vào list ngay lập tức, sau đó validate toàn bộ
+        ở background worker. Kết quả được áp dụng một lần trong _on_restore_validated.
+        """
+        workspace_name = os.path.basename(self.workspace_path)
+        workspace_prefix = f"{workspace_name}/"
+        entries = []
+        pending = []
+        
+        for item_info in attached_files:
+            relative_path = item_info.get("relative_path", "")
+            if not relative_path.startswith(workspace_prefix) or relative_path in self.selected_model:
+                continue
             
-            # Scroll to make target visible
-            self.file_tree.scrollTo(target_index)
+            item_type = item_info.get("type", "unknown").upper()
+            basename = item_info.get("name", os.path.basename(relative_path))
+            display_name = f"[{item_type}] {basename}"
             
-            # Refresh view
-            self.file_tree.refreshView()
+            if len(relative_path) > 60:
+                short_path = "..." + relative_path[-57:]
+                display_name += f" ({short_path})"
+            else:
+                display_name += f" ({relative_path})"
             
-        except Exception as e:
-            # Fallback to basic highlighting if auto-expand fails
-            self._highlight_item_in_tree(full_path) 
-
+            entries.append((
+                relative_path,
+                display_name,
+                self._get_translation("file_item_tooltip").format(path=relative_path),
+                dict(item_info)
+            ))
+            full_path = os.path.join(
+                self.workspace_path,
+                relative_path[len(workspace_prefix):].replace('/', os.sep)
+            )
+            pending.append((relative_path, full_path))
+        
+        self.selected_model.add_many(entries)
+        self.update_selected_button_state()
+        
+        if not pending:
+            return
+        
+        # Generation mới - kết quả của lần restore trước (nếu còn chạy) bị bỏ qua
+        self._restore_generation += 1
+        self._pending_restore = pending
+        self._validation_worker = start_path_validation(
+            self._restore_generation,
+            [full_path for _, full_path in pending],
+            self.workspace_path,
+            self._on_restore_validated
+        )
+    
+    def _on_restore_validated(self, generation, results):
+        """Áp dụng kết quả validate: đánh dấu missing, highlight và expand một lần"""
+        if generation != self._restore_generation:
+            return
+        
+        pending = self._pending_restore
+        self._pending_restore = []
+        self._validation_worker = None
+        if len(results) != len(pending):
+            return
+        
+        missing_paths = []
+        valid_full_paths = []
+        updates = {}
+        for (relative_path, full_path), validation_result in zip(pending, results):
+            if validation_result["valid"]:
+                valid_full_paths.append(validation_result["normalized_path"])
+                # Làm mới record đã lưu bằng stat vừa đọc (type/size/mtime)
+                updates[relative_path] = (
+                    self._format_display_name(validation_result, relative_path),
+                    self._make_item_record(validation_result, relative_path)
+                )
+            else:
+                missing_paths.append(relative_path)
+        
+        # Một lần cập nhật model (một dataChanged) cho cả record mới và items missing
+        self.selected_model.update_records(updates, missing_paths)
+        
+        if valid_full_paths:
+            self.file_tree.model.setPathsSelected(valid_full_paths, True)
+            self.file_tree.expandToPaths(valid_full_paths, scroll_to=valid_full_paths[0])
+            self.file_tree.viewport().update()
+    
     def _refresh_button_styles(self):
         """Force refresh button styles để apply semantic colors"""
         buttons_to_refresh = [
@@ -801,10 +1046,10 @@ class FileAttachDialog(QtWidgets.QDialog):
     def _scroll_to_item_location(self, item_row):
         """Scroll tree view đến location của item trong selected list"""
         try:
-            if item_row < 0 or item_row >= len(self.selected_items):
+            relative_path = self.selected_model.path_at(item_row)
+            if relative_path is None:
                 return
             
-            relative_path = self.selected_items[item_row]
             workspace_name = os.path.basename(self.workspace_path)
             
             if not relative_path.startswith(f"{workspace_name}/"):
@@ -912,7 +1157,7 @@ class FileAttachDialog(QtWidgets.QDialog):
                 return
             
             # Check if already selected
-            if full_relative_path in self.selected_items:
+            if full_relative_path in self.selected_model:
                 QtWidgets.QMessageBox.information(
                     self,
                     self._get_translation("already_selected"),
@@ -922,25 +1167,13 @@ class FileAttachDialog(QtWidgets.QDialog):
                 self._auto_expand_and_highlight_delayed(target_path)
                 return
             
-            # Add to selected items
-            self.selected_items.append(full_relative_path)
-            
-            # Determine item type và name
-            item_type = "folder" if os.path.isdir(target_path) else "file"
-            basename = os.path.basename(target_path)
-            
-            # Create display name
-            display_name = f"[{item_type.upper()}] {basename}"
-            if len(full_relative_path) > 60:
-                short_path = "..." + full_relative_path[-57:]
-                display_name += f" ({short_path})"
-            else:
-                display_name += f" ({full_relative_path})"
-            
-            # Add to UI list
-            list_item = QtWidgets.QListWidgetItem(display_name)
-            list_item.setToolTip(self._get_translation("file_item_tooltip").format(path=full_relative_path))
-            self.selected_list.addItem(list_item)
+            # Add to selected items - type lấy từ stat của validation, không đoán theo tên
+            self.selected_model.add(
+                full_relative_path,
+                self._format_display_name(validation_result, full_relative_path),
+                self._get_translation("file_item_tooltip").format(path=full_relative_path),
+                self._make_item_record(validation_result, full_relative_path)
+            )
             
             # Auto-expand và highlight trong tree với delayed scroll
             self._auto_expand_and_highlight_delayed(target_path)
@@ -952,6 +1185,7 @@ class FileAttachDialog(QtWidgets.QDialog):
             self.paste_path_input.clear()
             
             # Show success feedback
+            basename = validation_result.get("basename") or os.path.basename(target_path)
             self.paste_path_input.setPlaceholderText(
                 f"✅ Added: {basename} - " + self._get_translation("paste_path_to_select_placeholder")
             )
@@ -969,74 +1203,29 @@ class FileAttachDialog(QtWidgets.QDialog):
             ) 
 
     def _auto_expand_and_highlight_delayed(self, full_path):
-        """Auto-expand và highlight với delayed scroll để ensure expand hoàn thành"""
+        """Expand ancestors của item, highlight và scroll tới khi thư mục cuối cùng load xong"""
         try:
             normalized_path = normalize_path_unicode(full_path)
             if not os.path.exists(normalized_path):
                 return
             
-            # Phase 1: Collect tất cả parent paths cần expand
-            current_path = normalized_path
-            paths_to_expand = []
-            
-            while current_path and current_path != self.workspace_path:
-                parent_path = os.path.dirname(current_path)
-                if parent_path and parent_path != current_path:
-                    paths_to_expand.append(parent_path)
-                    current_path = parent_path
-                else:
-                    break
-            
-            # Reverse để expand từ root down to target
-            paths_to_expand.reverse()
-            
-            # Phase 2: Expand each parent directory với progressive delays
-            self._expand_paths_progressively(paths_to_expand, normalized_path, 0)
+            self.file_tree.expandToPaths(
+                [normalized_path],
+                scroll_to=normalized_path,
+                on_finished=lambda: self._final_highlight_and_scroll(normalized_path)
+            )
             
-        except Exception as e:
-            # Fallback to basic highlighting if auto-expand fails
-            self._auto_expand_and_highlight(full_path)
-
-    def _expand_paths_progressively(self, paths_to_expand, target_path, current_index):
-        """Expand paths progressively với delays để ensure completion"""
-        if current_index >= len(paths_to_expand):
-            # All parent paths expanded, now scroll to target với delay
-            QtCore.QTimer.singleShot(200, lambda: self._final_highlight_and_scroll(target_path))
-            return
-        
-        # Expand current path
-        path_to_expand = paths_to_expand[current_index]
-        try:
-            index = self.file_tree.model.index(path_to_expand)
-            if index.isValid():
-                self.file_tree.expand(index)
         except Exception:
             pass
-        
-        # Schedule next expansion với delay
-        QtCore.QTimer.singleShot(100, lambda: self._expand_paths_progressively(
-            paths_to_expand, target_path, current_index + 1
-        ))
-
+    
     def _final_highlight_and_scroll(self, target_path):
-        """Final step: highlight target và scroll với focus"""
+        """Final step: highlight target và focus tree view"""
         try:
-            # Find target index
-            target_index = self.file_tree.model.index(target_path)
-            if not target_index.isValid():
-                return
-            
-            # Highlight target item
-            self.file_tree.model.setSelected(target_index, True)
-            
-            # Scroll to make target visible
-            self.file_tree.scrollTo(target_index)
+            # Highlight target item (model emit dataChanged cho đúng row)
+            self.file_tree.model.setPathSelected(target_path, True)
             
             # Focus tree view để user thấy highlight
             self.file_tree.setFocus()
             
-            # Refresh view để ensure visual update
-            self.file_tree.refreshView()
-            
         except Exception:
             pass  # Fail silently for final step 
\ No newline at end of file
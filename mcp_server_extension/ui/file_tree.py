@@ -1,20 +1,351 @@
 # File tree components for AI extension Tool
 from PyQt5 import QtWidgets, QtCore, QtGui
 import os
-from ..constants import TREE_DEPTH_EXPANSION
-from ..utils.file_utils import normalize_path_unicode, validate_file_path_in_workspace
+from ..constants import TREE_DEPTH_EXPANSION, TREE_EXPAND_TIMEOUT_MS, TREE_DIR_CHILD_LIMIT
+from ..utils.ignore_rules import IgnoreRules
+from ..utils.file_utils import (
+    normalize_path_unicode,
+    validate_file_path_in_workspace,
+    list_child_paths,
+    find_files_matching
+)
 from .styles import ModernTheme, FileTypeIcons
+from .workers import start_directory_scan
 
-class FileSystemModel(QtWidgets.QFileSystemModel):
-    """Mô hình hệ thống tệp tùy chỉnh cho cây thư mục"""
+class _FsNode:
+    """Một node trong FileSystemModel (file, thư mục hoặc row "load more")"""
+    __slots__ = ("name", "path", "is_dir", "is_more", "parent", "row", "children", "loading", "overflow")
+    
+    def __init__(self, name, path, is_dir, parent=None, row=0, is_more=False):
+        self.name = name
+        self.path = path
+        self.is_dir = is_dir
+        self.is_more = is_more
+        self.parent = parent
+        self.row = row
+        self.children = None   # None: chưa load
+        self.loading = False
+        self.overflow = []     # [(name, is_dir)] đã scan nhưng chưa hiển thị
+
+
+class FileSystemModel(QtCore.QAbstractItemModel):
+    """
+    Mô hình hệ thống tệp lazy cho cây thư mục.
+    
+    Chỉ thư mục được expand mới được liệt kê, bằng os.scandir ở background thread.
+    Mỗi thư mục hiển thị tối đa TREE_DIR_CHILD_LIMIT items, phần còn lại nằm sau
+    một row "load more". Đổi root path sẽ hủy các lần scan đang chờ.
+    Entries bị IgnoreRules loại không bao giờ vào model (thư mục bị ignore không
+    bị scan); setVisiblePaths() lọc thêm theo kết quả của live name filter.
+    API giữ giống QFileSystemModel ở phần được dùng (index(path), filePath, isDir,
+    rootPath, directoryLoaded, rootPathChanged...).
+    """
+    directoryLoaded = QtCore.pyqtSignal(str)
+    rootPathChanged = QtCore.pyqtSignal(str)
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self._selected_items = set()
+        # path -> QPersistentModelIndex để tìm lại row mà không phải duyệt cây
+        self._selected_indexes = {}
         self._workspace_path = ""
-        self.setReadOnly(True)
-        self.setFilter(QtCore.QDir.AllDirs | QtCore.QDir.Files | QtCore.QDir.NoDotAndDotDot)
-        # Ensure model shows directory hierarchy
-        self.setRootPath("")  # Allow full filesystem access initially
+        self._root_path = ""
+        # Node ẩn chứa root directory (tương ứng QModelIndex())
+        self._top = _FsNode("", "", True)
+        self._top.children = []
+        self._nodes = {}
+        # Tăng mỗi lần đổi root - kết quả scan của generation cũ bị bỏ qua
+        self._generation = 0
+        # (generation, path) -> worker; entry bị bỏ khi worker emit finished (kể cả khi bị hủy)
+        self._scan_workers = {}
+        # path -> entries đã scan (đã sắp xếp, đã áp dụng ignore rules) của generation hiện tại.
+        # Dùng lại khi node được tạo lại (prefetch, đổi filter) thay vì scan lại.
+        self._listings = {}
+        self._exclude_globs = []
+        self._ignore_rules = None
+        # None: không lọc; set: chỉ hiển thị các path trong set
+        self._visible_paths = None
+        self._load_more_text = "Load {count} more..."
+    
+    def setLoadMoreText(self, template):
+        """Thiết lập text cho row "load more" (template có {count})"""
+        self._load_more_text = template
+    
+    # ----- Node helpers -----
+    
+    def _node(self, index):
+        if not index.isValid():
+            return self._top
+        return index.internalPointer()
+    
+    def _indexForNode(self, node):
+        if node is self._top or node is None:
+            return QtCore.QModelIndex()
+        return self.createIndex(node.row, 0, node)
+    
+    def _scan(self, path):
+        """Chạy DirectoryScanWorker cho path, bị hủy khi generation thay đổi"""
+        generation = self._generation
+        self._scan_workers[(generation, path)] = start_directory_scan(
+            generation,
+            path,
+            lambda: self._generation != generation,
+            self._onScanFinished,
+            self._ignore_rules
+        )
+    
+    def _startScan(self, node):
+        """Load thư mục chưa load: dùng listing đã có nếu có, nếu không thì scan background"""
+        if not node.is_dir or node.children is not None or node.loading:
+            return
+        entries = self._listings.get(node.path)
+        if entries is not None:
+            self._applyScan(node, entries)
+            return
+        node.loading = True
+        if (self._generation, node.path) not in self._scan_workers:
+            self._scan(node.path)
+    
+    def _onScanFinished(self, generation, path, entries):
+        self._scan_workers.pop((generation, path), None)
+        if generation != self._generation or entries is None:
+            return
+        self._listings[path] = entries
+        node = self._nodes.get(path)
+        if node is not None and node.loading:
+            self._applyScan(node, entries)
+    
+    def _applyScan(self, node, entries):
+        if self._visible_paths is not None:
+            visible = self._visible_paths
+            entries = [entry for entry in entries if os.path.join(node.path, entry[0]) in visible]
+        node.loading = False
+        node.children = []
+        node.overflow = entries
+        self._insertChildren(node, TREE_DIR_CHILD_LIMIT)
+        self.directoryLoaded.emit(node.path)
+    
+    def _insertChildren(self, node, count):
+        """Chuyển tối đa count entries từ overflow vào model trong một lần beginInsertRows"""
+        chunk, node.overflow = node.overflow[:count], node.overflow[count:]
+        children = node.children
+        more = children[-1] if children and children[-1].is_more else None
+        parent_index = self._indexForNode(node)
+        
+        if chunk:
+            first = len(children) - (1 if more else 0)
+            new_nodes = []
+            for offset, (name, is_dir) in enumerate(chunk):
+                child = _FsNode(name, os.path.join(node.path, name), is_dir, node, first + offset)
+                new_nodes.append(child)
+            
+            self.beginInsertRows(parent_index, first, first + len(new_nodes) - 1)
+            children[first:first] = new_nodes
+            for child in new_nodes:
+                self._nodes[child.path] = child
+            if more is not None:
+                more.row = len(children) - 1
+            self.endInsertRows()
+        
+        if node.overflow and more is None:
+            row = len(children)
+            self.beginInsertRows(parent_index, row, row)
+            children.append(_FsNode("", "", False, node, row, is_more=True))
+            self.endInsertRows()
+        elif not node.overflow and more is not None:
+            self.beginRemoveRows(parent_index, more.row, more.row)
+            children.pop()
+            self.endRemoveRows()
+        elif more is not None:
+            more_index = self._indexForNode(more)
+            self.dataChanged.emit(more_index, more_index)
+    
+    # ----- QFileSystemModel-compatible API -----
+    
+    def _resetTree(self, rescan):
+        """
+        Dựng lại cây chỉ còn root node. rescan=True hủy các scan đang chờ và bỏ
+        listings cũ; ngược lại listings được dùng lại để expand lại ngay.
+        """
+        if rescan:
+            self._generation += 1
+            self._listings.clear()
+        
+        self.beginResetModel()
+        self._nodes = {}
+        self._selected_indexes.clear()
+        self._top.children = []
+        if self._root_path:
+            root_node = _FsNode(os.path.basename(self._root_path) or self._root_path, self._root_path, True, self._top, 0)
+            self._top.children.append(root_node)
+            self._nodes[self._root_path] = root_node
+        self.endResetModel()
+        
+        if not self._top.children:
+            return QtCore.QModelIndex()
+        root_node = self._top.children[0]
+        self._startScan(root_node)
+        return self._indexForNode(root_node)
+    
+    def setRootPath(self, path):
+        """Đặt thư mục gốc, hủy các scan đang chờ và bắt đầu scan root"""
+        normalized_path = os.path.normpath(normalize_path_unicode(path)) if path else ""
+        if normalized_path == self._root_path and self._top.children:
+            return self._indexForNode(self._top.children[0])
+        
+        self._root_path = normalized_path
+        self._visible_paths = None
+        self._ignore_rules = IgnoreRules(normalized_path, self._exclude_globs) if normalized_path else None
+        index = self._resetTree(rescan=True)
+        self.rootPathChanged.emit(normalized_path)
+        return index
+    
+    def setExcludeGlobs(self, exclude_globs):
+        """Đặt exclude globs của người dùng (cú pháp .gitignore) và scan lại cây nếu cần"""
+        exclude_globs = list(exclude_globs or [])
+        if exclude_globs == self._exclude_globs:
+            return
+        self._exclude_globs = exclude_globs
+        if self._root_path:
+            self._ignore_rules = IgnoreRules(self._root_path, exclude_globs)
+            self._visible_paths = None
+            self._resetTree(rescan=True)
+            self.rootPathChanged.emit(self._root_path)
+    
+    def excludeGlobs(self):
+        return list(self._exclude_globs)
+    
+    def ignoreRules(self):
+        """IgnoreRules của root hiện tại (None nếu chưa có root)"""
+        return self._ignore_rules
+    
+    def setVisiblePaths(self, paths):
+        """
+        Chỉ hiển thị các path trong paths (kết quả live filter, đã gồm các thư mục cha).
+        None để bỏ lọc. Các thư mục đã scan được dựng lại từ listings, không scan lại.
+        """
+        self._visible_paths = set(paths) if paths is not None else None
+        return self._resetTree(rescan=False)
+    
+    def isFiltered(self):
+        return self._visible_paths is not None
+    
+    def rootPath(self):
+        return self._root_path
+    
+    def index(self, row_or_path, column=0, parent=QtCore.QModelIndex()):
+        """index(row, column, parent) như mọi model, hoặc index(path) như QFileSystemModel"""
+        if isinstance(row_or_path, str):
+            node = self._nodes.get(os.path.normpath(row_or_path)) if row_or_path else None
+            return self._indexForNode(node) if node is not None else QtCore.QModelIndex()
+        
+        if column != 0:
+            return QtCore.QModelIndex()
+        children = self._node(parent).children
+        if children is None or not 0 <= row_or_path < len(children):
+            return QtCore.QModelIndex()
+        return self.createIndex(row_or_path, 0, children[row_or_path])
+    
+    def parent(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        return self._indexForNode(index.internalPointer().parent)
+    
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        children = self._node(parent).children
+        return len(children) if children else 0
+    
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 1
+    
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        node = self._node(parent)
+        if not node.is_dir:
+            return False
+        return node.children is None or bool(node.children)
+    
+    def canFetchMore(self, parent):
+        node = self._node(parent)
+        return node.is_dir and node.children is None and not node.loading
+    
+    def fetchMore(self, parent):
+        self._startScan(self._node(parent))
+    
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+    
+    def filePath(self, index):
+        """Đường dẫn đầy đủ của item ("" cho row "load more")"""
+        if not index.isValid():
+            return ""
+        return index.internalPointer().path
+    
+    def fileName(self, index):
+        if not index.isValid():
+            return ""
+        return index.internalPointer().name
+    
+    def isDir(self, index):
+        if not index.isValid():
+            return False
+        return index.internalPointer().is_dir
+    
+    def isLoadMore(self, index):
+        """Kiểm tra index có phải row "load more" không"""
+        return index.isValid() and index.internalPointer().is_more
+    
+    def isLoaded(self, index):
+        """Thư mục đã được liệt kê xong (kể cả khi rỗng)"""
+        return self._node(index).children is not None
+    
+    def loadMore(self, index):
+        """Hiển thị thêm TREE_DIR_CHILD_LIMIT items của thư mục chứa row "load more" """
+        if not self.isLoadMore(index):
+            return False
+        self._insertChildren(index.internalPointer().parent, TREE_DIR_CHILD_LIMIT)
+        return True
+    
+    def prefetch(self, paths):
+        """
+        Scan song song các thư mục (trong root) sắp được expand, ví dụ ancestors
+        của một target sâu, thay vì chờ từng level load xong mới scan level tiếp theo
+        """
+        root_prefix = self._root_path.rstrip(os.sep) + os.sep
+        for path in paths:
+            node = self._nodes.get(path)
+            if node is not None:
+                self._startScan(node)
+            elif path.startswith(root_prefix) and (self._generation, path) not in self._scan_workers and path not in self._listings:
+                if self._ignore_rules is not None and self._ignore_rules.is_ignored(path, True):
+                    continue
+                self._scan(path)
+    
+    def reveal(self, item_path):
+        """
+        Đảm bảo item đã được đưa vào model nếu nó đang nằm sau row "load more".
+        
+        Returns:
+            QModelIndex: index của item, invalid nếu thư mục cha chưa load hoặc item không tồn tại
+        """
+        normalized_path = os.path.normpath(item_path)
+        node = self._nodes.get(normalized_path)
+        if node is not None:
+            return self._indexForNode(node)
+        
+        parent = self._nodes.get(os.path.dirname(normalized_path))
+        if parent is None or parent.children is None:
+            return QtCore.QModelIndex()
+        
+        name = os.path.basename(normalized_path)
+        for position, (entry_name, _) in enumerate(parent.overflow):
+            if entry_name == name:
+                self._insertChildren(parent, position + 1)
+                return self._indexForNode(self._nodes.get(normalized_path))
+        return QtCore.QModelIndex()
     
     def setWorkspacePath(self, workspace_path):
         """Thiết lập workspace path"""
@@ -30,18 +361,80 @@ class FileSystemModel(QtWidgets.QFileSystemModel):
     
     def setSelected(self, index, selected=True):
         """Đặt trạng thái chọn cho item"""
-        if not index.isValid():
+        if not index.isValid() or self.isLoadMore(index):
             return False
         
         item_path = normalize_path_unicode(self.filePath(index))
         
         if selected:
             self._selected_items.add(item_path)
-        elif item_path in self._selected_items:
-            self._selected_items.remove(item_path)
+            self._selected_indexes[item_path] = QtCore.QPersistentModelIndex(index)
+        else:
+            self._selected_items.discard(item_path)
+            self._selected_indexes.pop(item_path, None)
         
+        self._emitRowChanged(index)
         return True
     
+    def setPathSelected(self, item_path, selected=True):
+        """Đặt trạng thái chọn theo path mà không cần duyệt cây"""
+        if not item_path:
+            return False
+        
+        normalized_path = normalize_path_unicode(item_path)
+        if not selected and normalized_path not in self._selected_items:
+            return True
+        
+        index = self.indexForPath(normalized_path)
+        if index.isValid():
+            return self.setSelected(index, selected)
+        
+        # Item chưa có trong model - chỉ cập nhật trạng thái, không cần repaint
+        if selected:
+            self._selected_items.add(normalized_path)
+        else:
+            self._selected_items.discard(normalized_path)
+            self._selected_indexes.pop(normalized_path, None)
+        return True
+    
+    def setPathsSelected(self, paths, selected=True):
+        """
+        Đặt trạng thái chọn cho nhiều path trong một lần
+        
+        Không resolve index cho từng path - view chỉ cần repaint một lần sau batch.
+        
+        Returns:
+            list: Các path (đã chuẩn hóa) thực sự thay đổi trạng thái
+        """
+        changed = []
+        for item_path in paths:
+            normalized_path = normalize_path_unicode(item_path)
+            if not normalized_path or (normalized_path in self._selected_items) == selected:
+                continue
+            
+            if selected:
+                self._selected_items.add(normalized_path)
+            else:
+                self._selected_items.discard(normalized_path)
+                self._selected_indexes.pop(normalized_path, None)
+            changed.append(normalized_path)
+        
+        return changed
+    
+    def indexForPath(self, item_path):
+        """Tìm index theo path, ưu tiên persistent index đã lưu khi chọn"""
+        persistent = self._selected_indexes.get(item_path)
+        if persistent is not None and persistent.isValid():
+            return QtCore.QModelIndex(persistent)
+        return self.index(item_path)
+    
+    def _emitRowChanged(self, index):
+        """Chỉ repaint row bị thay đổi và các thư mục cha của nó"""
+        current = index
+        while current.isValid():
+            self.dataChanged.emit(current, current)
+            current = current.parent()
+    
     def selectedItems(self):
         """Trả về danh sách các item đã chọn"""
         valid_items = []
@@ -58,31 +451,153 @@ class FileSystemModel(QtWidgets.QFileSystemModel):
         
         for item_path in items_to_remove:
             self._selected_items.discard(item_path)
+            self._selected_indexes.pop(item_path, None)
         
         return valid_items
     
     def clearSelection(self):
         """Xóa tất cả các lựa chọn"""
+        changed_indexes = [
+            QtCore.QModelIndex(persistent)
+            for persistent in self._selected_indexes.values()
+            if persistent.isValid()
+        ]
         self._selected_items.clear()
+        self._selected_indexes.clear()
+        
+        for index in changed_indexes:
+            self.dataChanged.emit(index, index)
     
     def data(self, index, role=QtCore.Qt.DisplayRole):
-        """Override data để hiển thị thông tin file"""
+        """Tên item (đã chuẩn hóa Unicode khi scan) và tooltip path"""
+        if not index.isValid():
+            return None
+        
+        node = index.internalPointer()
         if role == QtCore.Qt.DisplayRole:
-            original_name = super().data(index, role)
-            if original_name:
-                normalized_name = normalize_path_unicode(str(original_name))
-                return normalized_name
+            if node.is_more:
+                return self._load_more_text.format(count=len(node.parent.overflow))
+            return node.name
+        if role == QtCore.Qt.ToolTipRole and not node.is_more:
+            return node.path
+        return None
+
+class TreeExpander(QtCore.QObject):
+    """
+    Expand ancestors của nhiều target path dựa trên directoryLoaded của model.
+    
+    Mỗi ancestor được expand ngay khi index của nó resolve được (parent đã load),
+    nên độ trễ chỉ phụ thuộc I/O thật thay vì delay cố định mỗi level. Khi thư mục
+    cuối cùng load xong, các callback được gọi (scroll/highlight). Timer guard
+    kết thúc sớm nếu directoryLoaded không bao giờ tới (network disk bị treo...).
+    """
+    finished = QtCore.pyqtSignal()
+    
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+        self._pending = set()   # ancestors chưa resolve được index
+        self._waiting = set()   # ancestors đã expand, chờ directoryLoaded
+        self._callbacks = []
+        # True khi không có request nào đang chạy - _finish chỉ chạy một lần mỗi request
+        self._finished = True
+        self._guard_timer = QtCore.QTimer(self)
+        self._guard_timer.setSingleShot(True)
+        self._guard_timer.timeout.connect(self._finish)
+        view.model.directoryLoaded.connect(self._onDirectoryLoaded)
+    
+    def isRunning(self):
+        return bool(self._pending or self._waiting)
+    
+    def expandTo(self, target_paths, on_finished=None):
+        """
+        Expand tất cả ancestors (trong workspace) của target_paths.
+        Request mới khi đang chạy được gộp vào request hiện tại.
+        """
+        root_path = self.view.model.rootPath()
+        root_prefix = os.path.normpath(root_path).rstrip(os.sep) + os.sep if root_path else ""
+        
+        for target_path in target_paths:
+            parent_path = os.path.dirname(os.path.normpath(target_path))
+            while parent_path.startswith(root_prefix) and parent_path not in self._pending:
+                if parent_path in self._waiting:
+                    break
+                self._pending.add(parent_path)
+                parent_path = os.path.dirname(parent_path)
         
-        return super().data(index, role)
+        if on_finished is not None:
+            self._callbacks.append(on_finished)
+        
+        self._finished = False
+        self._guard_timer.start(TREE_EXPAND_TIMEOUT_MS)
+        self.view.model.prefetch(list(self._pending))
+        self._advance()
+    
+    def _advance(self):
+        """Expand các ancestor đã resolve được, nông trước sâu sau"""
+        model = self.view.model
+        for path in sorted(self._pending, key=lambda p: p.count(os.sep)):
+            if path not in self._pending:
+                # Đã được xử lý bởi lần _advance lồng nhau (directoryLoaded đồng bộ)
+                continue
+            # reveal() kéo item ra khỏi phần "load more" nếu cần
+            index = model.reveal(path)
+            if not index.isValid():
+                # Thư mục cha đã load mà không có path này - không còn gì để chờ
+                parent_index = model.index(os.path.dirname(path))
+                if parent_index.isValid() and model.isLoaded(parent_index):
+                    missing_prefix = path + os.sep
+                    self._pending = {p for p in self._pending if p != path and not p.startswith(missing_prefix)}
+                continue
+            self._pending.discard(path)
+            self.view.expand(index)
+            if not model.isLoaded(index):
+                self._waiting.add(path)
+        
+        if not self.isRunning():
+            self._finish()
+    
+    def _onDirectoryLoaded(self, path):
+        if not self.isRunning():
+            return
+        self._waiting.discard(os.path.normpath(path))
+        self._advance()
+    
+    def _finish(self):
+        """Kết thúc request hiện tại và gọi các callback"""
+        # _advance lồng nhau (directoryLoaded đồng bộ) đã kết thúc request này
+        if self._finished:
+            return
+        self._finished = True
+        self._guard_timer.stop()
+        self._pending.clear()
+        self._waiting.clear()
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+        self.finished.emit()
+
 
 class FileTreeView(QtWidgets.QTreeView):
     """Widget hiển thị cây thư mục với khả năng chọn nhiều file và folder"""
     itemSelected = QtCore.pyqtSignal(str, bool)
+    itemsSelected = QtCore.pyqtSignal(list, bool)  # Batch: (paths, selected)
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self.model = FileSystemModel(self)
         self.setModel(self.model)
+        # Model reset (đổi filter/exclude globs) làm mất root index của view
+        self.model.modelReset.connect(self._restoreRootIndex)
+        
+        # Anchor cho Shift+Click range selection
+        self._anchor_index = QtCore.QPersistentModelIndex()
+        
+        # Expand ancestors theo directoryLoaded thay vì timer
+        self.expander = TreeExpander(self)
         
         # Debug: Force show branches
         self.setRootIsDecorated(True)
@@ -227,27 +742,89 @@ class FileTreeView(QtWidgets.QTreeView):
     
 
     
+    def _restoreRootIndex(self):
+        root_path = self.model.rootPath()
+        if root_path:
+            self.setRootIndex(self.model.index(root_path))
+    
     def onItemClicked(self, index):
         """Xử lý khi một mục được click"""
         try:
             if not index.isValid():
                 return
             
-            item_path = normalize_path_unicode(self.model.filePath(index))
-            is_dir = self.model.isDir(index)
+            if self.model.isLoadMore(index):
+                self.model.loadMore(index)
+                return
             
-
+            modifiers = QtWidgets.QApplication.keyboardModifiers()
+            if modifiers & QtCore.Qt.ShiftModifier and self._anchor_index.isValid():
+                self.selectRange(QtCore.QModelIndex(self._anchor_index), index)
+                return
             
+            item_path = normalize_path_unicode(self.model.filePath(index))
             is_selected = self.model.isSelected(index)
             
+            # Model tự emit dataChanged cho row này - không cần refresh toàn bộ view
             if self.model.setSelected(index, not is_selected):
+                self._anchor_index = QtCore.QPersistentModelIndex(index)
                 self.itemSelected.emit(item_path, not is_selected)
-                # Force refresh toàn bộ view để đảm bảo highlight hiển thị đúng
-                self.refreshView()
             
         except Exception as e:
             print(f"Error in onItemClicked: {str(e)}")
     
+    def selectPaths(self, paths, selected=True):
+        """Chọn/bỏ chọn nhiều path, repaint một lần và emit itemsSelected"""
+        changed = self.model.setPathsSelected(paths, selected)
+        if changed:
+            self.viewport().update()
+            self.itemsSelected.emit(changed, selected)
+        return changed
+    
+    def selectRange(self, start_index, end_index, selected=True):
+        """Chọn tất cả các row đang hiển thị giữa hai index (Shift+Click)"""
+        if not start_index.isValid() or not end_index.isValid():
+            return []
+        
+        if self.visualRect(start_index).top() > self.visualRect(end_index).top():
+            start_index, end_index = end_index, start_index
+        
+        paths = []
+        current = start_index
+        while current.isValid():
+            paths.append(self.model.filePath(current))
+            if current == end_index:
+                break
+            current = self.indexBelow(current)
+        
+        return self.selectPaths(paths, selected)
+    
+    def selectChildren(self, folder_path, selected=True):
+        """Chọn/bỏ chọn tất cả item con trực tiếp của folder"""
+        return self.selectPaths(list_child_paths(folder_path, self.model.ignoreRules()), selected)
+    
+    def selectMatching(self, folder_path, pattern, selected=True):
+        """Chọn/bỏ chọn tất cả file dưới folder khớp glob pattern"""
+        return self.selectPaths(find_files_matching(folder_path, pattern, self.model.ignoreRules()), selected)
+    
+    def expandToPaths(self, target_paths, scroll_to=None, on_finished=None):
+        """
+        Expand tất cả ancestors của target_paths; khi thư mục cuối cùng load xong
+        thì scroll tới scroll_to (nếu có) và gọi on_finished
+        """
+        def finish():
+            if scroll_to:
+                index = self.model.reveal(normalize_path_unicode(scroll_to))
+                if index.isValid():
+                    self.scrollTo(index)
+            if on_finished is not None:
+                on_finished()
+        
+        self.expander.expandTo(
+            [normalize_path_unicode(path) for path in target_paths],
+            on_finished=finish
+        )
+    
     def getSelectedItems(self):
         """Lấy danh sách các item đã chọn"""
         return self.model.selectedItems()
@@ -256,7 +833,7 @@ class FileTreeView(QtWidgets.QTreeView):
         """Xóa tất cả các lựa chọn"""
         try:
             self.model.clearSelection()
-            self.viewport().update()
+            self._anchor_index = QtCore.QPersistentModelIndex()
         except Exception as e:
             print(f"Error clearing selection: {str(e)}")
     
@@ -264,7 +841,6 @@ class FileTreeView(QtWidgets.QTreeView):
         """Force refresh toàn bộ tree view"""
         try:
             self.viewport().update()
-            self.repaint()
         except Exception as e:
             print(f"Error refreshing view: {str(e)}")
     
@@ -274,66 +850,11 @@ class FileTreeView(QtWidgets.QTreeView):
             if not item_path:
                 return
             
-            normalized_path = normalize_path_unicode(item_path)
-            root_index = self.rootIndex()
-            
-            if self._deselectItemAtLevel(root_index, normalized_path):
-                return
-            
-            self._deselectItemRecursive(root_index, normalized_path)
+            self.model.setPathSelected(item_path, False)
             
         except Exception as e:
             print(f"Error deselecting item: {str(e)}")
     
-    def _deselectItemAtLevel(self, parent_index, item_path):
-        """Tìm và bỏ chọn item ở một level cụ thể"""
-        try:
-            for i in range(self.model.rowCount(parent_index)):
-                index = self.model.index(i, 0, parent_index)
-                if not index.isValid():
-                    continue
-                
-                current_path = normalize_path_unicode(self.model.filePath(index))
-                if current_path == item_path:
-                    self.model.setSelected(index, False)
-                    self.viewport().update()
-                    return True
-            
-            return False
-            
-        except Exception:
-            return False
-    
-    def _deselectItemRecursive(self, parent_index, item_path, max_depth=10):
-        """Tìm và bỏ chọn item một cách đệ quy"""
-        if max_depth <= 0:
-            return False
-        
-        try:
-            for i in range(self.model.rowCount(parent_index)):
-                index = self.model.index(i, 0, parent_index)
-                if not index.isValid():
-                    continue
-                
-                current_path = normalize_path_unicode(self.model.filePath(index))
-                if current_path == item_path:
-                    self.model.setSelected(index, False)
-                    self.viewport().update()
-                    return True
-                
-                if self.model.isDir(index) and self.model.hasChildren(index):
-                    # ONLY expand if already expanded, don't auto-expand during deselect
-                    if self.isExpanded(index):
-                        if self._deselectItemRecursive(index, item_path, max_depth - 1):
-                            return True
-            
-            return False
-            
-        except Exception:
-            return False
-    
-
-
     def keyPressEvent(self, event):
         """Override key press để xử lý an toàn"""
         try:
@@ -351,6 +872,76 @@ class FileTreeDelegate(QtWidgets.QStyledItemDelegate):
         super().__init__(parent)
         self.theme = ModernTheme()
         self.file_icons = FileTypeIcons()
+        # (state, theme key) -> dict các QBrush/QPen/QFont/QFontMetrics dùng khi paint
+        self._resource_cache = {}
+        self._theme_key = self._compute_theme_key()
+        self._checkmark_path = self._build_checkmark_path()
+    
+    def _compute_theme_key(self):
+        """Key đại diện cho theme hiện tại (màu, font, spacing)"""
+        colors = tuple(
+            (name, color.rgba()) for name, color in sorted(self.theme.COLORS.items())
+        )
+        return hash((
+            colors,
+            tuple(sorted(self.theme.FONTS.items())),
+            tuple(sorted(self.theme.SPACING.items()))
+        ))
+    
+    def invalidateResourceCache(self):
+        """Xóa cache paint resources - gọi sau khi thay đổi theme"""
+        self._resource_cache.clear()
+        self._theme_key = self._compute_theme_key()
+    
+    def _build_checkmark_path(self):
+        """Checkmark path tương đối với tâm vòng tròn"""
+        path = QtGui.QPainterPath()
+        path.moveTo(-4, 0)
+        path.lineTo(-1, 3)
+        path.lineTo(4, -2)
+        return path
+    
+    def _get_resources(self, state, is_directory):
+        """Lấy (hoặc tạo một lần) paint resources cho state và theme hiện tại"""
+        key = (state, is_directory, self._theme_key)
+        resources = self._resource_cache.get(key)
+        if resources is not None:
+            return resources
+        
+        colors = self.theme.COLORS
+        resources = {"background_brush": None, "background_pen": None}
+        
+        if state == "selected":
+            # Gradient theo bounding box của shape nên dùng lại được cho mọi row
+            gradient = QtGui.QLinearGradient(0, 0, 0, 1)
+            gradient.setCoordinateMode(QtGui.QGradient.ObjectBoundingMode)
+            selected_color = colors['selected']
+            gradient.setColorAt(0, QtGui.QColor(selected_color.red(), selected_color.green(), selected_color.blue(), 50))
+            gradient.setColorAt(1, QtGui.QColor(selected_color.red(), selected_color.green(), selected_color.blue(), 30))
+            resources["background_brush"] = QtGui.QBrush(gradient)
+            resources["background_pen"] = QtGui.QPen(colors['selected_border'], 1.5)
+        elif state == "hover":
+            resources["background_brush"] = QtGui.QBrush(colors['hover'])
+            resources["background_pen"] = QtGui.QPen(colors['surface1'], 1)
+        
+        icon_font = QtGui.QFont()
+        icon_font.setPixelSize(self.theme.FONTS['icon_size'])
+        resources["icon_font"] = icon_font
+        resources["icon_pen"] = QtGui.QPen(colors['accent_yellow'] if is_directory else colors['accent_green'])
+        
+        font = QtGui.QFont(self.theme.FONTS['family'])
+        font.setPixelSize(self.theme.FONTS['default_size'])
+        if state == "selected":
+            font.setWeight(QtGui.QFont.Medium)
+        resources["text_font"] = font
+        resources["text_metrics"] = QtGui.QFontMetrics(font)
+        resources["text_pen"] = QtGui.QPen(colors['text'])
+        
+        resources["check_brush"] = QtGui.QBrush(colors['accent_blue'])
+        resources["check_pen"] = QtGui.QPen(colors['background'], 2.5, QtCore.Qt.SolidLine, QtCore.Qt.RoundCap, QtCore.Qt.RoundJoin)
+        
+        self._resource_cache[key] = resources
+        return resources
     
     def paint(self, painter, option, index):
         """Modern paint với rounded corners và icons"""
@@ -360,77 +951,60 @@ class FileTreeDelegate(QtWidgets.QStyledItemDelegate):
                 return
             
             model = index.model()
+            if hasattr(model, 'isLoadMore') and model.isLoadMore(index):
+                self._paint_load_more(painter, option, index)
+                return
+            
             is_selected = hasattr(model, 'isSelected') and model.isSelected(index)
             is_directory = model.isDir(index)
             file_name = model.data(index, QtCore.Qt.DisplayRole)
             
+            if is_selected:
+                state = "selected"
+            elif option.state & QtWidgets.QStyle.State_MouseOver:
+                state = "hover"
+            else:
+                state = "normal"
+            resources = self._get_resources(state, is_directory)
+            
             # Setup painter
             painter.save()
             painter.setRenderHint(QtGui.QPainter.Antialiasing)
             
-            # Create rounded rect với modern spacing
-            rect = QtCore.QRectF(option.rect)
-            rect.adjust(self.theme.SPACING['small'], 2, -self.theme.SPACING['small'], -2)
-            
-            # Draw background với rounded corners
-            if is_selected:
-                # Selected state với gradient
-                gradient = QtGui.QLinearGradient(rect.topLeft(), rect.bottomLeft())
-                selected_color = self.theme.COLORS['selected']
-                gradient.setColorAt(0, QtGui.QColor(selected_color.red(), selected_color.green(), selected_color.blue(), 50))
-                gradient.setColorAt(1, QtGui.QColor(selected_color.red(), selected_color.green(), selected_color.blue(), 30))
-                
-                painter.setBrush(QtGui.QBrush(gradient))
-                painter.setPen(QtGui.QPen(self.theme.COLORS['selected_border'], 1.5))
-                painter.drawRoundedRect(rect, self.theme.SPACING['border_radius'], self.theme.SPACING['border_radius'])
-            elif option.state & QtWidgets.QStyle.State_MouseOver:
-                # Hover state
-                painter.setBrush(QtGui.QBrush(self.theme.COLORS['hover']))
-                painter.setPen(QtGui.QPen(self.theme.COLORS['surface1'], 1))
+            # Draw background với rounded corners (selected: gradient, hover: solid)
+            if resources["background_brush"] is not None:
+                rect = QtCore.QRectF(option.rect)
+                rect.adjust(self.theme.SPACING['small'], 2, -self.theme.SPACING['small'], -2)
+                painter.setBrush(resources["background_brush"])
+                painter.setPen(resources["background_pen"])
                 painter.drawRoundedRect(rect, self.theme.SPACING['border_radius'], self.theme.SPACING['border_radius'])
             
             # Setup text rect và icon rect với proper spacing
             icon_size = self.theme.SPACING['icon_size']
-            checkmark_size = self.theme.SPACING['checkmark_size']
             
             text_rect = option.rect.adjusted(40, 0, -35, 0)  # Space for icon and checkmark
             icon_rect = QtCore.QRect(option.rect.left() + 12, 
                                    option.rect.top() + (option.rect.height() - icon_size) // 2, 
                                    icon_size, icon_size)
             
-
-            
             # Draw icon using FileTypeIcons
             icon_text = self.file_icons.get_icon(file_name, is_directory)
-            icon_color = self.theme.COLORS['accent_yellow'] if is_directory else self.theme.COLORS['accent_green']
-            
-            # Draw icon with proper font
-            icon_font = QtGui.QFont()
-            icon_font.setPixelSize(self.theme.FONTS['icon_size'])
-            painter.setFont(icon_font)
-            painter.setPen(icon_color)
+            painter.setFont(resources["icon_font"])
+            painter.setPen(resources["icon_pen"])
             painter.drawText(icon_rect, QtCore.Qt.AlignCenter, icon_text)
             
             # Draw text với modern typography
-            text_color = self.theme.COLORS['text'] if not is_selected else self.theme.COLORS['text']
-            font = QtGui.QFont(self.theme.FONTS['family'])
-            font.setPixelSize(self.theme.FONTS['default_size'])
-            if is_selected:
-                font.setWeight(QtGui.QFont.Medium)
-            
-            painter.setFont(font)
-            painter.setPen(text_color)
+            painter.setFont(resources["text_font"])
+            painter.setPen(resources["text_pen"])
             
             # Truncate text if too long
-            metrics = painter.fontMetrics()
-            available_width = text_rect.width()
-            elided_text = metrics.elidedText(str(file_name), QtCore.Qt.ElideRight, available_width)
+            elided_text = resources["text_metrics"].elidedText(str(file_name), QtCore.Qt.ElideRight, text_rect.width())
             
             painter.drawText(text_rect, QtCore.Qt.AlignVCenter | QtCore.Qt.AlignLeft, elided_text)
             
             # Draw modern checkmark for selected items
             if is_selected:
-                self._draw_modern_checkmark(painter, option.rect)
+                self._draw_modern_checkmark(painter, option.rect, resources)
             
             painter.restore()
                 
@@ -440,11 +1014,33 @@ class FileTreeDelegate(QtWidgets.QStyledItemDelegate):
             except Exception:
                 pass
     
-
+    def _paint_load_more(self, painter, option, index):
+        """Vẽ row "load more": text phụ, không icon, không checkmark"""
+        resources = self._get_resources("hover" if option.state & QtWidgets.QStyle.State_MouseOver else "normal", False)
+        
+        painter.save()
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        if resources["background_brush"] is not None:
+            rect = QtCore.QRectF(option.rect)
+            rect.adjust(self.theme.SPACING['small'], 2, -self.theme.SPACING['small'], -2)
+            painter.setBrush(resources["background_brush"])
+            painter.setPen(resources["background_pen"])
+            painter.drawRoundedRect(rect, self.theme.SPACING['border_radius'], self.theme.SPACING['border_radius'])
+        
+        font = QtGui.QFont(resources["text_font"])
+        font.setItalic(True)
+        painter.setFont(font)
+        painter.setPen(self.theme.COLORS['text_secondary'])
+        text_rect = option.rect.adjusted(40, 0, -35, 0)
+        painter.drawText(text_rect, QtCore.Qt.AlignVCenter | QtCore.Qt.AlignLeft, str(index.data(QtCore.Qt.DisplayRole)))
+        painter.restore()
     
-    def _draw_modern_checkmark(self, painter, rect):
+    def _draw_modern_checkmark(self, painter, rect, resources=None):
         """Vẽ modern checkmark với style đẹp"""
         try:
+            if resources is None:
+                resources = self._get_resources("selected", False)
+            
             # Create circular background for checkmark
             check_size = self.theme.SPACING['checkmark_size']
             check_rect = QtCore.QRect(
@@ -457,27 +1053,15 @@ class FileTreeDelegate(QtWidgets.QStyledItemDelegate):
             
             # Draw circular background
             painter.setRenderHint(QtGui.QPainter.Antialiasing)
-            painter.setBrush(QtGui.QBrush(self.theme.COLORS['accent_blue']))
+            painter.setBrush(resources["check_brush"])
             painter.setPen(QtCore.Qt.NoPen)
             painter.drawEllipse(check_rect)
             
-            # Draw checkmark inside circle
-            painter.setPen(QtGui.QPen(self.theme.COLORS['background'], 2.5, QtCore.Qt.SolidLine, QtCore.Qt.RoundCap, QtCore.Qt.RoundJoin))
-            
-            # Checkmark coordinates within the circle
-            center_x = check_rect.center().x()
-            center_y = check_rect.center().y()
-            
-            # First stroke of checkmark (shorter)
-            painter.drawLine(
-                center_x - 4, center_y,
-                center_x - 1, center_y + 3
-            )
-            # Second stroke of checkmark (longer)
-            painter.drawLine(
-                center_x - 1, center_y + 3,
-                center_x + 4, center_y - 2
-            )
+            # Draw checkmark inside circle (path dựng sẵn, dịch về tâm)
+            painter.setBrush(QtCore.Qt.NoBrush)
+            painter.setPen(resources["check_pen"])
+            painter.translate(check_rect.center())
+            painter.drawPath(self._checkmark_path)
             
             painter.restore()
             
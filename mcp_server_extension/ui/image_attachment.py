@@ -17,6 +17,8 @@ from .styles import (
     get_image_remove_button_stylesheet,
 )
 from ..utils.translations import get_translation
+from ..utils.tracing import span
+from ..utils.image_handles import file_handle, get_image_registry
 from .image_viewer import ImageViewerDialog
 
 class DragDropImageWidget(QtWidgets.QWidget):
@@ -140,11 +142,15 @@ class DragDropImageWidget(QtWidgets.QWidget):
 class ImageAttachmentWidget(QtWidgets.QWidget):
     """Widget đính kèm hình ảnh với đầy đủ chức năng"""
     
-    def __init__(self, parent=None, language="en", translations=None, config_manager=None):
+    def __init__(self, parent=None, language="en", translations=None, config_manager=None,
+                 session_store=None, workspace_path=None):
         super().__init__(parent)
         self.language = language
         self.translations = translations or {}
         self.config_manager = config_manager
+        # Image references được lưu theo workspace (SessionStore), không lưu global trong config
+        self.session_store = session_store
+        self.workspace_path = workspace_path
         
         # Danh sách hình ảnh đính kèm
         self.attached_images = []
@@ -152,8 +158,8 @@ class ImageAttachmentWidget(QtWidgets.QWidget):
         # Setup UI
         self.init_ui()
         
-        # Restore images from config after UI is ready
-        QtCore.QTimer.singleShot(100, self.restore_images_from_config)
+        # Restore images of the workspace after UI is ready
+        QtCore.QTimer.singleShot(100, self.restore_images_from_session)
     
     def _get_translation(self, key):
         """Lấy bản dịch cho key dựa trên ngôn ngữ hiện tại"""
@@ -282,11 +288,14 @@ class ImageAttachmentWidget(QtWidgets.QWidget):
     
     def image_to_base64(self, image_path):
         """Convert image file to base64 string"""
-        try:
-            with open(image_path, 'rb') as img_file:
-                return base64.b64encode(img_file.read()).decode('utf-8')
-        except Exception as e:
-            return None
+        with span("image.encode") as encode_span:
+            try:
+                with open(image_path, 'rb') as img_file:
+                    data = img_file.read()
+                encode_span.set_attribute("image.bytes", len(data))
+                return base64.b64encode(data).decode('utf-8')
+            except Exception as e:
+                return None
     
     def get_image_media_type(self, image_path):
         """Get MIME type for image file"""
@@ -431,9 +440,9 @@ class ImageAttachmentWidget(QtWidgets.QWidget):
             # Update UI safely
             QtCore.QTimer.singleShot(0, self.update_image_ui)
             
-            # Save updated config if saving is enabled
+            # Save updated image references if saving is enabled
             if hasattr(self, 'save_images_checkbox') and self.save_images_checkbox.isChecked():
-                QtCore.QTimer.singleShot(100, self.save_images_to_config)
+                QtCore.QTimer.singleShot(100, self.save_images_to_session)
             
         except Exception as e:
             # Ensure UI is updated even if removal fails
@@ -472,13 +481,7 @@ class ImageAttachmentWidget(QtWidgets.QWidget):
             
             # Only clear UI if all database operations succeeded
             if successful_removals == total_images:
-                # Remove all preview widgets from layout
-                while self.image_preview_layout.count() > 0:
-                    item = self.image_preview_layout.takeAt(0)
-                    if item.widget():
-                        item.widget().setParent(None)
-                        
-
+                self._clear_image_previews()
             
             # Hide loading state
             self._hide_loading_state()
@@ -486,9 +489,16 @@ class ImageAttachmentWidget(QtWidgets.QWidget):
             # Update UI
             self.update_image_ui()
             
-            # Save updated config
+            # Save updated image references
             if hasattr(self, 'save_images_checkbox') and self.save_images_checkbox.isChecked():
-                self.save_images_to_config()
+                self.save_images_to_session()
+    
+    def _clear_image_previews(self):
+        """Remove all preview widgets from layout"""
+        while self.image_preview_layout.count() > 0:
+            item = self.image_preview_layout.takeAt(0)
+            if item.widget():
+                item.widget().setParent(None)
     
     def handle_dropped_images(self, image_paths):
         """Xử lý khi có hình ảnh được drop vào widget với detailed feedback"""
@@ -616,30 +626,81 @@ class ImageAttachmentWidget(QtWidgets.QWidget):
         """Return list of attached images"""
         return self.attached_images
     
-    def save_images_to_config(self):
-        """Save attached images to config if checkbox is checked"""
-        if self.config_manager and hasattr(self, 'save_images_checkbox'):
-            if self.save_images_checkbox.isChecked():
-                # Save database image metadata
-                image_data = []
-                for img in self.attached_images:
-                    # SECURITY: Only store database-relative information, no external paths
-                    image_data.append({
-                        "db_path": img.get("path"),
-                        "filename": img.get("filename"),
-                        "media_type": img.get("media_type", "image/png"),
-                        "source_type": img.get("source_type", "attached"),
-                        "db_filename": img.get("db_filename"),
-                        "relative_db_path": img.get("relative_db_path", os.path.basename(img.get("path", "")))
-                    })
-                
-                self.config_manager.set('last_attached_images', image_data)
-            else:
-                # Clear saved images if checkbox unchecked and clean database
-                self.config_manager.set('last_attached_images', [])
-                self._cleanup_all_database_images()
-                
-            self.config_manager.save_config()
+    def take_image_handles(self):
+        """
+        Image dict (handle, media_type, filename) để gửi trong response
+        
+        Reference của handle chuyển sang response (HandleImage release khi serialize xong),
+        widget không giữ handle của các ảnh này nữa.
+        """
+        images = []
+        for img in self.attached_images:
+            handle = img.pop("handle", None)
+            if handle:
+                images.append({
+                    "handle": handle,
+                    "media_type": img.get("media_type", "image/png"),
+                    "filename": img.get("filename", "image.png")
+                })
+        return images
+    
+    def release_image_handles(self):
+        """Release reference của các ảnh chưa gửi (dialog đóng)"""
+        for img in self.attached_images:
+            self._release_image_handle(img)
+    
+    @staticmethod
+    def _release_image_handle(img):
+        handle = img.pop("handle", None)
+        if handle:
+            get_image_registry().release(handle)
+    
+    def save_images_to_session(self):
+        """Lưu image references của workspace hiện tại vào session store nếu checkbox được chọn"""
+        if not hasattr(self, 'save_images_checkbox'):
+            return
+        if self.save_images_checkbox.isChecked():
+            image_refs = self._image_refs()
+        else:
+            # Clear saved images if checkbox unchecked and clean database
+            image_refs = []
+            self._cleanup_all_database_images()
+        
+        if self.session_store and self.workspace_path:
+            self.session_store.set_images(self.workspace_path, image_refs)
+            self.session_store.flush()
+    
+    def _image_refs(self):
+        """Metadata của các ảnh đính kèm để lưu (chỉ thông tin trong user_images)"""
+        image_refs = []
+        for img in self.attached_images:
+            # SECURITY: Only store database-relative information, no external paths
+            image_refs.append({
+                "db_path": img.get("path"),
+                "filename": img.get("filename"),
+                "media_type": img.get("media_type", "image/png"),
+                "source_type": img.get("source_type", "attached"),
+                "db_filename": img.get("db_filename"),
+                "relative_db_path": img.get("relative_db_path", os.path.basename(img.get("path", "")))
+            })
+        return image_refs
+    
+    def set_workspace(self, workspace_path):
+        """
+        Đổi workspace: lưu ảnh của workspace cũ rồi hiển thị ảnh đã lưu của workspace mới
+        
+        Args:
+            workspace_path (str): Workspace root (None: không lưu/khôi phục ảnh)
+        """
+        if workspace_path == self.workspace_path:
+            return
+        self.save_images_to_session()
+        self.release_image_handles()
+        self.attached_images = []
+        self._clear_image_previews()
+        self.workspace_path = workspace_path
+        self.restore_images_from_session()
+        self.update_image_ui()
     
     def _cleanup_all_database_images(self):
         """Clean up all images in database when save is disabled"""
@@ -648,9 +709,8 @@ class ImageAttachmentWidget(QtWidgets.QWidget):
             if os.path.exists(user_images_dir):
                 for filename in os.listdir(user_images_dir):
                     if filename.startswith(("pasted_", "attached_", "dropped_")):
-                        file_path = os.path.join(user_images_dir, filename)
-                        os.remove(file_path)
-                        pass
+                        # Ảnh còn được response chưa serialize tham chiếu thì xóa sau lần release cuối
+                        get_image_registry().remove_file(os.path.join(user_images_dir, filename))
         except Exception as e:
             pass
     
@@ -677,9 +737,7 @@ class ImageAttachmentWidget(QtWidgets.QWidget):
                 # Only remove pasted image files, not all files
                 for filename in os.listdir(user_images_dir):
                     if filename.startswith("pasted_"):
-                        file_path = os.path.join(user_images_dir, filename)
-                        os.remove(file_path)
-                        pass
+                        get_image_registry().remove_file(os.path.join(user_images_dir, filename))
         except Exception as e:
             pass
     
@@ -727,9 +785,9 @@ class ImageAttachmentWidget(QtWidgets.QWidget):
                 self._hide_loading_state()
                 return False
             
-            # Convert to base64 from database copy
-            base64_data = self.image_to_base64(db_path)
-            if not base64_data:
+            # Handle tới bản copy trong database - bytes chỉ được đọc khi serialize response
+            handle = file_handle(db_path)
+            if not handle:
                 # Clean up failed copy
                 if os.path.exists(db_path):
                     os.remove(db_path)
@@ -740,7 +798,7 @@ class ImageAttachmentWidget(QtWidgets.QWidget):
             image_info = {
                 "path": db_path,  # Database path (only within user_images)
                 "filename": original_filename,  # Original filename for display
-                "base64_data": base64_data,
+                "handle": handle,
                 "media_type": self.get_image_media_type(db_path),
                 "source_type": source_type,
                 "db_filename": db_filename,  # For database management (relative)
@@ -768,20 +826,22 @@ class ImageAttachmentWidget(QtWidgets.QWidget):
             self._show_loading_state("Removing image...")
             
             # Remove from attached_images first
-            original_count = len(self.attached_images)
+            removed = [img for img in self.attached_images if img.get('path') == db_path]
             self.attached_images = [img for img in self.attached_images if img.get('path') != db_path]
             
             # Verify removal from memory
-            if len(self.attached_images) == original_count:
+            if not removed:
                 self._hide_loading_state()
                 return False
             
+            # Trả reference mà handle giữ từ lúc đính kèm
+            for img in removed:
+                self._release_image_handle(img)
+            
             # Remove physical file from database
             if os.path.exists(db_path) and "user_images" in db_path:
-                os.remove(db_path)
-                
-                # Verify file is actually removed
-                if os.path.exists(db_path):
+                # Response chưa serialize còn giữ handle thì file bị xóa sau lần release cuối
+                if get_image_registry().remove_file(db_path) and os.path.exists(db_path):
                     self._hide_loading_state()
                     return False
             
@@ -832,25 +892,22 @@ class ImageAttachmentWidget(QtWidgets.QWidget):
         # This method is now handled by _remove_image_from_database
         pass
 
-    def restore_images_from_config(self):
-        """Restore images from config"""
-        if not self.config_manager:
+    def restore_images_from_session(self):
+        """Restore image references đã lưu của workspace hiện tại từ session store"""
+        if not self.session_store or not self.workspace_path:
             return
             
-        saved_images = self.config_manager.get('last_attached_images', [])
+        saved_images = self.session_store.get_images(self.workspace_path)
         
         if not saved_images:
             return
             
-        # Load saved checkbox state - default to True if not set
-        save_enabled = self.config_manager.get('ui_preferences.save_images_enabled', True)
-        
-        if hasattr(self, 'save_images_checkbox'):
-            self.save_images_checkbox.setChecked(save_enabled)
-            
-        # Only restore if save is enabled
-        if not save_enabled:
+        # Only restore if save is enabled (checkbox state loaded from config in init_ui)
+        if not self.save_images_checkbox.isChecked():
             return
+        
+        # Ảnh đã được khôi phục (set_workspace trước lần restore hẹn giờ trong __init__)
+        attached_paths = {img.get("path") for img in self.attached_images}
             
         # Show loading for restore operation
         self._show_loading_state(f"Restoring {len(saved_images)} images...")
@@ -861,16 +918,15 @@ class ImageAttachmentWidget(QtWidgets.QWidget):
         for i, img_data in enumerate(saved_images):
             db_path = img_data.get("db_path")
             
-            if db_path and os.path.exists(db_path):
+            if db_path and db_path not in attached_paths and os.path.exists(db_path):
                 try:
-                    # Convert to base64 from database
-                    base64_data = self.image_to_base64(db_path)
-                    if base64_data:
+                    handle = file_handle(db_path)
+                    if handle:
                         # Restore full image info - SECURITY: No external paths stored
                         image_info = {
                             "path": db_path,
                             "filename": img_data.get("filename", Path(db_path).name),
-                            "base64_data": base64_data,
+                            "handle": handle,
                             "media_type": img_data.get("media_type", "image/png"),
                             "source_type": img_data.get("source_type", "attached"),
                             "db_filename": img_data.get("db_filename"),
@@ -907,7 +963,7 @@ class ImageAttachmentWidget(QtWidgets.QWidget):
                 # Save checkbox state immediately when changed
                 is_checked = state == QtCore.Qt.Checked
                 self.config_manager.set('ui_preferences.save_images_enabled', is_checked)
-                self.config_manager.save_config()
+                self.config_manager.request_save()
                 
                 # If checkbox is unchecked, clean database immediately
                 if not is_checked:
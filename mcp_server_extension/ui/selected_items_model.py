@@ -0,0 +1,259 @@
+# Selected items model for AI extension Tool
+from PyQt5 import QtCore, QtGui
+
+
+PathRole = QtCore.Qt.UserRole
+MissingRole = QtCore.Qt.UserRole + 1
+RecordRole = QtCore.Qt.UserRole + 2
+
+MISSING_PREFIX = "⚠️ "
+MISSING_COLOR = QtGui.QColor(127, 132, 156)
+
+
+class SelectedItemsModel(QtCore.QAbstractListModel):
+    """
+    Model danh sách items đã chọn, giữ thứ tự chèn.
+    Lookup/thêm theo path là O(1), xóa một batch là một lượt O(n);
+    cache thứ tự row được build lại lazily.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # relative_path -> {"display_name", "tooltip", "missing", "record"}
+        # "record" là typed record của item (type, size, mtime, is_symlink...)
+        self._records = {}
+        # Cache thứ tự row, None khi cần build lại
+        self._order = None
+        self._rows = None
+
+    def _ensure_order(self):
+        """Build lại cache thứ tự row nếu đã bị invalidate"""
+        if self._order is None:
+            self._order = list(self._records)
+            self._rows = None
+        if self._rows is None:
+            self._rows = {path: row for row, path in enumerate(self._order)}
+
+    def _invalidate_order(self):
+        self._order = None
+        self._rows = None
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._records)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        self._ensure_order()
+        row = index.row()
+        if row < 0 or row >= len(self._order):
+            return None
+
+        path = self._order[row]
+        record = self._records[path]
+
+        if role == QtCore.Qt.DisplayRole:
+            if record["missing"]:
+                return MISSING_PREFIX + record["display_name"]
+            return record["display_name"]
+        if role == QtCore.Qt.ToolTipRole:
+            return record["tooltip"]
+        if role == QtCore.Qt.ForegroundRole and record["missing"]:
+            return MISSING_COLOR
+        if role == PathRole:
+            return path
+        if role == MissingRole:
+            return record["missing"]
+        if role == RecordRole:
+            return record["record"]
+        return None
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, path):
+        return path in self._records
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def paths(self):
+        """Trả về danh sách relative paths theo thứ tự hiển thị"""
+        return list(self._records)
+
+    def path_at(self, row):
+        """Lấy relative path tại row, None nếu row không hợp lệ"""
+        self._ensure_order()
+        if 0 <= row < len(self._order):
+            return self._order[row]
+        return None
+
+    def row_of(self, path):
+        """Lấy row của path, -1 nếu không có"""
+        if path not in self._records:
+            return -1
+        self._ensure_order()
+        return self._rows[path]
+
+    def record(self, path):
+        """Typed record của item (None nếu không có)"""
+        entry = self._records.get(path)
+        return entry["record"] if entry else None
+
+    def records(self, include_missing=False):
+        """Danh sách typed records theo thứ tự hiển thị"""
+        return [
+            entry["record"] for entry in self._records.values()
+            if include_missing or not entry["missing"]
+        ]
+
+    def add(self, path, display_name, tooltip="", record=None):
+        """Thêm một item, trả về False nếu đã tồn tại"""
+        return self.add_many([(path, display_name, tooltip, record)]) == 1
+
+    def add_many(self, entries):
+        """
+        Thêm nhiều items (path, display_name, tooltip, record) trong một lần
+        beginInsertRows. Bỏ qua path đã tồn tại. Trả về số items được thêm.
+        """
+        new_entries = []
+        seen = set()
+        for path, display_name, tooltip, record in entries:
+            if path in self._records or path in seen:
+                continue
+            seen.add(path)
+            new_entries.append((path, display_name, tooltip, record))
+
+        if not new_entries:
+            return 0
+
+        first_row = len(self._records)
+        self.beginInsertRows(QtCore.QModelIndex(), first_row, first_row + len(new_entries) - 1)
+        for path, display_name, tooltip, record in new_entries:
+            self._records[path] = {
+                "display_name": display_name,
+                "tooltip": tooltip,
+                "missing": False,
+                "record": record or {"relative_path": path}
+            }
+            if self._order is not None:
+                if self._rows is not None:
+                    self._rows[path] = len(self._order)
+                self._order.append(path)
+        self.endInsertRows()
+        return len(new_entries)
+
+    def is_missing(self, path):
+        """Kiểm tra item có bị đánh dấu không còn tồn tại trên disk"""
+        record = self._records.get(path)
+        return bool(record and record["missing"])
+
+    def set_missing(self, paths, missing=True):
+        """
+        Đánh dấu các items không còn tồn tại trên disk.
+        Chỉ emit một dataChanged bao trùm các row bị thay đổi.
+        """
+        changed_rows = []
+        for path in paths:
+            record = self._records.get(path)
+            if record is not None and record["missing"] != missing:
+                record["missing"] = missing
+                changed_rows.append(self.row_of(path))
+
+        if changed_rows:
+            self.dataChanged.emit(
+                self.index(min(changed_rows)),
+                self.index(max(changed_rows)),
+                [QtCore.Qt.DisplayRole, QtCore.Qt.ForegroundRole, MissingRole]
+            )
+        return len(changed_rows)
+
+    def update_records(self, updates, missing_paths=()):
+        """
+        Cập nhật display name và record của nhiều items ({path: (display_name, record)})
+        và đánh dấu các items trong missing_paths không còn tồn tại trên disk.
+        Chỉ emit một dataChanged bao trùm các row bị thay đổi.
+        """
+        changed_rows = []
+        roles = []
+        for path, (display_name, record) in updates.items():
+            entry = self._records.get(path)
+            if entry is None:
+                continue
+            entry["display_name"] = display_name
+            entry["record"] = record
+            changed_rows.append(self.row_of(path))
+        if changed_rows:
+            roles += [QtCore.Qt.DisplayRole, RecordRole]
+
+        missing_count = 0
+        for path in missing_paths:
+            entry = self._records.get(path)
+            if entry is not None and not entry["missing"]:
+                entry["missing"] = True
+                changed_rows.append(self.row_of(path))
+                missing_count += 1
+        if missing_count:
+            roles += [QtCore.Qt.ForegroundRole, MissingRole]
+            if QtCore.Qt.DisplayRole not in roles:
+                roles.append(QtCore.Qt.DisplayRole)
+
+        if changed_rows:
+            self.dataChanged.emit(
+                self.index(min(changed_rows)),
+                self.index(max(changed_rows)),
+                roles
+            )
+        return len(changed_rows)
+
+    def remove(self, path):
+        """Xóa một item theo path, trả về False nếu không có"""
+        return bool(self.remove_many([path]))
+
+    def remove_many(self, paths):
+        """
+        Xóa nhiều items theo path. Các row liên tiếp được gộp thành một
+        lần beginRemoveRows. Trả về danh sách paths đã xóa.
+        """
+        targets = {path for path in paths if path in self._records}
+        if not targets:
+            return []
+
+        self._ensure_order()
+        rows = sorted((self._rows[path] for path in targets), reverse=True)
+
+        # Gộp các row liên tiếp, xóa từ cuối lên để row phía trước không bị dịch
+        removed = []
+        run_end = run_start = rows[0]
+        for row in rows[1:] + [None]:
+            if row is not None and row == run_start - 1:
+                run_start = row
+                continue
+            self.beginRemoveRows(QtCore.QModelIndex(), run_start, run_end)
+            for path in self._order[run_start:run_end + 1]:
+                del self._records[path]
+                removed.append(path)
+            del self._order[run_start:run_end + 1]
+            self._rows = None
+            self.endRemoveRows()
+            if row is not None:
+                run_end = run_start = row
+
+        return removed
+
+    def remove_rows(self, rows):
+        """Xóa items theo danh sách row, trả về danh sách paths đã xóa"""
+        self._ensure_order()
+        paths = [self._order[row] for row in rows if 0 <= row < len(self._order)]
+        return self.remove_many(paths)
+
+    def clear(self):
+        """Xóa tất cả items"""
+        if not self._records:
+            return
+        self.beginResetModel()
+        self._records.clear()
+        self._invalidate_order()
+        self.endResetModel()
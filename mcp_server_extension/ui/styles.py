@@ -310,6 +310,9 @@ class FileTypeIcons:
         'xz': 'archive',
     }
     
+    # Memo extension -> icon, filled lazily by get_icon
+    _extension_icon_cache = {}
+    
     @classmethod
     def get_icon(cls, filename, is_directory=False):
         """Get appropriate icon for file or directory"""
@@ -319,9 +322,13 @@ class FileTypeIcons:
         if not filename or '.' not in filename:
             return cls.ICONS['file']
         
-        extension = filename.lower().split('.')[-1]
-        icon_type = cls.EXTENSION_MAP.get(extension, 'file')
-        return cls.ICONS.get(icon_type, cls.ICONS['file'])
+        extension = filename.rpartition('.')[2]
+        icon = cls._extension_icon_cache.get(extension)
+        if icon is None:
+            icon_type = cls.EXTENSION_MAP.get(extension.lower(), 'file')
+            icon = cls.ICONS.get(icon_type, cls.ICONS['file'])
+            cls._extension_icon_cache[extension] = icon
+        return icon
 
 # Legacy functions for backward compatibility
 def get_main_stylesheet():
@@ -538,7 +545,7 @@ def get_file_placeholder_stylesheet():
 def get_file_list_stylesheet():
     """Get file list stylesheet"""
     return """
-        QListWidget {
+        QListView {
             background-color: #2d2d2d;
             color: #ffffff;
             border: none;
@@ -547,18 +554,18 @@ def get_file_list_stylesheet():
             font-size: 14px;
         }
         
-        QListWidget::item {
+        QListView::item {
             background-color: #2d2d2d;
             color: #ffffff;
             border-radius: 2px;
             padding: 4px;
         }
         
-        QListWidget::item:selected {
+        QListView::item:selected {
             background-color: #264f78;
         }
         
-        QListWidget::item:hover {
+        QListView::item:hover {
             background-color: #3d3d3d;
         }
         """ 
@@ -0,0 +1,210 @@
+# Background workers for AI extension Tool
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5 import QtCore
+from ..constants import VALIDATION_WORKERS, VALIDATION_CHUNK_SIZE
+from ..utils.file_utils import validate_file_paths_in_workspace, normalize_path_unicode
+from ..utils.name_index import build_name_index
+from ..utils.log import get_logger
+
+validation_logger = get_logger("PathValidationWorker")
+scan_logger = get_logger("DirectoryScanWorker")
+index_logger = get_logger("NameIndexWorker")
+filter_logger = get_logger("NameFilterWorker")
+
+_DIGITS_RE = re.compile(r'(\d+)')
+
+
+class PathValidationSignals(QtCore.QObject):
+    """Signals của PathValidationWorker (QRunnable không phải QObject)"""
+    # (generation, results theo đúng thứ tự paths)
+    finished = QtCore.pyqtSignal(int, list)
+
+
+class PathValidationWorker(QtCore.QRunnable):
+    """
+    Validate một batch path trong workspace ở background thread.
+    Các chunk được stat song song; kết quả trả về một lần qua signals.finished.
+    """
+    def __init__(self, generation, paths, workspace_path):
+        super().__init__()
+        self.generation = generation
+        self.paths = list(paths)
+        self.workspace_path = workspace_path
+        self.signals = PathValidationSignals()
+
+    def _validate_chunk(self, chunk):
+        return validate_file_paths_in_workspace(chunk, self.workspace_path)
+
+    def run(self):
+        results = []
+        try:
+            chunks = [
+                self.paths[start:start + VALIDATION_CHUNK_SIZE]
+                for start in range(0, len(self.paths), VALIDATION_CHUNK_SIZE)
+            ]
+            if len(chunks) <= 1:
+                results = self._validate_chunk(self.paths)
+            else:
+                with ThreadPoolExecutor(max_workers=min(VALIDATION_WORKERS, len(chunks))) as executor:
+                    for chunk_results in executor.map(self._validate_chunk, chunks):
+                        results.extend(chunk_results)
+        except Exception as e:
+            validation_logger.error(f"Lỗi khi validate paths: {str(e)}")
+            results = []
+
+        self.signals.finished.emit(self.generation, results)
+
+
+def start_path_validation(generation, paths, workspace_path, on_finished):
+    """
+    Tạo và chạy PathValidationWorker trên QThreadPool global
+
+    Returns:
+        PathValidationWorker: worker đã start (giữ reference để signals sống đến khi xong)
+    """
+    worker = PathValidationWorker(generation, paths, workspace_path)
+    worker.signals.finished.connect(on_finished)
+    QtCore.QThreadPool.globalInstance().start(worker)
+    return worker
+
+
+def _pad_digits(match):
+    digits = match.group()
+    return f"{len(digits):03d}{digits}"
+
+
+def _natural_sort_key(entry):
+    """
+    Thư mục trước, sau đó theo tên tự nhiên không phân biệt hoa thường (file2 < file10).
+    Key là một chuỗi phẳng (số được prefix bằng độ dài) để phần so sánh của sort
+    nhanh - so sánh list lồng nhau giữ GIL đủ lâu để làm UI thread bị khựng.
+    """
+    name, is_dir = entry
+    return ("0" if is_dir else "1") + _DIGITS_RE.sub(_pad_digits, name.casefold())
+
+
+class DirectoryScanSignals(QtCore.QObject):
+    """Signals của DirectoryScanWorker"""
+    # (generation, directory path, [(name, is_dir), ...] đã sắp xếp, hoặc None nếu bị hủy)
+    finished = QtCore.pyqtSignal(int, str, object)
+
+
+class DirectoryScanWorker(QtCore.QRunnable):
+    """
+    Liệt kê một thư mục bằng os.scandir ở background thread.
+    Bỏ qua hidden entries (giống QDir filter cũ) và entries bị ignore_rules loại,
+    dừng sớm khi is_cancelled() trả về True (vẫn emit finished với entries None
+    để bên gọi bỏ worker khỏi danh sách đang chạy).
+    """
+    def __init__(self, generation, path, is_cancelled, ignore_rules=None):
+        super().__init__()
+        self.generation = generation
+        self.path = path
+        self.is_cancelled = is_cancelled
+        self.ignore_rules = ignore_rules
+        self.signals = DirectoryScanSignals()
+
+    def run(self):
+        entries = []
+        try:
+            with os.scandir(self.path) as iterator:
+                for entry in iterator:
+                    if self.is_cancelled():
+                        self.signals.finished.emit(self.generation, self.path, None)
+                        return
+                    if entry.name.startswith('.'):
+                        continue
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    entries.append((normalize_path_unicode(entry.name), is_dir))
+        except FileNotFoundError:
+            # Thư mục đã bị xóa (hoặc prefetch một path không tồn tại) - coi như rỗng
+            pass
+        except OSError as e:
+            scan_logger.warning(f"Không thể đọc thư mục {self.path}: {str(e)}")
+
+        if self.is_cancelled():
+            self.signals.finished.emit(self.generation, self.path, None)
+            return
+        if self.ignore_rules is not None:
+            entries = self.ignore_rules.filter_entries(self.path, entries)
+        entries.sort(key=_natural_sort_key)
+        self.signals.finished.emit(self.generation, self.path, entries)
+
+
+def start_directory_scan(generation, path, is_cancelled, on_finished, ignore_rules=None):
+    """
+    Tạo và chạy DirectoryScanWorker trên QThreadPool global
+
+    Returns:
+        DirectoryScanWorker: worker đã start
+    """
+    worker = DirectoryScanWorker(generation, path, is_cancelled, ignore_rules)
+    worker.signals.finished.connect(on_finished)
+    QtCore.QThreadPool.globalInstance().start(worker)
+    return worker
+
+
+class NameIndexSignals(QtCore.QObject):
+    """Signals của NameIndexWorker và NameFilterWorker"""
+    # (generation, NameIndex hoặc None nếu bị hủy)
+    indexed = QtCore.pyqtSignal(int, object)
+    # (generation, query, (matches, visible set))
+    filtered = QtCore.pyqtSignal(int, str, object)
+
+
+class NameIndexWorker(QtCore.QRunnable):
+    """Build NameIndex của workspace ở background thread"""
+    def __init__(self, generation, root_path, ignore_rules, is_cancelled):
+        super().__init__()
+        self.generation = generation
+        self.root_path = root_path
+        self.ignore_rules = ignore_rules
+        self.is_cancelled = is_cancelled
+        self.signals = NameIndexSignals()
+
+    def run(self):
+        index = None
+        try:
+            index = build_name_index(self.root_path, self.ignore_rules, self.is_cancelled)
+        except Exception as e:
+            index_logger.error(f"Lỗi khi build name index: {str(e)}")
+        self.signals.indexed.emit(self.generation, index)
+
+
+class NameFilterWorker(QtCore.QRunnable):
+    """So khớp query với NameIndex ở background thread"""
+    def __init__(self, generation, index, query):
+        super().__init__()
+        self.generation = generation
+        self.index = index
+        self.query = query
+        self.signals = NameIndexSignals()
+
+    def run(self):
+        try:
+            result = self.index.match(self.query)
+        except Exception as e:
+            filter_logger.error(f"Lỗi khi lọc: {str(e)}")
+            result = ([], set())
+        self.signals.filtered.emit(self.generation, self.query, result)
+
+
+def start_name_index(generation, root_path, ignore_rules, is_cancelled, on_finished):
+    """Tạo và chạy NameIndexWorker trên QThreadPool global"""
+    worker = NameIndexWorker(generation, root_path, ignore_rules, is_cancelled)
+    worker.signals.indexed.connect(on_finished)
+    QtCore.QThreadPool.globalInstance().start(worker)
+    return worker
+
+
+def start_name_filter(generation, index, query, on_finished):
+    """Tạo và chạy NameFilterWorker trên QThreadPool global"""
+    worker = NameFilterWorker(generation, index, query)
+    worker.signals.filtered.connect(on_finished)
+    QtCore.QThreadPool.globalInstance().start(worker)
+    return worker
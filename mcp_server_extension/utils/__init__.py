@@ -3,33 +3,73 @@
 
 from .translations import get_translations
 from .file_utils import read_file_content, validate_file_path
-from .image_processing import process_images, validate_image_data, get_image_info
+from .image_processing import process_images, iter_process_images, validate_image_data, get_image_info
+from .image_handles import HandleImage, file_handle, get_image_registry
 from .mcp_config import (
     MCPConfigManager, 
     get_mcp_server_config, 
     setup_mcp_config, 
     get_server_command,
-    mcp_config_manager
+    get_mcp_config_manager
 )
+from .tracing import span, traced, configure_tracing, disable_tracing
+from .memory_profiler import configure_memory_profiling, disable_memory_profiling, memory_report
+from .metrics import MetricsRegistry, get_metrics
+from .log import get_logger, configure_logging
 from .mcp_client import (
     MCPClient,
+    AsyncMCPClient,
+    MCPServerPool,
+    get_server_pool,
     test_mcp_connection,
+    test_mcp_pipelined_requests,
     call_AI_EXTENSION_tool_via_mcp
 )
+from .vscode_bridge import VSCodeBridge, BridgeError, get_vscode_bridge
 
 __all__ = [
     'get_translations', 
     'read_file_content', 
     'validate_file_path',
     'process_images',
+    'iter_process_images',
     'validate_image_data', 
     'get_image_info',
+    'HandleImage',
+    'file_handle',
+    'get_image_registry',
     'MCPConfigManager',
     'get_mcp_server_config',
     'setup_mcp_config',
     'get_server_command',
+    'get_mcp_config_manager',
+    'span',
+    'traced',
+    'configure_tracing',
+    'disable_tracing',
+    'configure_memory_profiling',
+    'disable_memory_profiling',
+    'memory_report',
+    'MetricsRegistry',
+    'get_metrics',
+    'get_logger',
+    'configure_logging',
     'mcp_config_manager',
     'MCPClient',
+    'AsyncMCPClient',
+    'MCPServerPool',
+    'get_server_pool',
     'test_mcp_connection',
-    'call_AI_EXTENSION_tool_via_mcp'
-] 
\ No newline at end of file
+    'test_mcp_pipelined_requests',
+    'call_AI_EXTENSION_tool_via_mcp',
+    'VSCodeBridge',
+    'BridgeError',
+    'get_vscode_bridge'
+] 
+
+
+def __getattr__(name):
+    # mcp_config_manager được tạo lazily khi truy cập lần đầu
+    if name == 'mcp_config_manager':
+        return get_mcp_config_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,12 +1,22 @@
 # File utilities for AI extension Tool
 import os
 import sys
+import fnmatch
 import unicodedata
 import re
 import stat
 import time
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
-from ..constants import SUPPORTED_ENCODINGS
+from ..constants import (
+    SUPPORTED_ENCODINGS,
+    NORMALIZE_CACHE_SIZE,
+    STAT_CACHE_TTL,
+    STAT_CACHE_MAX_ENTRIES
+)
+from .metrics import get_metrics
 
 # Try to import size limits, but use None if not defined (no limits)
 try:
@@ -15,18 +25,107 @@ except ImportError:
     MAX_FILE_SIZE_MB = None
     MAX_ATTACHMENT_SIZE_MB = None
 
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_path_cached(path_str):
+    """NFC + lọc ký tự điều khiển, kết quả được memo hóa theo chuỗi đầu vào"""
+    # Fast path: ASCII in được thì NFC và bộ lọc đều không đổi gì
+    if path_str.isascii() and path_str.isprintable():
+        return path_str
+    
+    normalized = unicodedata.normalize('NFC', path_str)
+    return ''.join(char for char in normalized if ord(char) >= 32 or char in '\t\n\r')
+
 def normalize_path_unicode(path):
     """Chuẩn hóa path với Unicode normalization"""
     if not path:
         return ""
     
     try:
-        normalized = unicodedata.normalize('NFC', str(path))
-        cleaned = ''.join(char for char in normalized if ord(char) >= 32 or char in '\t\n\r')
-        return cleaned
+        return _normalize_path_cached(str(path))
     except Exception:
         return str(path)
 
+def _probe_path(path):
+    """Một lần lstat/stat/access cho path, trả về None nếu path không tồn tại"""
+    try:
+        lstat_info = os.lstat(path)
+    except (OSError, ValueError):
+        return None
+    
+    is_symlink = stat.S_ISLNK(lstat_info.st_mode)
+    if is_symlink:
+        try:
+            stat_info = os.stat(path)
+        except (OSError, ValueError):
+            # Symlink hỏng - os.path.exists() cũng trả về False
+            return None
+    else:
+        stat_info = lstat_info
+    
+    return {
+        "stat": stat_info,
+        "is_file": stat.S_ISREG(stat_info.st_mode),
+        "is_dir": stat.S_ISDIR(stat_info.st_mode),
+        "is_symlink": is_symlink,
+        "readable": os.access(path, os.R_OK)
+    }
+
+class _StatCache:
+    """Cache kết quả stat với TTL ngắn, giới hạn số entry theo LRU"""
+    
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, path):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        
+        # Probe ngoài lock để các thread khác không phải chờ I/O
+        info = _probe_path(path)
+        
+        with self._lock:
+            self._entries[path] = (now + self.ttl, info)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return info
+    
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
+
+_stat_cache = _StatCache(STAT_CACHE_TTL, STAT_CACHE_MAX_ENTRIES)
+
+get_metrics().register_cache("stat", lambda: (_stat_cache.hits, _stat_cache.misses))
+get_metrics().register_cache("normalize_path", lambda: _normalize_path_cached.cache_info()[:2])
+
+def get_path_stat(path):
+    """
+    Lấy thông tin stat (có cache TTL) cho path đã chuẩn hóa
+    
+    Returns:
+        dict với stat, is_file, is_dir, is_symlink, readable hoặc None nếu không tồn tại
+    """
+    return _stat_cache.get(path)
+
+def invalidate_stat_cache(path=None):
+    """Xóa cache stat cho một path hoặc toàn bộ"""
+    _stat_cache.invalidate(path)
+
 def validate_workspace_path(workspace_path):
     """Validate workspace path"""
     if not workspace_path:
@@ -68,10 +167,11 @@ def validate_file_path_in_workspace(file_path, workspace_path):
         abs_file = os.path.abspath(normalized_file)
         abs_workspace = os.path.abspath(normalized_workspace)
         
-        if not os.path.exists(abs_file):
+        path_stat = get_path_stat(abs_file)
+        if path_stat is None:
             return {"valid": False, "error": f"File/folder does not exist: {normalized_file}"}
         
-        if not os.access(abs_file, os.R_OK):
+        if not path_stat["readable"]:
             return {"valid": False, "error": f"Cannot read file/folder: {normalized_file}"}
         
         try:
@@ -80,9 +180,9 @@ def validate_file_path_in_workspace(file_path, workspace_path):
         except ValueError:
             return {"valid": False, "error": f"Cannot calculate relative path"}
         
-        is_file = os.path.isfile(abs_file)
-        is_dir = os.path.isdir(abs_file)
-        is_symlink = os.path.islink(abs_file)
+        is_file = path_stat["is_file"]
+        is_dir = path_stat["is_dir"]
+        is_symlink = path_stat["is_symlink"]
         
         return {
             "valid": True,
@@ -91,12 +191,97 @@ def validate_file_path_in_workspace(file_path, workspace_path):
             "is_file": is_file,
             "is_dir": is_dir,
             "is_symlink": is_symlink,
+            "size": path_stat["stat"].st_size,
+            "mtime": path_stat["stat"].st_mtime,
             "basename": os.path.basename(abs_file)
         }
         
     except Exception as e:
         return {"valid": False, "error": f"File validation error: {str(e)}"}
 
+def validate_file_paths_in_workspace(file_paths, workspace_path):
+    """
+    Validate nhiều file path trong workspace trong một lượt
+    
+    Mỗi path đi qua validate_file_path_in_workspace (normalize và stat đều có cache),
+    tên workspace chỉ tính một lần.
+    
+    Returns:
+        list: Kết quả validate theo đúng thứ tự file_paths, mỗi phần tử có thêm
+        "full_relative_path" (workspace_name/relative_path) nếu hợp lệ
+    """
+    workspace_name = None
+    results = []
+    
+    for file_path in file_paths:
+        result = validate_file_path_in_workspace(file_path, workspace_path)
+        if result["valid"]:
+            if workspace_name is None:
+                abs_workspace = os.path.abspath(normalize_path_unicode(workspace_path))
+                workspace_name = os.path.basename(os.path.normpath(abs_workspace))
+            result["full_relative_path"] = f"{workspace_name}/{result['relative_path']}"
+        results.append(result)
+    
+    return results
+
+def _is_hidden_name(name):
+    """Entry bắt đầu bằng '.' - cây thư mục không hiển thị (giống DirectoryScanWorker)"""
+    return name.startswith('.')
+
+def list_child_paths(folder_path, ignore_rules=None):
+    """
+    Liệt kê các path con trực tiếp của folder (đã sắp xếp)
+    
+    Bỏ các entry ẩn ('.env', '.git'...) và các entry bị ignore_rules loại -
+    chỉ những gì cây thư mục hiển thị mới được chọn.
+    """
+    try:
+        with os.scandir(folder_path) as entries:
+            children = [(entry.name, entry.is_dir()) for entry in entries if not _is_hidden_name(entry.name)]
+    except OSError:
+        return []
+    
+    if ignore_rules is not None:
+        children = ignore_rules.filter_entries(folder_path, children)
+    return sorted(os.path.join(folder_path, name) for name, _ in children)
+
+def find_files_matching(folder_path, pattern, ignore_rules=None):
+    """
+    Tìm tất cả file dưới folder khớp glob pattern
+    
+    Pattern không chứa '/' được so với tên file (ví dụ '*.py'),
+    pattern có '/' được so với relative path tính từ folder (ví dụ 'src/*.ts').
+    Entry ẩn (bắt đầu bằng '.') và thư mục bị ignore_rules loại không được duyệt,
+    giống những gì cây thư mục hiển thị.
+    """
+    if not folder_path or not pattern:
+        return []
+    
+    match_relative = '/' in pattern
+    matches = []
+    
+    for current_dir, dir_names, file_names in os.walk(folder_path):
+        dir_names[:] = [name for name in dir_names if not _is_hidden_name(name)]
+        file_names = [name for name in file_names if not _is_hidden_name(name)]
+        if ignore_rules is not None:
+            kept = ignore_rules.filter_entries(
+                current_dir,
+                [(name, True) for name in dir_names] + [(name, False) for name in file_names]
+            )
+            dir_names[:] = [name for name, is_dir in kept if is_dir]
+            file_names = [name for name, is_dir in kept if not is_dir]
+        dir_names.sort()
+        for name in sorted(file_names):
+            full_path = os.path.join(current_dir, name)
+            if match_relative:
+                target = os.path.relpath(full_path, folder_path).replace(os.sep, '/')
+            else:
+                target = name
+            if fnmatch.fnmatch(target, pattern):
+                matches.append(full_path)
+    
+    return matches
+
 def create_relative_path_with_workspace(file_path, workspace_path):
     """Tạo relative path với workspace name"""
     try:
@@ -166,14 +351,17 @@ def get_file_info_comprehensive(file_path):
     """Lấy thông tin file toàn diện"""
     try:
         normalized_path = normalize_path_unicode(file_path)
-        stat_info = os.stat(normalized_path)
+        path_stat = get_path_stat(normalized_path)
+        if path_stat is None:
+            return {"success": False, "error": f"Path does not exist: {normalized_path}", "path": file_path}
         
-        is_file = os.path.isfile(normalized_path)
-        is_dir = os.path.isdir(normalized_path)
-        is_symlink = os.path.islink(normalized_path)
+        stat_info = path_stat["stat"]
+        is_file = path_stat["is_file"]
+        is_dir = path_stat["is_dir"]
+        is_symlink = path_stat["is_symlink"]
         
         permissions = {
-            "readable": os.access(normalized_path, os.R_OK),
+            "readable": path_stat["readable"],
             "writable": os.access(normalized_path, os.W_OK),
             "executable": os.access(normalized_path, os.X_OK)
         }
@@ -0,0 +1,241 @@
+# Ignore rules (.gitignore + exclude globs) for AI extension Tool
+import os
+import re
+import threading
+from ..constants import DEFAULT_TREE_EXCLUDES
+from .log import get_logger
+
+logger = get_logger("IgnoreRules")
+
+GITIGNORE_FILENAME = ".gitignore"
+
+
+def _translate_glob(body):
+    """Chuyển phần thân của một gitignore pattern thành regex (không có anchor)"""
+    regex = []
+    i = 0
+    length = len(body)
+    while i < length:
+        char = body[i]
+        if body.startswith("**/", i) and (i == 0 or body[i - 1] == "/"):
+            regex.append("(?:.*/)?")
+            i += 3
+            continue
+        if body.startswith("**", i) and i + 2 == length and (i == 0 or body[i - 1] == "/"):
+            regex.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            regex.append("[^/]*")
+        elif char == "?":
+            regex.append("[^/]")
+        elif char == "[":
+            end = body.find("]", i + 2 if body[i + 1:i + 2] in ("!", "^") else i + 1)
+            if end == -1:
+                regex.append(re.escape(char))
+            else:
+                content = body[i + 1:end]
+                if content[:1] in ("!", "^"):
+                    content = "^" + content[1:]
+                regex.append("[" + content.replace("\\", "\\\\") + "]")
+                i = end
+        elif char == "\\" and i + 1 < length:
+            i += 1
+            regex.append(re.escape(body[i]))
+        else:
+            regex.append(re.escape(char))
+        i += 1
+    return "".join(regex)
+
+
+def parse_ignore_pattern(line):
+    """
+    Parse một dòng theo cú pháp .gitignore
+
+    Returns:
+        tuple: (regex_string, negate, dir_only) hoặc None nếu là dòng trống/comment
+    """
+    line = line.rstrip("\n\r")
+    if not line.endswith("\\ "):
+        line = line.rstrip(" ")
+    if not line or line.startswith("#"):
+        return None
+
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    elif line.startswith("\\"):
+        line = line[1:]
+
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    # Pattern có '/' ở đầu hoặc giữa được neo vào thư mục chứa .gitignore
+    anchored = "/" in line
+    body = _translate_glob(line.lstrip("/"))
+    regex = body if anchored else "(?:.*/)?" + body
+    return regex, negate, dir_only
+
+
+def _compile_rule_groups(patterns):
+    """
+    Gộp các pattern liên tiếp cùng (negate, dir_only) thành một regex.
+    Trả về danh sách (compiled_regex, negate, dir_only) theo đúng thứ tự file.
+    """
+    groups = []
+    for pattern in patterns:
+        parsed = parse_ignore_pattern(pattern)
+        if parsed is None:
+            continue
+        regex, negate, dir_only = parsed
+        if groups and groups[-1][1] == negate and groups[-1][2] == dir_only:
+            groups[-1][0].append(regex)
+        else:
+            groups.append(([regex], negate, dir_only))
+
+    return [
+        (re.compile("(?:" + "|".join(regexes) + r")\Z", re.DOTALL), negate, dir_only)
+        for regexes, negate, dir_only in groups
+    ]
+
+
+class IgnoreRules:
+    """
+    Quyết định item nào bị ẩn khỏi cây thư mục của một workspace.
+
+    Gồm default excludes (node_modules, __pycache__, venv...), exclude globs của
+    người dùng (cú pháp .gitignore, tính từ workspace root) và các file .gitignore
+    trong workspace (file sâu hơn được ưu tiên, pattern sau thắng pattern trước).
+    Thư mục bị ignore không bao giờ được scan nên nội dung của nó cũng bị ẩn.
+    Thread-safe: được dùng từ các scan worker.
+    """
+
+    def __init__(self, root_path, exclude_globs=None, use_gitignore=True, include_defaults=True):
+        """
+        Khởi tạo IgnoreRules
+
+        Args:
+            root_path (str): Workspace root
+            exclude_globs (list): Exclude patterns của người dùng
+            use_gitignore (bool): Đọc các file .gitignore trong workspace
+            include_defaults (bool): Áp dụng DEFAULT_TREE_EXCLUDES
+        """
+        self.root_path = os.path.normpath(root_path) if root_path else ""
+        self.exclude_globs = list(exclude_globs or [])
+        self.use_gitignore = use_gitignore
+
+        base_patterns = (list(DEFAULT_TREE_EXCLUDES) if include_defaults else []) + self.exclude_globs
+        self._base_groups = _compile_rule_groups(base_patterns)
+        # dir path -> rule groups từ .gitignore của dir đó (list rỗng nếu không có)
+        self._gitignore_groups = {}
+        self._lock = threading.Lock()
+
+    def _relative(self, path):
+        """Relative path kiểu posix tính từ root, None nếu path nằm ngoài root"""
+        if not self.root_path:
+            return None
+        relative = os.path.relpath(path, self.root_path)
+        if relative == "." or relative.startswith(".." + os.sep) or relative == "..":
+            return None
+        return relative.replace(os.sep, "/")
+
+    def _groups_for_dir(self, dir_path):
+        """Rule groups của .gitignore trong dir_path (đọc một lần, có cache)"""
+        with self._lock:
+            groups = self._gitignore_groups.get(dir_path)
+        if groups is not None:
+            return groups
+
+        groups = []
+        try:
+            with open(os.path.join(dir_path, GITIGNORE_FILENAME), "r", encoding="utf-8", errors="replace") as f:
+                groups = _compile_rule_groups(f.readlines())
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Không thể đọc .gitignore trong {dir_path}: {str(e)}")
+
+        with self._lock:
+            self._gitignore_groups[dir_path] = groups
+        return groups
+
+    def _layers_for_dir(self, dir_path, dir_relative):
+        """
+        Các lớp rule áp dụng cho entries của dir_path, theo thứ tự ưu tiên tăng dần:
+        [(prefix cần bỏ khỏi relative path, rule groups)]
+        """
+        layers = [("", self._base_groups)]
+        if not self.use_gitignore:
+            return layers
+
+        parts = dir_relative.split("/") if dir_relative else []
+        current = self.root_path
+        prefix = ""
+        for depth in range(len(parts) + 1):
+            if depth:
+                current = os.path.join(current, parts[depth - 1])
+                prefix = "/".join(parts[:depth]) + "/"
+            groups = self._groups_for_dir(current)
+            if groups:
+                layers.append((prefix, groups))
+        return layers
+
+    @staticmethod
+    def _match_layers(layers, relative, is_dir):
+        """Pattern khớp sau cùng quyết định: duyệt từ lớp sâu nhất, group cuối cùng"""
+        for index in range(len(layers) - 1, 0, -1):
+            prefix, groups = layers[index]
+            target = relative[len(prefix):]
+            for regex, negate, dir_only in reversed(groups):
+                if dir_only and not is_dir:
+                    continue
+                if regex.match(target):
+                    if not negate:
+                        return True
+                    # Negation trong .gitignore không "cứu" được base excludes
+                    return IgnoreRules._match_base(layers[0][1], relative, is_dir)
+        return IgnoreRules._match_base(layers[0][1], relative, is_dir)
+
+    @staticmethod
+    def _match_base(groups, relative, is_dir):
+        for regex, negate, dir_only in reversed(groups):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relative):
+                return not negate
+        return False
+
+    def is_ignored(self, path, is_dir=False):
+        """Kiểm tra một path (trong workspace) có bị ignore không"""
+        relative = self._relative(os.path.normpath(path))
+        if relative is None:
+            return False
+        parent_relative = relative.rpartition("/")[0]
+        layers = self._layers_for_dir(os.path.dirname(os.path.normpath(path)), parent_relative)
+        return self._match_layers(layers, relative, is_dir)
+
+    def filter_entries(self, dir_path, entries):
+        """
+        Lọc entries [(name, is_dir)] của dir_path, bỏ các entry bị ignore.
+        Các lớp rule chỉ được tính một lần cho cả thư mục.
+        """
+        dir_path = os.path.normpath(dir_path)
+        if dir_path == self.root_path:
+            dir_relative = ""
+        else:
+            dir_relative = self._relative(dir_path)
+            if dir_relative is None:
+                return list(entries)
+
+        layers = self._layers_for_dir(dir_path, dir_relative)
+        prefix = dir_relative + "/" if dir_relative else ""
+        return [
+            (name, is_dir) for name, is_dir in entries
+            if not self._match_layers(layers, prefix + name, is_dir)
+        ]
+
+    def filter_paths(self, paths):
+        """Lọc danh sách paths, bỏ các path bị ignore"""
+        return [path for path in paths if not self.is_ignored(path, os.path.isdir(path))]
@@ -0,0 +1,210 @@
+"""
+Image handles for AI extension Tool
+Pass attached images between the UI and the server as small handles instead of base64
+
+A handle is a JSON-serializable dict that names where the bytes live:
+
+    {"kind": "file", "path": "/.../user_images/attached_1234_shot.png", "size": 48213}
+    {"kind": "shm", "name": "psm_5f2a...", "size": 48213}   # multiprocessing.shared_memory
+
+Only handles cross process boundaries (dialog JSON, responders, bridges). The
+bytes are read once, when the MCP response is serialized (HandleImage.to_image_content).
+
+The registry keeps per-process reference counts. A handle comes with one
+reference, taken when it is created (file_handle at attach time, share_bytes);
+whoever holds the handle owns that reference and either releases it (image
+removed, dialog dismissed) or hands it to a HandleImage, which releases it once
+serialized or garbage collected. A file removed while referenced (remove_file)
+is deleted on the last release, and a shared memory segment created here
+(share_bytes) is unlinked on the last release.
+"""
+
+import base64
+import os
+import sys
+import threading
+import weakref
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Dict, Optional
+from mcp.server.fastmcp.utilities.types import Image as MCPImage
+from mcp.types import ImageContent
+from .log import get_logger
+
+logger = get_logger("ImageHandles")
+
+
+def _handle_key(handle: Dict) -> str:
+    if handle.get("kind") == "shm":
+        return f"shm:{handle['name']}"
+    return f"file:{os.path.abspath(handle['path'])}"
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attach vào segment của process khác mà không để resource_tracker unlink nó khi thoát"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    segment = shared_memory.SharedMemory(name=name)
+    # Process con của multiprocessing dùng chung resource_tracker với process cha (chủ segment)
+    if multiprocessing.parent_process() is None:
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(segment._name, "shared_memory")
+        except Exception:
+            pass
+    return segment
+
+
+def file_handle(path: str, registry: "ImageHandleRegistry" = None) -> Optional[Dict]:
+    """
+    Handle cho một file ảnh (None nếu file không tồn tại hoặc rỗng)
+
+    Handle giữ sẵn một reference: file không bị remove_file xóa cho đến khi
+    reference được release (hoặc HandleImage nhận nó đã serialize xong).
+    """
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return None
+    if size == 0:
+        return None
+    handle = {"kind": "file", "path": os.path.abspath(path), "size": size}
+    (registry or _registry).acquire(handle)
+    return handle
+
+
+def is_image_handle(value) -> bool:
+    return isinstance(value, dict) and value.get("kind") in ("file", "shm") and ("path" in value or "name" in value)
+
+
+class ImageHandleRegistry:
+    """Reference count của các handle trong process này (thread-safe)"""
+
+    def __init__(self):
+        self._refs: Dict[str, int] = {}
+        self._owned_segments: Dict[str, shared_memory.SharedMemory] = {}
+        self._pending_deletes = set()
+        self._lock = threading.Lock()
+
+    def share_bytes(self, data: bytes) -> Dict:
+        """
+        Copy bytes vào một shared memory segment mới
+
+        Process tạo ra giữ một reference; gọi release(handle) khi không cần chia sẻ nữa.
+        """
+        segment = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+        segment.buf[:len(data)] = data
+        handle = {"kind": "shm", "name": segment.name, "size": len(data)}
+        with self._lock:
+            key = _handle_key(handle)
+            self._owned_segments[key] = segment
+            self._refs[key] = 1
+        return handle
+
+    def acquire(self, handle: Dict) -> None:
+        key = _handle_key(handle)
+        with self._lock:
+            self._refs[key] = self._refs.get(key, 0) + 1
+
+    def release(self, handle: Dict) -> None:
+        key = _handle_key(handle)
+        with self._lock:
+            count = self._refs.get(key, 0) - 1
+            if count > 0:
+                self._refs[key] = count
+                return
+            self._refs.pop(key, None)
+            segment = self._owned_segments.pop(key, None)
+            delete_path = handle.get("path") if key in self._pending_deletes else None
+            self._pending_deletes.discard(key)
+
+        if segment is not None:
+            segment.close()
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+        if delete_path:
+            self._remove(delete_path)
+
+    def refcount(self, handle: Dict) -> int:
+        with self._lock:
+            return self._refs.get(_handle_key(handle), 0)
+
+    def remove_file(self, path: str) -> bool:
+        """
+        Xóa file ảnh; nếu còn handle đang tham chiếu thì hoãn tới lần release cuối
+
+        Returns:
+            bool: True nếu file đã bị xóa ngay
+        """
+        key = _handle_key({"kind": "file", "path": path})
+        with self._lock:
+            if self._refs.get(key, 0) > 0:
+                self._pending_deletes.add(key)
+                return False
+        return self._remove(path)
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return True
+        except OSError as e:
+            logger.error(f"Không thể xóa {path}: {str(e)}")
+            return False
+
+    def read(self, handle: Dict) -> bytes:
+        """Đọc bytes của handle (một lần copy)"""
+        if handle.get("kind") == "shm":
+            size = handle["size"]
+            with self._lock:
+                segment = self._owned_segments.get(_handle_key(handle))
+            if segment is not None:
+                return bytes(segment.buf[:size])
+            segment = _attach_shared_memory(handle["name"])
+            try:
+                return bytes(segment.buf[:size])
+            finally:
+                segment.close()
+
+        with open(handle["path"], "rb") as f:
+            return f.read()
+
+
+_registry = ImageHandleRegistry()
+
+
+def get_image_registry() -> ImageHandleRegistry:
+    return _registry
+
+
+class HandleImage(MCPImage):
+    """
+    MCPImage đọc bytes từ handle khi serialize (to_image_content) thay vì giữ sẵn trong bộ nhớ
+
+    Nhận reference mà handle mang theo (file_handle / share_bytes) và release nó
+    khi đã serialize hoặc bị garbage collect.
+    """
+
+    def __init__(self, handle: Dict, format: str = None, registry: ImageHandleRegistry = None):
+        self.handle = handle
+        self.path = None
+        self.data = None
+        self.size = handle.get("size", 0)
+        self._format = format
+        self._mime_type = self._get_mime_type()
+        self._registry = registry or _registry
+        self._release = weakref.finalize(self, self._registry.release, handle)
+
+    def read_bytes(self) -> bytes:
+        return self._registry.read(self.handle)
+
+    def to_image_content(self) -> ImageContent:
+        try:
+            data = base64.b64encode(self.read_bytes()).decode()
+        finally:
+            self._release()
+        return ImageContent(type="image", data=data, mimeType=self._mime_type)
@@ -5,8 +5,16 @@ Handles conversion of base64 image data to MCP Image objects
 
 from mcp.server.fastmcp.utilities.types import Image as MCPImage
 import base64
-import sys
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator
+from .tracing import span
+from .image_handles import HandleImage, is_image_handle
+from .metrics import get_metrics
+from .log import get_logger
+
+logger = get_logger("ImageProcessing")
+
+_images_processed = get_metrics().counter("images_processed_total", "Images attached to tool responses")
+_image_bytes = get_metrics().counter("image_bytes_total", "Bytes of images attached to tool responses")
 
 
 def process_images(images_data: List[dict]) -> List[MCPImage]:
@@ -14,7 +22,8 @@ def process_images(images_data: List[dict]) -> List[MCPImage]:
     Process image data and convert to MCP Image objects
     
     Args:
-        images_data: List of image dictionaries containing base64_data, media_type, filename
+        images_data: List of image dictionaries containing base64_data (or raw bytes in data,
+            or an image handle in handle), media_type, filename
         
     Returns:
         List[MCPImage]: Processed MCP Image objects ready for server response
@@ -22,42 +31,70 @@ def process_images(images_data: List[dict]) -> List[MCPImage]:
     Note:
         Uses same approach as mcp-feedback-enhanced for compatibility
     """
-    mcp_images = []
-    
+    with span("image.process_images", {"image.count": len(images_data)}) as images_span:
+        mcp_images = list(iter_process_images(images_data))
+        images_span.set_attribute("image.bytes", sum(_image_size(image) for image in mcp_images))
+    return mcp_images
+
+
+def iter_process_images(images_data: Iterable[dict]) -> Iterator[MCPImage]:
+    """
+    Generator version of process_images: yields each MCP Image as soon as it is decoded
+
+    The caller can serialize (and drop) one image before the next one is
+    decoded, so only one decoded image needs to be alive at a time.
+    """
     for i, img in enumerate(images_data, 1):
         try:
-            if not img.get("base64_data"):
-                continue
-            
-            # Decode base64 to raw bytes (mcp-feedback-enhanced approach)
-            if isinstance(img["base64_data"], str):
-                image_bytes = base64.b64decode(img["base64_data"])
-            else:
-                continue
-            
-            if len(image_bytes) == 0:
-                continue
-            
-            # Determine format from media_type or filename
-            media_type = img.get("media_type", "image/png")
-            filename = img.get("filename", "image.png")
-            
-            if "jpeg" in media_type or "jpg" in media_type or filename.lower().endswith(('.jpg', '.jpeg')):
-                image_format = 'jpeg'
-            elif "gif" in media_type or filename.lower().endswith('.gif'):
-                image_format = 'gif'
-            else:
-                image_format = 'png'  # Default to PNG
-            
-            # Create MCPImage with raw bytes (NOT base64 string!)
-            mcp_image = MCPImage(data=image_bytes, format=image_format)
-            mcp_images.append(mcp_image)
-            
+            mcp_image = _process_image(img)
         except Exception as e:
-            print(f"Error processing image {i}: {e}", file=sys.stderr)
+            logger.error(f"Error processing image {i}: {e}")
             continue
+        if mcp_image is not None:
+            _images_processed.inc()
+            _image_bytes.inc(_image_size(mcp_image))
+            yield mcp_image
+
+
+def _image_size(image: MCPImage) -> int:
+    if isinstance(image, HandleImage):
+        return image.size
+    return len(image.data) if image.data is not None else 0
+
+
+def _image_format(img: dict) -> str:
+    """Determine format from media_type or filename"""
+    media_type = img.get("media_type", "image/png")
+    filename = img.get("filename", "image.png")
     
-    return mcp_images
+    if "jpeg" in media_type or "jpg" in media_type or filename.lower().endswith(('.jpg', '.jpeg')):
+        return 'jpeg'
+    elif "gif" in media_type or filename.lower().endswith('.gif'):
+        return 'gif'
+    return 'png'  # Default to PNG
+
+
+def _process_image(img: dict):
+    """One image dict -> MCPImage (None if it has no usable data)"""
+    if is_image_handle(img.get("handle")):
+        # Handle (file trong user_images / shared memory) - bytes chỉ được đọc khi serialize
+        return HandleImage(img["handle"], format=_image_format(img))
+    elif isinstance(img.get("data"), (bytes, bytearray)):
+        # Raw bytes (VS Code bridge binary frames) - không cần decode
+        image_bytes = bytes(img["data"])
+    elif not img.get("base64_data"):
+        return None
+    elif isinstance(img["base64_data"], str):
+        # Decode base64 to raw bytes (mcp-feedback-enhanced approach)
+        image_bytes = base64.b64decode(img["base64_data"])
+    else:
+        return None
+    
+    if len(image_bytes) == 0:
+        return None
+    
+    # Create MCPImage with raw bytes (NOT base64 string!)
+    return MCPImage(data=image_bytes, format=_image_format(img))
 
 
 def validate_image_data(image_data: dict) -> bool:
@@ -124,6 +161,6 @@ def get_image_info(image_data: dict) -> Dict[str, Any]:
                 info["format"] = 'png'
                 
         except Exception as e:
-            print(f"Error getting image info: {e}", file=sys.stderr)
+            logger.error(f"Error getting image info: {e}")
     
     return info 
\ No newline at end of file
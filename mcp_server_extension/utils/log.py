@@ -0,0 +1,102 @@
+# Logging for AI extension Tool
+"""
+Component loggers under the "ai_extension" logger
+
+get_logger("ConfigManager") returns logging.getLogger("ai_extension.ConfigManager").
+Records go to stderr (never stdout, which carries JSON-RPC on the stdio
+transport) either as "[ConfigManager] message" (default) or as one JSON object
+per line. Level and format come from AI_EXTENSION_LOG_LEVEL and
+AI_EXTENSION_LOG_FORMAT, or from configure_logging().
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+from ..constants import LOG_LEVEL_ENV_VAR, LOG_FORMAT_ENV_VAR
+
+LOG_ROOT = "ai_extension"
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+class _StderrHandler(logging.StreamHandler):
+    """Luôn ghi vào sys.stderr hiện tại (kể cả khi stderr bị thay sau khi cấu hình)"""
+
+    def __init__(self):
+        super().__init__(sys.stderr)
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class _TextFormatter(logging.Formatter):
+    """[Component] message - giữ nguyên dạng của các dòng stderr trước đây"""
+
+    def format(self, record):
+        component = record.name.rsplit(".", 1)[-1]
+        message = f"[{component}] {record.getMessage()}"
+        if record.exc_info:
+            message += "\n" + self.formatException(record.exc_info)
+        return message
+
+
+class _JsonFormatter(logging.Formatter):
+    """Một JSON object mỗi dòng: ts, level, component, message (+ fields từ extra={"fields": {...}})"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "component": record.name.rsplit(".", 1)[-1],
+            "message": record.getMessage()
+        }
+        fields = getattr(record, "fields", None)
+        if isinstance(fields, dict):
+            entry.update(fields)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(level=None, fmt=None):
+    """
+    Cấu hình logger "ai_extension"
+
+    Args:
+        level (str|int): Log level (mặc định từ LOG_LEVEL_ENV_VAR, rồi INFO)
+        fmt (str): "text" hoặc "json" (mặc định từ LOG_FORMAT_ENV_VAR, rồi "text")
+    """
+    global _configured
+    with _configure_lock:
+        level = level or os.environ.get(LOG_LEVEL_ENV_VAR, "INFO")
+        fmt = (fmt or os.environ.get(LOG_FORMAT_ENV_VAR, "text")).lower()
+
+        root = logging.getLogger(LOG_ROOT)
+        for handler in list(root.handlers):
+            if isinstance(handler, _StderrHandler):
+                root.removeHandler(handler)
+        handler = _StderrHandler()
+        handler.setFormatter(_JsonFormatter() if fmt == "json" else _TextFormatter())
+        root.addHandler(handler)
+        try:
+            root.setLevel(level.upper() if isinstance(level, str) else level)
+        except ValueError:
+            root.setLevel(logging.INFO)
+        # Không đẩy lên root logger (FastMCP cấu hình handler riêng ở đó)
+        root.propagate = False
+        _configured = True
+
+
+def get_logger(component):
+    """Logger cho một component, ví dụ get_logger("MCPClient")"""
+    if not _configured:
+        configure_logging()
+    return logging.getLogger(f"{LOG_ROOT}.{component}")
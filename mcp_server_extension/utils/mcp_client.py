@@ -4,63 +4,122 @@ Connects to MCP servers using auto-detected configuration
 """
 
 import asyncio
+import atexit
+import collections
+import contextlib
+import itertools
 import json
+import logging
+import queue
 import subprocess
-import sys
+import threading
 import time
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable
+from ..constants import (
+    MCP_PROTOCOL_VERSION, MCP_REQUEST_TIMEOUT, MCP_STREAM_LIMIT, MCP_START_TIMEOUT, MCP_POOL_SIZE
+)
 from .mcp_config import get_mcp_server_config, get_server_command
+from .log import get_logger
+
+logger = get_logger("MCPClient")
+async_logger = get_logger("AsyncMCPClient")
+pool_logger = get_logger("MCPServerPool")
+# stderr của server con được chuyển tiếp ở mức DEBUG
+server_logger = get_logger("MCPServer")
 
 
 class MCPClient:
     """
     MCP Client for connecting to AI extension servers
+    
+    start_server() waits for the real initialize response (with a deadline)
+    instead of guessing with a fixed sleep. A reader thread moves stdout lines
+    into a queue so every read can honour a timeout, and stderr is drained in
+    the background so a chatty server never blocks on a full pipe.
     """
     
-    def __init__(self):
-        """Initialize the MCP client"""
+    def __init__(self, command: str = None, args: List[str] = None):
+        """
+        Initialize the MCP client
+        
+        Args:
+            command: Server command (default: from MCP configuration)
+            args: Server arguments (default: from MCP configuration)
+        """
         self.process = None
         self.server_config = get_mcp_server_config()
         self.is_connected = False
+        self.command = command
+        self.args = list(args) if args is not None else None
+        self.server_info = None
+        self.startup_time = None
+        self._request_ids = itertools.count(1)
+        self._initialized = False
+        self._init_response = None
+        self._messages = queue.Queue()
+        self._stderr_tail = collections.deque(maxlen=50)
+        self._closed = False
         
-    def start_server(self) -> bool:
+    def start_server(self, timeout: float = MCP_START_TIMEOUT) -> bool:
         """
-        Start the MCP server process
+        Start the MCP server process and wait until it answers initialize
         
+        Args:
+            timeout: Seconds to wait for the initialize response
+            
         Returns:
-            bool: True if server started successfully
+            bool: True if server started and finished the handshake
         """
         try:
-            command, args = get_server_command()
+            command, args = self.command, self.args
+            if command is None:
+                command, config_args = get_server_command()
+                args = config_args if args is None else args
+            args = list(args or [])
             
-            print(f"[MCPClient] Starting MCP server: {command} {' '.join(args)}", file=sys.stderr)
+            logger.info(f"Starting MCP server: {command} {' '.join(args)}")
             
-            # Start the server process
+            started = time.perf_counter()
+            self._messages = queue.Queue()
+            self._stderr_tail.clear()
+            self._closed = False
             self.process = subprocess.Popen(
                 [command] + args,
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True,
-                bufsize=0
+                encoding="utf-8",
+                bufsize=1
             )
+            threading.Thread(target=self._read_stdout, args=(self.process,), daemon=True,
+                             name="MCPClient-stdout").start()
+            threading.Thread(target=self._drain_stderr, args=(self.process,), daemon=True,
+                             name="MCPClient-stderr").start()
             
-            # Give the server a moment to start
-            time.sleep(1)
-            
-            # Check if process is still running
-            if self.process.poll() is None:
+            # Ready = the server answered initialize, not "the process is still alive"
+            init_response = self._initialize(timeout)
+            if init_response and "result" in init_response:
                 self.is_connected = True
-                print("[MCPClient] MCP server started successfully", file=sys.stderr)
+                self.startup_time = time.perf_counter() - started
+                logger.info(f"MCP server ready in {self.startup_time * 1000:.0f} ms")
                 return True
+            
+            exit_code = self.process.poll()
+            stderr_output = "\n".join(self._stderr_tail) or "No error output"
+            if exit_code is not None:
+                logger.error(f"MCP server exited with code {exit_code}: {stderr_output}")
+            elif init_response is None:
+                logger.warning(f"MCP server not ready after {timeout}s: {stderr_output}")
             else:
-                stderr_output = self.process.stderr.read() if self.process.stderr else "No error output"
-                print(f"[MCPClient] MCP server failed to start: {stderr_output}", file=sys.stderr)
-                return False
+                logger.error(f"Initialize failed: {init_response.get('error')}")
+            self.stop_server()
+            return False
                 
         except Exception as e:
-            print(f"[MCPClient] Error starting MCP server: {e}", file=sys.stderr)
+            logger.error(f"Error starting MCP server: {e}")
+            self.stop_server()
             return False
     
     def stop_server(self) -> bool:
@@ -71,7 +130,12 @@ class MCPClient:
             bool: True if server stopped successfully
         """
         try:
+            self._closed = True
             if self.process and self.process.poll() is None:
+                try:
+                    self.process.stdin.close()
+                except OSError:
+                    pass
                 self.process.terminate()
                 
                 # Wait for graceful shutdown
@@ -82,58 +146,137 @@ class MCPClient:
                     self.process.kill()
                     self.process.wait()
                 
-                print("[MCPClient] MCP server stopped", file=sys.stderr)
+                logger.info("MCP server stopped")
             
             self.is_connected = False
+            self._initialized = False
+            self._init_response = None
             self.process = None
             return True
             
         except Exception as e:
-            print(f"[MCPClient] Error stopping MCP server: {e}", file=sys.stderr)
+            logger.error(f"Error stopping MCP server: {e}")
             return False
     
-    def send_request(self, method: str, params: Dict[str, Any] = None) -> Optional[Dict]:
+    def is_alive(self) -> bool:
+        """Server process is running and the handshake is done"""
+        return bool(self.is_connected and self.process and self.process.poll() is None)
+    
+    def _read_stdout(self, process) -> None:
+        """Reader thread: stdout lines -> queue, None at EOF"""
+        try:
+            for line in process.stdout:
+                self._messages.put(line)
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._messages.put(None)
+    
+    def _drain_stderr(self, process) -> None:
+        """Keep the last stderr lines for error reports"""
+        try:
+            for line in process.stderr:
+                self._stderr_tail.append(line.rstrip())
+        except (OSError, ValueError):
+            pass
+    
+    def _write_message(self, message: Dict[str, Any]) -> None:
+        self.process.stdin.write(json.dumps(message) + "\n")
+        self.process.stdin.flush()
+    
+    def _read_response(self, request_id: int, timeout: Optional[float]) -> Optional[Dict]:
+        """
+        Read messages until the response with request_id arrives
+        
+        Returns:
+            Dict or None: The response, None on timeout or EOF
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                response_line = self._messages.get(timeout=remaining)
+            except queue.Empty:
+                logger.warning(f"No response to request {request_id} after {timeout}s")
+                return None
+            
+            if response_line is None:
+                # Keep the EOF marker for later readers
+                self._messages.put(None)
+                logger.warning("No response from server")
+                return None
+            
+            try:
+                message = json.loads(response_line)
+            except json.JSONDecodeError:
+                logger.debug(f"Ignoring non-JSON output: {response_line[:200]!r}")
+                continue
+            
+            if isinstance(message, dict) and message.get("id") == request_id and "method" not in message:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Received response: {response_line.strip()}")
+                return message
+            
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Skipping message: {response_line.strip()}")
+    
+    def _request(self, method: str, params: Dict[str, Any] = None, timeout: Optional[float] = None) -> Optional[Dict]:
+        request_id = next(self._request_ids)
+        request = {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": method,
+            "params": params or {}
+        }
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Sending request: {json.dumps(request)}")
+        self._write_message(request)
+        return self._read_response(request_id, timeout)
+    
+    def _initialize(self, timeout: Optional[float]) -> Optional[Dict]:
+        """Initialize handshake; caches the response and sends notifications/initialized"""
+        init_response = self._request("initialize", {
+            "protocolVersion": MCP_PROTOCOL_VERSION,
+            "capabilities": {
+                "tools": {}
+            },
+            "clientInfo": {
+                "name": "ai-extension-client",
+                "version": "1.0.0"
+            }
+        }, timeout=timeout)
+        
+        if init_response and "result" in init_response:
+            self._write_message({
+                "jsonrpc": "2.0",
+                "method": "notifications/initialized",
+                "params": {}
+            })
+            self._init_response = init_response
+            self.server_info = init_response["result"]
+            self._initialized = True
+        return init_response
+    
+    def send_request(self, method: str, params: Dict[str, Any] = None, timeout: Optional[float] = None) -> Optional[Dict]:
         """
         Send a JSON-RPC request to the MCP server
         
         Args:
             method: The method name
             params: Parameters for the method
+            timeout: Seconds to wait for the response (None = wait forever)
             
         Returns:
             Dict or None: Response from server
         """
         if not self.is_connected or not self.process:
-            print("[MCPClient] Not connected to MCP server", file=sys.stderr)
+            logger.warning("Not connected to MCP server")
             return None
         
         try:
-            request = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": method,
-                "params": params or {}
-            }
-            
-            request_json = json.dumps(request) + "\n"
-            print(f"[MCPClient] Sending request: {request_json.strip()}", file=sys.stderr)
-            
-            # Send request
-            self.process.stdin.write(request_json)
-            self.process.stdin.flush()
-            
-            # Read response
-            response_line = self.process.stdout.readline()
-            if not response_line:
-                print("[MCPClient] No response from server", file=sys.stderr)
-                return None
-            
-            print(f"[MCPClient] Received response: {response_line.strip()}", file=sys.stderr)
-            response = json.loads(response_line.strip())
-            return response
-            
+            return self._request(method, params, timeout)
         except Exception as e:
-            print(f"[MCPClient] Error sending request: {e}", file=sys.stderr)
+            logger.error(f"Error sending request: {e}")
             return None
     
     def send_notification(self, method: str, params: Dict[str, Any] = None) -> bool:
@@ -148,7 +291,7 @@ class MCPClient:
             bool: True if sent successfully
         """
         if not self.is_connected or not self.process:
-            print("[MCPClient] Not connected to MCP server", file=sys.stderr)
+            logger.warning("Not connected to MCP server")
             return False
         
         try:
@@ -157,39 +300,23 @@ class MCPClient:
                 "method": method,
                 "params": params or {}
             }
-            
-            notification_json = json.dumps(notification) + "\n"
-            print(f"[MCPClient] Sending notification: {notification_json.strip()}", file=sys.stderr)
-            
-            # Send notification
-            self.process.stdin.write(notification_json)
-            self.process.stdin.flush()
-            
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Sending notification: {json.dumps(notification)}")
+            self._write_message(notification)
             return True
             
         except Exception as e:
-            print(f"[MCPClient] Error sending notification: {e}", file=sys.stderr)
+            logger.error(f"Error sending notification: {e}")
             return False
     
-    def call_AI_EXTENSION_tool(self, dummy_param: str = "activate") -> Optional[List]:
+    def call_tool(self, name: str, arguments: Dict[str, Any] = None, timeout: Optional[float] = None) -> Optional[List]:
         """
-        Call the AI_EXTENSION_tool function
+        Call a tool by name; waits without timeout by default since tools may wait for the user
         
-        Args:
-            dummy_param: Dummy parameter (MCP tools require at least one parameter)
-            
         Returns:
-            List or None: Response from the tool
+            List or None: Content from the tool
         """
-        response = self.send_request(
-            "tools/call",
-            {
-                "name": "AI_EXTENSION_tool",
-                "arguments": {
-                    "random_string": dummy_param
-                }
-            }
-        )
+        response = self.send_request("tools/call", {"name": name, "arguments": arguments or {}}, timeout=timeout)
         
         if response and "result" in response:
             # The server returns: {"result": {"content": [...], "isError": false}}
@@ -197,11 +324,23 @@ class MCPClient:
             if not result.get("isError", True):  # Check it's not an error
                 return result.get("content", [])
             else:
-                print(f"[MCPClient] Tool returned error: {result}", file=sys.stderr)
+                logger.warning(f"Tool returned error: {result}")
                 return None
         
         return None
     
+    def call_AI_EXTENSION_tool(self, dummy_param: str = "activate") -> Optional[List]:
+        """
+        Call the AI_EXTENSION_tool function
+        
+        Args:
+            dummy_param: Dummy parameter (MCP tools require at least one parameter)
+            
+        Returns:
+            List or None: Response from the tool
+        """
+        return self.call_tool("AI_EXTENSION_tool", {"random_string": dummy_param})
+    
     def list_tools(self) -> Optional[List]:
         """
         List available tools from the MCP server
@@ -210,11 +349,10 @@ class MCPClient:
             List or None: List of available tools
         """
         # Make sure server is initialized first
-        if not hasattr(self, '_initialized'):
+        if not self._initialized:
             self.get_server_info()
-            self._initialized = True
         
-        response = self.send_request("tools/list", {})
+        response = self.send_request("tools/list", {}, timeout=MCP_REQUEST_TIMEOUT)
         
         if response and "result" in response:
             return response["result"].get("tools", [])
@@ -226,11 +364,479 @@ class MCPClient:
         Get server information and initialize the connection
         
         Returns:
-            Dict or None: Server information
+            Dict or None: Server information (the initialize response)
+        """
+        # start_server() already did the handshake - reuse its response
+        if self._initialized:
+            return self._init_response
+        if not self.is_connected or not self.process:
+            logger.warning("Not connected to MCP server")
+            return None
+        
+        try:
+            return self._initialize(MCP_REQUEST_TIMEOUT)
+        except Exception as e:
+            logger.error(f"Error sending request: {e}")
+            return None
+    
+    def __enter__(self):
+        """Context manager entry"""
+        self.start_server()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        self.stop_server()
+
+
+class MCPServerPool:
+    """
+    Pool of pre-warmed MCP server processes
+    
+    Each pooled MCPClient has already finished the initialize handshake, so a
+    lease skips interpreter start-up, imports and Qt loading. Released clients
+    go back to the pool if their process is still alive; the pool refills
+    itself in the background up to `size` idle servers.
+    """
+    
+    def __init__(self, size: int = MCP_POOL_SIZE, command: str = None, args: List[str] = None,
+                 start_timeout: float = MCP_START_TIMEOUT):
+        """
+        Initialize the pool (no process is started until warm() or lease())
+        
+        Args:
+            size: Number of idle servers to keep ready
+            command: Server command (default: from MCP configuration)
+            args: Server arguments (default: from MCP configuration)
+            start_timeout: Deadline for each server's initialize response
+        """
+        self.size = max(0, size)
+        self.command = command
+        self.args = args
+        self.start_timeout = start_timeout
+        self._idle: List[MCPClient] = []
+        self._starting = 0
+        self._closed = False
+        self._condition = threading.Condition()
+    
+    def _spawn(self) -> Optional[MCPClient]:
+        client = MCPClient(self.command, self.args)
+        if client.start_server(self.start_timeout):
+            return client
+        return None
+    
+    def _warm_one(self) -> None:
+        client = None
+        try:
+            client = self._spawn()
+        finally:
+            with self._condition:
+                self._starting -= 1
+                if client is not None and not self._closed and len(self._idle) < self.size:
+                    self._idle.append(client)
+                    client = None
+                self._condition.notify_all()
+            # Pool đã đóng hoặc đã đủ - không giữ process thừa
+            if client is not None:
+                client.stop_server()
+    
+    def warm(self) -> int:
+        """
+        Start servers in the background until size servers are idle or starting
+        
+        Returns:
+            int: Number of servers being started
+        """
+        with self._condition:
+            if self._closed:
+                return 0
+            missing = self.size - len(self._idle) - self._starting
+            self._starting += max(0, missing)
+        
+        for _ in range(max(0, missing)):
+            threading.Thread(target=self._warm_one, daemon=True, name="MCPServerPool-warm").start()
+        return max(0, missing)
+    
+    def _pop_idle(self) -> Optional[MCPClient]:
+        while self._idle:
+            client = self._idle.pop(0)
+            if client.is_alive():
+                return client
+            client.stop_server()
+        return None
+    
+    def lease(self, timeout: Optional[float] = None) -> Optional[MCPClient]:
+        """
+        Take a ready server; waits for a warming one or starts a new one
+        
+        Args:
+            timeout: Seconds to wait (default: start_timeout)
+            
+        Returns:
+            MCPClient or None: A connected client, None if no server could start
+        """
+        if timeout is None:
+            timeout = self.start_timeout
+        deadline = time.monotonic() + timeout
+        
+        with self._condition:
+            if self._closed:
+                pool_logger.warning("Pool is closed")
+                return None
+            client = self._pop_idle()
+        
+        # Bắt đầu (hoặc tiếp tục) làm ấm để thay thế / chờ server đang khởi động
+        self.warm()
+        if client is not None:
+            return client
+        
+        with self._condition:
+            while client is None and self._starting > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+                client = self._pop_idle()
+        
+        if client is not None:
+            self.warm()
+            return client
+        
+        pool_logger.info("No warm server available, starting one")
+        return self._spawn()
+    
+    def release(self, client: Optional[MCPClient]) -> None:
+        """Return a leased client; dead or surplus servers are stopped"""
+        if client is None:
+            return
+        with self._condition:
+            if not self._closed and client.is_alive() and len(self._idle) < self.size:
+                self._idle.append(client)
+                self._condition.notify_all()
+                return
+        client.stop_server()
+        self.warm()
+    
+    @contextlib.contextmanager
+    def leased(self, timeout: Optional[float] = None):
+        """Context manager: lease a client and always release it"""
+        client = self.lease(timeout)
+        try:
+            yield client
+        finally:
+            self.release(client)
+    
+    def idle_count(self) -> int:
+        with self._condition:
+            return len(self._idle)
+    
+    def close(self) -> None:
+        """Stop every idle server; servers still starting are stopped when they finish"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for client in idle:
+            client.stop_server()
+    
+    def __enter__(self):
+        self.warm()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+_server_pool = None
+_server_pool_lock = threading.Lock()
+
+
+def get_server_pool(size: int = MCP_POOL_SIZE) -> MCPServerPool:
+    """
+    Shared MCPServerPool for this process (created and warmed on first use,
+    closed at interpreter exit)
+    """
+    global _server_pool
+    with _server_pool_lock:
+        if _server_pool is None:
+            _server_pool = MCPServerPool(size)
+            _server_pool.warm()
+            atexit.register(_server_pool.close)
+        return _server_pool
+
+
+# Sentinel: use the client's request_timeout (None means "no timeout")
+_DEFAULT_TIMEOUT = object()
+
+
+class MCPError(Exception):
+    """Base error for AsyncMCPClient"""
+
+
+class MCPConnectionError(MCPError, ConnectionError):
+    """Server process is not running or closed its stdout"""
+
+
+class MCPTimeoutError(MCPError, TimeoutError):
+    """No response arrived within the request timeout"""
+
+
+class AsyncMCPClient:
+    """
+    Asyncio MCP client with pipelined requests
+    
+    Every request gets its own id and a future; a single reader task reads
+    stdout and resolves the future whose id matches, so any number of calls
+    can be in flight and notifications or out-of-order responses are handled.
+    Server-to-client notifications go to handlers registered with
+    on_notification(); server requests other than "ping" get a
+    method-not-found error.
+    """
+    
+    def __init__(self, command: str = None, args: List[str] = None, request_timeout: Optional[float] = MCP_REQUEST_TIMEOUT):
+        """
+        Initialize the async MCP client
+        
+        Args:
+            command: Server command (default: from MCP configuration)
+            args: Server arguments (default: from MCP configuration)
+            request_timeout: Default per-request timeout in seconds (None = wait forever)
+        """
+        if command is None:
+            command, config_args = get_server_command()
+            args = config_args if args is None else args
+        self.command = command
+        self.args = list(args or [])
+        self.request_timeout = request_timeout
+        
+        self.process = None
+        self.is_connected = False
+        self.server_info = None
+        self._request_ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._notification_handlers: Dict[str, List[Callable]] = {}
+        self._write_lock = None
+        self._reader_task = None
+        self._stderr_task = None
+    
+    async def start(self) -> bool:
+        """
+        Start the server process and the reader task
+        
+        Returns:
+            bool: True if the server process is running
+        """
+        try:
+            async_logger.info(f"Starting MCP server: {self.command} {' '.join(self.args)}")
+            self.process = await asyncio.create_subprocess_exec(
+                self.command, *self.args,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=MCP_STREAM_LIMIT
+            )
+        except Exception as e:
+            async_logger.error(f"Error starting MCP server: {e}")
+            return False
+        
+        self._write_lock = asyncio.Lock()
+        self._reader_task = asyncio.create_task(self._read_loop())
+        # Drain stderr so a chatty server never blocks on a full pipe
+        self._stderr_task = asyncio.create_task(self._drain_stderr())
+        self.is_connected = True
+        return True
+    
+    async def stop(self) -> bool:
+        """
+        Stop the server process and fail any requests still in flight
+        
+        Returns:
+            bool: True if stopped cleanly
+        """
+        if self.process is None:
+            return True
+        
+        try:
+            if self.process.stdin and not self.process.stdin.is_closing():
+                self.process.stdin.close()
+            if self.process.returncode is None:
+                self.process.terminate()
+                try:
+                    await asyncio.wait_for(self.process.wait(), timeout=5)
+                except asyncio.TimeoutError:
+                    self.process.kill()
+                    await self.process.wait()
+            async_logger.info("MCP server stopped")
+            return True
+        except ProcessLookupError:
+            return True
+        except Exception as e:
+            async_logger.error(f"Error stopping MCP server: {e}")
+            return False
+        finally:
+            for task in (self._reader_task, self._stderr_task):
+                if task is not None:
+                    task.cancel()
+            self._fail_pending(MCPConnectionError("MCP client stopped"))
+            self.is_connected = False
+            self.process = None
+    
+    def on_notification(self, method: str, handler: Callable) -> None:
+        """
+        Register a handler for server notifications
+        
+        Args:
+            method: Notification method, or "*" for every notification
+            handler: Callable (sync or async) receiving params, or (method, params) for "*"
+        """
+        self._notification_handlers.setdefault(method, []).append(handler)
+    
+    async def _write_message(self, message: Dict[str, Any]) -> None:
+        if not self.is_connected or self.process is None or self.process.stdin.is_closing():
+            raise MCPConnectionError("Not connected to MCP server")
+        data = (json.dumps(message, separators=(",", ":")) + "\n").encode("utf-8")
+        async with self._write_lock:
+            self.process.stdin.write(data)
+            await self.process.stdin.drain()
+    
+    async def request(self, method: str, params: Dict[str, Any] = None, timeout: Optional[float] = _DEFAULT_TIMEOUT) -> Dict:
+        """
+        Send a JSON-RPC request and wait for the response with the same id
+        
+        Args:
+            method: The method name
+            params: Parameters for the method
+            timeout: Seconds to wait (default: request_timeout, None = forever)
+            
+        Returns:
+            Dict: The JSON-RPC response ("result" or "error")
+            
+        Raises:
+            MCPTimeoutError: No response in time (a notifications/cancelled is sent)
+            MCPConnectionError: Not connected or the server went away
+        """
+        if timeout is _DEFAULT_TIMEOUT:
+            timeout = self.request_timeout
+        
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        
+        try:
+            await self._write_message({
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "method": method,
+                "params": params or {}
+            })
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            # Tell the server we gave up so it can stop working on it
+            try:
+                await self.notify("notifications/cancelled", {
+                    "requestId": request_id,
+                    "reason": f"Client timeout after {timeout}s"
+                })
+            except MCPError:
+                pass
+            raise MCPTimeoutError(f"{method} (id {request_id}) timed out after {timeout}s") from None
+        finally:
+            self._pending.pop(request_id, None)
+    
+    async def notify(self, method: str, params: Dict[str, Any] = None) -> None:
+        """Send a JSON-RPC notification (no response expected)"""
+        await self._write_message({
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params or {}
+        })
+    
+    async def _read_loop(self) -> None:
+        """Read stdout line by line and dispatch responses, notifications and server requests"""
+        try:
+            while True:
+                line = await self.process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    async_logger.debug(f"Ignoring non-JSON output: {line[:200]!r}")
+                    continue
+                if isinstance(message, list):
+                    for item in message:
+                        await self._dispatch(item)
+                else:
+                    await self._dispatch(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            async_logger.error(f"Reader stopped: {e}")
+        finally:
+            self.is_connected = False
+            self._fail_pending(MCPConnectionError("MCP server closed the connection"))
+    
+    async def _dispatch(self, message: Dict[str, Any]) -> None:
+        if not isinstance(message, dict):
+            return
+        
+        if "method" not in message:
+            future = self._pending.get(message.get("id"))
+            if future is not None and not future.done():
+                future.set_result(message)
+            return
+        
+        method = message["method"]
+        if "id" in message:
+            # Request from the server
+            if method == "ping":
+                await self._write_message({"jsonrpc": "2.0", "id": message["id"], "result": {}})
+            else:
+                await self._write_message({
+                    "jsonrpc": "2.0",
+                    "id": message["id"],
+                    "error": {"code": -32601, "message": f"Method not found: {method}"}
+                })
+            return
+        
+        params = message.get("params") or {}
+        calls = [(handler, (params,)) for handler in self._notification_handlers.get(method, [])]
+        calls += [(handler, (method, params)) for handler in self._notification_handlers.get("*", [])]
+        for handler, handler_args in calls:
+            try:
+                result = handler(*handler_args)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                async_logger.error(f"Notification handler error for {method}: {e}")
+    
+    async def _drain_stderr(self) -> None:
+        try:
+            while True:
+                line = await self.process.stderr.readline()
+                if not line:
+                    break
+                server_logger.debug(line.decode('utf-8', errors='replace').rstrip())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
+    
+    def _fail_pending(self, error: Exception) -> None:
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+    
+    async def initialize(self) -> Optional[Dict]:
+        """
+        Run the initialize handshake and send notifications/initialized
+        
+        Returns:
+            Dict or None: Server information from the initialize result
         """
-        # First, send initialize request
-        init_response = self.send_request("initialize", {
-            "protocolVersion": "2024-11-05",
+        response = await self.request("initialize", {
+            "protocolVersion": MCP_PROTOCOL_VERSION,
             "capabilities": {
                 "tools": {}
             },
@@ -240,20 +846,56 @@ class MCPClient:
             }
         })
         
-        if init_response and "result" in init_response:
-            # Send initialized notification
-            self.send_notification("notifications/initialized", {})
-            
-        return init_response
+        if "result" not in response:
+            async_logger.error(f"Initialize failed: {response.get('error')}")
+            return None
+        
+        await self.notify("notifications/initialized", {})
+        self.server_info = response["result"]
+        return self.server_info
     
-    def __enter__(self):
-        """Context manager entry"""
-        self.start_server()
+    async def list_tools(self) -> Optional[List]:
+        """
+        List available tools from the MCP server
+        
+        Returns:
+            List or None: List of available tools
+        """
+        response = await self.request("tools/list", {})
+        if "result" in response:
+            return response["result"].get("tools", [])
+        return None
+    
+    async def call_tool(self, name: str, arguments: Dict[str, Any] = None, timeout: Optional[float] = None) -> Dict:
+        """
+        Call a tool; by default waits without timeout since tools may wait for the user
+        
+        Returns:
+            Dict: The JSON-RPC response
+        """
+        return await self.request("tools/call", {"name": name, "arguments": arguments or {}}, timeout=timeout)
+    
+    async def call_AI_EXTENSION_tool(self, dummy_param: str = "activate", timeout: Optional[float] = None) -> Optional[List]:
+        """
+        Call the AI_EXTENSION_tool function
+        
+        Returns:
+            List or None: Content from the tool
+        """
+        response = await self.call_tool("AI_EXTENSION_tool", {"random_string": dummy_param}, timeout=timeout)
+        if "result" in response:
+            result = response["result"]
+            if not result.get("isError", True):
+                return result.get("content", [])
+            async_logger.warning(f"Tool returned error: {result}")
+        return None
+    
+    async def __aenter__(self):
+        await self.start()
         return self
     
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit"""
-        self.stop_server()
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
 
 
 def test_mcp_connection() -> bool:
@@ -266,34 +908,34 @@ def test_mcp_connection() -> bool:
     try:
         with MCPClient() as client:
             if not client.is_connected:
-                print("[MCPClient] Failed to connect to server", file=sys.stderr)
+                logger.error("Failed to connect to server")
                 return False
             
             # Test server info
             info = client.get_server_info()
             if info:
-                print(f"[MCPClient] Server info: {info}", file=sys.stderr)
+                logger.info(f"Server info: {info}")
             else:
-                print("[MCPClient] Failed to get server info", file=sys.stderr)
+                logger.error("Failed to get server info")
                 return False
             
             # Test tool listing
-            print("[MCPClient] Requesting tool list...", file=sys.stderr)
+            logger.info("Requesting tool list...")
             tools = client.list_tools()
             if tools:
-                print(f"[MCPClient] Available tools: {[tool['name'] for tool in tools]}", file=sys.stderr)
-                print(f"[MCPClient] Tool count: {len(tools)}", file=sys.stderr)
+                logger.info(f"Available tools: {[tool['name'] for tool in tools]}")
+                logger.info(f"Tool count: {len(tools)}")
                 if tools:
-                    print(f"[MCPClient] First tool details: {tools[0]}", file=sys.stderr)
+                    logger.debug(f"First tool details: {tools[0]}")
             else:
-                print("[MCPClient] No tools available or failed to list tools", file=sys.stderr)
+                logger.warning("No tools available or failed to list tools")
                 return False
             
-            print("[MCPClient] MCP connection test passed!", file=sys.stderr)
+            logger.info("MCP connection test passed!")
             return True
             
     except Exception as e:
-        print(f"[MCPClient] Connection test failed: {e}", file=sys.stderr)
+        logger.error(f"Connection test failed: {e}")
         return False
 
 
@@ -307,70 +949,73 @@ def test_AI_EXTENSION_tool() -> bool:
     try:
         with MCPClient() as client:
             if not client.is_connected:
-                print("[MCPClient] Failed to connect to server", file=sys.stderr)
+                logger.error("Failed to connect to server")
                 return False
             
             # Call the tool
             result = client.call_AI_EXTENSION_tool("activate")
             if result:
-                print(f"[MCPClient] Tool call successful! Result: {result}", file=sys.stderr)
+                logger.info(f"Tool call successful! Result: {result}")
                 return True
             else:
-                print("[MCPClient] Tool call failed or returned no result", file=sys.stderr)
+                logger.error("Tool call failed or returned no result")
                 return False
                 
     except Exception as e:
-        print(f"[MCPClient] Tool call test failed: {e}", file=sys.stderr)
+        logger.error(f"Tool call test failed: {e}")
         return False
 
 
-def test_mcp_connection_and_tools() -> bool:
+def test_mcp_connection_and_tools(pool: Optional[MCPServerPool] = None) -> bool:
     """
     Test MCP server connection and tool calling in a single session
     
+    Args:
+        pool: Lease a pre-warmed server from this pool instead of starting one
+    
     Returns:
         bool: True if both connection and tool calling successful
     """
     try:
-        with MCPClient() as client:
-            if not client.is_connected:
-                print("[MCPClient] Failed to connect to server", file=sys.stderr)
+        with (pool.leased() if pool is not None else MCPClient()) as client:
+            if client is None or not client.is_connected:
+                logger.error("Failed to connect to server")
                 return False
             
             # Test server info
             info = client.get_server_info()
             if info:
-                print(f"[MCPClient] Server info: {info}", file=sys.stderr)
+                logger.info(f"Server info: {info}")
             else:
-                print("[MCPClient] Failed to get server info", file=sys.stderr)
+                logger.error("Failed to get server info")
                 return False
             
             # Test tool listing
-            print("[MCPClient] Requesting tool list...", file=sys.stderr)
+            logger.info("Requesting tool list...")
             tools = client.list_tools()
             if tools:
-                print(f"[MCPClient] Available tools: {[tool['name'] for tool in tools]}", file=sys.stderr)
-                print(f"[MCPClient] Tool count: {len(tools)}", file=sys.stderr)
+                logger.info(f"Available tools: {[tool['name'] for tool in tools]}")
+                logger.info(f"Tool count: {len(tools)}")
                 if tools:
-                    print(f"[MCPClient] First tool details: {tools[0]}", file=sys.stderr)
+                    logger.debug(f"First tool details: {tools[0]}")
             else:
-                print("[MCPClient] No tools available or failed to list tools", file=sys.stderr)
+                logger.warning("No tools available or failed to list tools")
                 return False
             
-            print("[MCPClient] MCP connection test passed!", file=sys.stderr)
+            logger.info("MCP connection test passed!")
             
             # Now test tool calling in the same session
-            print("[MCPClient] Testing tool call in same session...", file=sys.stderr)
+            logger.info("Testing tool call in same session...")
             result = client.call_AI_EXTENSION_tool("activate")
             if result:
-                print(f"[MCPClient] Tool call successful! Result: {result}", file=sys.stderr)
+                logger.info(f"Tool call successful! Result: {result}")
                 return True
             else:
-                print("[MCPClient] Tool call failed or returned no result", file=sys.stderr)
+                logger.error("Tool call failed or returned no result")
                 return False
             
     except Exception as e:
-        print(f"[MCPClient] Test failed: {e}", file=sys.stderr)
+        logger.error(f"Test failed: {e}")
         return False
 
 
@@ -384,12 +1029,49 @@ def call_AI_EXTENSION_tool_via_mcp() -> Optional[List]:
     try:
         with MCPClient() as client:
             if not client.is_connected:
-                print("[MCPClient] Failed to connect to server", file=sys.stderr)
+                logger.error("Failed to connect to server")
                 return None
             
             result = client.call_AI_EXTENSION_tool()
             return result
             
     except Exception as e:
-        print(f"[MCPClient] Error calling AI extension Tool: {e}", file=sys.stderr)
-        return None 
\ No newline at end of file
+        logger.error(f"Error calling AI extension Tool: {e}")
+        return None
+
+
+async def _run_pipelined_requests(count: int) -> bool:
+    async with AsyncMCPClient() as client:
+        if not client.is_connected:
+            async_logger.error("Failed to connect to server")
+            return False
+        
+        info = await client.initialize()
+        if not info:
+            return False
+        async_logger.info(f"Server info: {info.get('serverInfo')}")
+        
+        start = time.perf_counter()
+        results = await asyncio.gather(*(client.list_tools() for _ in range(count)))
+        elapsed = time.perf_counter() - start
+        
+        if any(tools is None for tools in results):
+            async_logger.warning("Some tools/list requests failed")
+            return False
+        
+        async_logger.info(f"{count} concurrent tools/list calls in {elapsed * 1000:.1f} ms")
+        return True
+
+
+def test_mcp_pipelined_requests(count: int = 20) -> bool:
+    """
+    Test many concurrent requests over one connection with AsyncMCPClient
+    
+    Returns:
+        bool: True if every response came back to its caller
+    """
+    try:
+        return asyncio.run(_run_pipelined_requests(count))
+    except Exception as e:
+        async_logger.error(f"Pipelined test failed: {e}")
+        return False
@@ -5,14 +5,26 @@ Auto-detects and inherits MCP server configurations from VS Code and Cursor IDE
 
 import json
 import os
-import sys
+import threading
 from pathlib import Path
 from typing import Dict, Optional, List, Tuple
+from .log import get_logger
+from .metrics import get_metrics
+
+logger = get_logger("MCPConfig")
+
+# Hit/miss của cache parse file config (đọc bởi metrics registry)
+_cache_stats = {"hits": 0, "misses": 0}
+get_metrics().register_cache("mcp_config", lambda: (_cache_stats["hits"], _cache_stats["misses"]))
 
 
 class MCPConfigManager:
     """
     Manages MCP server configuration with auto-detection from VS Code and Cursor IDE
+    
+    Nothing is read in the constructor. The config files are parsed on first
+    use and cached keyed by (path, mtime, size); later lookups only stat the
+    sources and reparse a file when it changed.
     """
     
     def __init__(self):
@@ -22,34 +34,81 @@ class MCPConfigManager:
         self.cursor_mcp_path = self.home_dir / '.cursor' / 'mcp.json'
         self.local_mcp_path = Path(__file__).parent.parent / 'mcp_config.json'
         
-        self.config = self._load_mcp_config()
+        # path -> ((mtime_ns, size), parsed config or None)
+        self._file_cache = {}
+        # Chữ ký (path, mtime_ns, size) của các source ứng với self._config
+        self._config_signature = None
+        self._config = None
+        self._server_config = None
+        self._lock = threading.RLock()
     
-    def _load_mcp_config(self) -> Dict:
+    def _config_sources(self) -> List[Tuple[Path, str]]:
+        return [
+            (self.local_mcp_path, "Local AI extension"),
+            (self.cursor_mcp_path, "Cursor IDE"),
+            (self.vscode_mcp_path, "VS Code")
+        ]
+    
+    @staticmethod
+    def _stat_key(config_path: Path) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) của file, None nếu không tồn tại"""
+        try:
+            stat_result = os.stat(config_path)
+        except OSError:
+            return None
+        return stat_result.st_mtime_ns, stat_result.st_size
+    
+    def _read_cached(self, config_path: Path, stat_key: Tuple[int, int]) -> Optional[Dict]:
+        """Parse file qua cache, chỉ đọc lại khi mtime/size thay đổi"""
+        cached = self._file_cache.get(config_path)
+        if cached is not None and cached[0] == stat_key:
+            _cache_stats["hits"] += 1
+            return cached[1]
+        _cache_stats["misses"] += 1
+        config = self._read_mcp_file(config_path)
+        self._file_cache[config_path] = (stat_key, config)
+        return config
+    
+    def invalidate(self) -> None:
+        """Bỏ toàn bộ cache, lần truy cập sau sẽ đọc lại các file config"""
+        with self._lock:
+            self._file_cache.clear()
+            self._config_signature = None
+            self._config = None
+            self._server_config = None
+    
+    @property
+    def config(self) -> Dict:
+        """Current MCP configuration (reloaded only when a source file changed)"""
+        with self._lock:
+            sources = self._config_sources()
+            signature = tuple((path, self._stat_key(path)) for path, _ in sources)
+            if signature != self._config_signature:
+                self._config = self._load_mcp_config(sources, signature)
+                self._config_signature = signature
+                self._server_config = None
+            return self._config
+    
+    def _load_mcp_config(self, sources: List[Tuple[Path, str]], signature) -> Dict:
         """
         Load MCP configuration with priority: local -> Cursor -> VS Code -> default
         
         Returns:
             Dict: MCP configuration
         """
-        config_sources = [
-            (self.local_mcp_path, "Local AI extension"),
-            (self.cursor_mcp_path, "Cursor IDE"),
-            (self.vscode_mcp_path, "VS Code")
-        ]
-        
-        for config_path, source_name in config_sources:
-            if config_path.exists():
+        for (config_path, source_name), (_, stat_key) in zip(sources, signature):
+            if stat_key is not None:
                 try:
-                    config = self._read_mcp_file(config_path)
+                    config = self._read_cached(config_path, stat_key)
                     if config and 'mcpServers' in config:
-                        print(f"[MCPConfig] Loaded MCP configuration from {source_name}: {config_path}", file=sys.stderr)
+                        logger.info(f"Loaded MCP configuration from {source_name}: {config_path}")
                         return config
                 except Exception as e:
-                    print(f"[MCPConfig] Error reading {source_name} config at {config_path}: {e}", file=sys.stderr)
+                    logger.error(f"Error reading {source_name} config at {config_path}: {e}")
                     continue
         
         # Return default configuration if no valid config found
-        print("[MCPConfig] No valid MCP configuration found, using default", file=sys.stderr)
+        logger.warning("No valid MCP configuration found, using default")
         return self._get_default_config()
     
     def _read_mcp_file(self, config_path: Path) -> Optional[Dict]:
@@ -68,16 +127,16 @@ class MCPConfigManager:
                 
             # Validate basic structure
             if not isinstance(config, dict):
-                print(f"[MCPConfig] Invalid config format in {config_path}: not a dictionary", file=sys.stderr)
+                logger.error(f"Invalid config format in {config_path}: not a dictionary")
                 return None
                 
             return config
             
         except json.JSONDecodeError as e:
-            print(f"[MCPConfig] JSON decode error in {config_path}: {e}", file=sys.stderr)
+            logger.error(f"JSON decode error in {config_path}: {e}")
             return None
         except Exception as e:
-            print(f"[MCPConfig] Error reading {config_path}: {e}", file=sys.stderr)
+            logger.error(f"Error reading {config_path}: {e}")
             return None
     
     def _get_default_config(self) -> Dict:
@@ -106,19 +165,25 @@ class MCPConfigManager:
         Returns:
             Dict or None: Server configuration for ai-extension
         """
-        servers = self.config.get('mcpServers', {})
-        
-        # Look for ai-extension server with various possible names
-        possible_names = ['ai-extension', 'AI_EXTENSION', 'aiextension', 'AI extension']
-        
-        for name in possible_names:
-            if name in servers:
-                server_config = servers[name]
-                if not server_config.get('disabled', False):
-                    return server_config
-        
-        # If not found, return default
-        return self._get_default_config()['mcpServers']['ai-extension']
+        with self._lock:
+            servers = self.config.get('mcpServers', {})
+            if self._server_config is not None:
+                return self._server_config
+            
+            # Look for ai-extension server with various possible names
+            possible_names = ['ai-extension', 'AI_EXTENSION', 'aiextension', 'AI extension']
+            
+            server_config = None
+            for name in possible_names:
+                if name in servers and not servers[name].get('disabled', False):
+                    server_config = servers[name]
+                    break
+            
+            # If not found, return default
+            if server_config is None:
+                server_config = self._get_default_config()['mcpServers']['ai-extension']
+            self._server_config = server_config
+            return server_config
     
     def get_all_servers(self) -> Dict:
         """
@@ -160,7 +225,7 @@ class MCPConfigManager:
             bool: True if created successfully
         """
         if self.local_mcp_path.exists() and not force:
-            print(f"[MCPConfig] Local config already exists at {self.local_mcp_path}", file=sys.stderr)
+            logger.info(f"Local config already exists at {self.local_mcp_path}")
             return True
         
         try:
@@ -188,11 +253,12 @@ class MCPConfigManager:
             with open(self.local_mcp_path, 'w', encoding='utf-8') as f:
                 json.dump(local_config, f, indent=2, ensure_ascii=False)
             
-            print(f"[MCPConfig] Created local MCP config at {self.local_mcp_path}", file=sys.stderr)
+            self.invalidate()
+            logger.info(f"Created local MCP config at {self.local_mcp_path}")
             return True
             
         except Exception as e:
-            print(f"[MCPConfig] Error creating local config: {e}", file=sys.stderr)
+            logger.error(f"Error creating local config: {e}")
             return False
     
     def update_vscode_config(self) -> bool:
@@ -258,11 +324,12 @@ class MCPConfigManager:
             with open(config_path, 'w', encoding='utf-8') as f:
                 json.dump(config, f, indent=2, ensure_ascii=False)
             
-            print(f"[MCPConfig] Updated {ide_name} MCP config at {config_path}", file=sys.stderr)
+            self.invalidate()
+            logger.info(f"Updated {ide_name} MCP config at {config_path}")
             return True
             
         except Exception as e:
-            print(f"[MCPConfig] Error updating {ide_name} config: {e}", file=sys.stderr)
+            logger.error(f"Error updating {ide_name} config: {e}")
             return False
     
     def get_config_status(self) -> Dict[str, bool]:
@@ -285,7 +352,7 @@ class MCPConfigManager:
         Returns:
             bool: True if setup was successful
         """
-        print("[MCPConfig] Starting auto-setup...", file=sys.stderr)
+        logger.info("Starting auto-setup...")
         
         success = True
         
@@ -303,15 +370,39 @@ class MCPConfigManager:
                 success = False
         
         if success:
-            print("[MCPConfig] Auto-setup completed successfully", file=sys.stderr)
+            logger.info("Auto-setup completed successfully")
         else:
-            print("[MCPConfig] Auto-setup completed with some errors", file=sys.stderr)
+            logger.warning("Auto-setup completed with some errors")
         
         return success
 
 
-# Global instance
-mcp_config_manager = MCPConfigManager()
+# Shared instance, created on first use (see get_mcp_config_manager)
+_mcp_config_manager = None
+_mcp_config_manager_lock = threading.Lock()
+
+
+def get_mcp_config_manager() -> MCPConfigManager:
+    """
+    Get the shared MCPConfigManager (created lazily so importing the package
+    does not touch any config file)
+    
+    Returns:
+        MCPConfigManager: The shared instance
+    """
+    global _mcp_config_manager
+    if _mcp_config_manager is None:
+        with _mcp_config_manager_lock:
+            if _mcp_config_manager is None:
+                _mcp_config_manager = MCPConfigManager()
+    return _mcp_config_manager
+
+
+def __getattr__(name):
+    # Giữ tương thích với `from .mcp_config import mcp_config_manager`
+    if name == 'mcp_config_manager':
+        return get_mcp_config_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_mcp_server_config() -> Dict:
@@ -321,7 +412,7 @@ def get_mcp_server_config() -> Dict:
     Returns:
         Dict: MCP server configuration
     """
-    return mcp_config_manager.get_AI_EXTENSION_server_config()
+    return get_mcp_config_manager().get_AI_EXTENSION_server_config()
 
 
 def setup_mcp_config() -> bool:
@@ -331,7 +422,7 @@ def setup_mcp_config() -> bool:
     Returns:
         bool: True if setup was successful
     """
-    return mcp_config_manager.auto_setup()
+    return get_mcp_config_manager().auto_setup()
 
 
 def get_server_command() -> tuple[str, list[str]]:
@@ -341,4 +432,4 @@ def get_server_command() -> tuple[str, list[str]]:
     Returns:
         tuple: (command, args) for running the MCP server
     """
-    return mcp_config_manager.get_server_command_and_args() 
\ No newline at end of file
+    return get_mcp_config_manager().get_server_command_and_args() 
\ No newline at end of file
@@ -0,0 +1,339 @@
+# Memory profiling for AI extension Tool
+"""
+Opt-in tracemalloc profiler around one tool call
+
+Enabled by the AI_EXTENSION_MEMPROFILE environment variable (a JSONL file
+path, or "1" for the default file) or by configure_memory_profiling(). While
+enabled, tracemalloc runs for the whole session, so allocations kept alive
+from one call to the next show up as retained memory and as growth of the
+traced total at the start of each call (session_growth_kb, relative to the
+first call; the previous response has been released by then).
+
+Stages are the tracing spans (ui.dialog_construct, ui.wait_for_user,
+image.process_images / image.process_image, response.build_text, tool.format_response,
+response.serialize...) observed through tracing.add_span_hook(), so the
+profiler works whether tracing is on or off. Each call produces a report:
+
+    peak / net memory per stage, peak for the whole call,
+    top allocation sites still alive after the call (snapshot diff after gc;
+    includes the returned response, reported separately as response_kb),
+    object types whose instance count grew,
+    RSS before/after (from /proc when available).
+
+Reports are appended to the JSONL log and the last MEMPROFILE_HISTORY are
+kept for memory_report() (served as the debug://memory MCP resource).
+tracemalloc is process-wide: allocations from other threads during a call
+are counted too.
+"""
+
+import collections
+import contextlib
+import gc
+import json
+import os
+import threading
+import time
+import tracemalloc
+from .tracing import add_span_hook, remove_span_hook
+from .log import get_logger
+from ..constants import (
+    MEMPROFILE_ENV_VAR,
+    MEMPROFILE_DEFAULT_FILE,
+    MEMPROFILE_TOP_N,
+    MEMPROFILE_HISTORY,
+    MEMPROFILE_FRAMES
+)
+
+logger = get_logger("MemoryProfiler")
+
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, __file__),
+)
+
+
+def _read_rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _kb(value):
+    return round(value / 1024, 1)
+
+
+class _Frame:
+    """Một stage đang chạy: traced memory lúc bắt đầu và peak lớn nhất đã thấy"""
+
+    __slots__ = ("name", "start_bytes", "max_peak", "start_time")
+
+    def __init__(self, name, start_bytes):
+        self.name = name
+        self.start_bytes = start_bytes
+        self.max_peak = start_bytes
+        self.start_time = time.perf_counter()
+
+
+class _StageContext:
+    __slots__ = ("profiler", "name", "frame")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.frame = None
+
+    def __enter__(self):
+        self.frame = self.profiler._enter_stage(self.name)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.frame is not None:
+            self.profiler._exit_stage(self.frame)
+        return False
+
+
+class MemoryProfiler:
+    """Đo memory theo stage cho từng tool call và ghi report"""
+
+    def __init__(self, path=None, top_n=MEMPROFILE_TOP_N, history=MEMPROFILE_HISTORY, count_objects=True):
+        """
+        Args:
+            path: File JSONL nhận một report mỗi call (None = không ghi file)
+            top_n: Số allocation site / object type trong mỗi report
+            history: Số report giữ trong bộ nhớ
+            count_objects: Đếm object theo type trước/sau call (chậm với heap lớn)
+        """
+        self.path = os.path.abspath(os.path.expanduser(path)) if path else None
+        self.top_n = top_n
+        self.count_objects = count_objects
+        self.reports = collections.deque(maxlen=history)
+        self.calls = 0
+        self.baseline_bytes = None
+        self.response_bytes = 0
+        self._stages = {}
+        self._stack = None
+        self._thread = None
+        self._call_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(MEMPROFILE_FRAMES)
+
+    def stage(self, name):
+        """Span hook: đo stage nếu đang trong một call được profile (cùng thread)"""
+        return _StageContext(self, name)
+
+    def _enter_stage(self, name):
+        stack = self._stack
+        if stack is None or self._thread != threading.get_ident():
+            return None
+        current, peak = tracemalloc.get_traced_memory()
+        parent = stack[-1]
+        parent.max_peak = max(parent.max_peak, peak)
+        tracemalloc.reset_peak()
+        frame = _Frame(name, current)
+        stack.append(frame)
+        return frame
+
+    def _exit_stage(self, frame):
+        stack = self._stack
+        if stack is None or not stack or stack[-1] is not frame:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        stack.pop()
+        frame.max_peak = max(frame.max_peak, peak)
+        stack[-1].max_peak = max(stack[-1].max_peak, frame.max_peak)
+
+        stats = self._stages.setdefault(frame.name, {"count": 0, "ms": 0.0, "peak_kb": 0.0, "net_kb": 0.0})
+        stats["count"] += 1
+        stats["ms"] = round(stats["ms"] + (time.perf_counter() - frame.start_time) * 1000, 3)
+        stats["peak_kb"] = max(stats["peak_kb"], _kb(frame.max_peak - frame.start_bytes))
+        stats["net_kb"] = round(stats["net_kb"] + _kb(current - frame.start_bytes), 1)
+
+    def record_response(self, size_bytes):
+        """Ghi kích thước response trả về (vẫn còn sống khi call kết thúc)"""
+        self.response_bytes = size_bytes
+
+    def _count_objects(self):
+        return collections.Counter(type(obj).__name__ for obj in gc.get_objects())
+
+    @contextlib.contextmanager
+    def profile_call(self, name="mcp.tool_call"):
+        """Profile một tool call; call lồng nhau hoặc song song không được profile riêng"""
+        if not self._call_lock.acquire(blocking=False):
+            yield None
+            return
+        try:
+            self.start()
+            gc.collect()
+            before = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+            objects_before = self._count_objects() if self.count_objects else None
+            rss_before = _read_rss_bytes()
+            start_time = time.perf_counter()
+            start_traced = tracemalloc.get_traced_memory()[0]
+            if self.baseline_bytes is None:
+                self.baseline_bytes = start_traced
+
+            tracemalloc.reset_peak()
+            root = _Frame(name, tracemalloc.get_traced_memory()[0])
+            self._stages = {}
+            self.response_bytes = 0
+            self._stack = [root]
+            self._thread = threading.get_ident()
+            try:
+                yield self
+            finally:
+                root.max_peak = max(root.max_peak, tracemalloc.get_traced_memory()[1])
+                self._stack = None
+                self._thread = None
+                self._finish_call(name, root, before, objects_before, rss_before, start_time, start_traced)
+        finally:
+            self._call_lock.release()
+
+    def _finish_call(self, name, root, before, objects_before, rss_before, start_time, start_traced):
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        gc.collect()
+        # Đếm object trước khi tạo snapshot/diff để không tính object của chính profiler
+        growth = self._count_objects() if objects_before is not None else None
+        after = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        current = tracemalloc.get_traced_memory()[0]
+        rss_after = _read_rss_bytes()
+
+        diff = [stat for stat in after.compare_to(before, "lineno") if stat.size_diff > 0]
+        top_allocations = [
+            {
+                "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_kb": _kb(stat.size_diff),
+                "count": stat.count_diff
+            }
+            for stat in diff[:self.top_n]
+        ]
+
+        retained_types = []
+        if growth is not None:
+            growth.subtract(objects_before)
+            retained_types = [
+                {"type": type_name, "count": count}
+                for type_name, count in growth.most_common(self.top_n) if count > 0
+            ]
+
+        self.calls += 1
+        report = {
+            "timestamp": time.time(),
+            "call": self.calls,
+            "name": name,
+            "duration_ms": round(duration_ms, 3),
+            "peak_kb": _kb(root.max_peak - root.start_bytes),
+            "retained_kb": _kb(sum(stat.size_diff for stat in diff)),
+            "response_kb": _kb(self.response_bytes),
+            "traced_kb": _kb(current),
+            "session_growth_kb": _kb(start_traced - self.baseline_bytes),
+            "rss_kb": _kb(rss_after) if rss_after is not None else None,
+            "rss_delta_kb": _kb(rss_after - rss_before) if rss_before is not None and rss_after is not None else None,
+            "stages": self._stages,
+            "top_allocations": top_allocations,
+            "retained_types": retained_types
+        }
+        self.reports.append(report)
+        self._write(report)
+
+    def _write(self, report):
+        if not self.path:
+            return
+        try:
+            with self._write_lock:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(report, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.error(f"Không thể ghi report vào {self.path}: {str(e)}")
+
+    def summary(self):
+        """Tổng hợp cho debug resource: tăng trưởng traced memory qua cả session + các report gần nhất"""
+        current = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        return {
+            "enabled": True,
+            "calls": self.calls,
+            "log_file": self.path,
+            "traced_kb": _kb(current),
+            "baseline_kb": _kb(self.baseline_bytes) if self.baseline_bytes is not None else None,
+            "session_growth_kb": _kb(current - self.baseline_bytes) if self.baseline_bytes is not None else None,
+            "reports": list(self.reports)
+        }
+
+
+_profiler = None
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def configure_memory_profiling(path=None, **options):
+    """
+    Bật memory profiling
+
+    Args:
+        path (str): File JSONL cho report mỗi call (mặc định MEMPROFILE_DEFAULT_FILE)
+        **options: top_n, history, count_objects (xem MemoryProfiler)
+
+    Returns:
+        MemoryProfiler: Profiler đang dùng
+    """
+    global _profiler, _configured
+    with _configure_lock:
+        _configured = True
+        if _profiler is not None:
+            remove_span_hook(_profiler.stage)
+        _profiler = MemoryProfiler(path or MEMPROFILE_DEFAULT_FILE, **options)
+        _profiler.start()
+        add_span_hook(_profiler.stage)
+        return _profiler
+
+
+def disable_memory_profiling():
+    """Tắt memory profiling (dừng tracemalloc nếu profiler đã bật nó)"""
+    global _profiler, _configured
+    with _configure_lock:
+        _configured = True
+        if _profiler is not None:
+            remove_span_hook(_profiler.stage)
+            _profiler = None
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+
+def _configure_from_env():
+    global _configured
+    value = os.environ.get(MEMPROFILE_ENV_VAR, "").strip()
+    if not value or value.lower() in ("0", "false", "off"):
+        _configured = True
+    elif value.lower() in ("1", "true", "on"):
+        configure_memory_profiling()
+    else:
+        configure_memory_profiling(path=value)
+
+
+def get_memory_profiler():
+    """Profiler đang bật (None nếu memory profiling tắt)"""
+    if not _configured:
+        _configure_from_env()
+    return _profiler
+
+
+def profile_call(name="mcp.tool_call"):
+    """Context manager profile một tool call (no-op khi tắt)"""
+    profiler = get_memory_profiler()
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.profile_call(name)
+
+
+def memory_report():
+    """Nội dung debug resource: summary của profiler hoặc {"enabled": False}"""
+    profiler = get_memory_profiler()
+    if profiler is None:
+        return {"enabled": False, "hint": f"Set {MEMPROFILE_ENV_VAR}=1 (or a JSONL path) to enable"}
+    return profiler.summary()
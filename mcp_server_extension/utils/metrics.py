@@ -0,0 +1,254 @@
+# Metrics for AI extension Tool
+"""
+In-process counters and histograms for the server
+
+Always on - recording is a dict update under a lock. Instrumented points:
+
+    ai_extension_tool_calls_total{outcome}          tool calls (ok / error)
+    ai_extension_tool_call_duration_seconds         whole call, including the wait for the user
+    ai_extension_ui_wait_seconds                    time spent waiting for the user
+    ai_extension_response_bytes_total               bytes of serialized response content
+    ai_extension_images_processed_total             images attached to responses
+    ai_extension_image_bytes_total                  bytes of those images
+    ai_extension_config_writes_total{result}        config.json writes (ok / error)
+    ai_extension_cache_hits_total{cache}            cache stats, read from the caches on demand
+    ai_extension_cache_misses_total{cache}
+
+snapshot() is served as the debug://metrics MCP resource; render_prometheus()
+as GET /metrics when the server runs on an HTTP transport.
+"""
+
+import collections
+import math
+import threading
+import time
+from typing import Callable, Dict, Tuple
+from ..constants import METRICS_PREFIX, METRICS_RESERVOIR_SIZE, METRICS_LATENCY_BUCKETS
+
+
+def _label_key(labels: Dict) -> Tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: Tuple, extra: Tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Counter:
+    """Counter có label (mỗi tổ hợp label một giá trị)"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str = ""):
+        self.name = name
+        self.help = help
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def snapshot(self):
+        with self._lock:
+            values = dict(self._values)
+        if list(values) in ([], [()]):
+            return values.get((), 0)
+        return {",".join(f"{k}={v}" for k, v in key): value for key, value in values.items()}
+
+    def render(self):
+        with self._lock:
+            values = dict(self._values) or {(): 0}
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in values.items()]
+
+
+class Histogram:
+    """Histogram với bucket kiểu Prometheus + reservoir các giá trị gần nhất để tính percentile"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str = "", buckets=METRICS_LATENCY_BUCKETS,
+                 reservoir: int = METRICS_RESERVOIR_SIZE):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts = [0] * len(self.buckets)
+        self._count = 0
+        self._sum = 0.0
+        self._recent = collections.deque(maxlen=reservoir)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._count += 1
+            self._sum += value
+            self._recent.append(value)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[i] += 1
+                    break
+
+    def time(self):
+        """Context manager đo thời gian (giây) của một khối code"""
+        return _Timer(self)
+
+    def snapshot(self):
+        with self._lock:
+            count, total = self._count, self._sum
+            recent = sorted(self._recent)
+        return {
+            "count": count,
+            "sum": round(total, 6),
+            "avg": round(total / count, 6) if count else None,
+            "max_recent": recent[-1] if recent else None,
+            "p50": _percentile(recent, 0.50),
+            "p95": _percentile(recent, 0.95),
+            "p99": _percentile(recent, 0.99)
+        }
+
+    def render(self):
+        with self._lock:
+            counts, count, total = list(self._counts), self._count, self._sum
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'{self.name}_bucket{{le="{_format_value(float(bound))}"}} {cumulative}')
+        lines.append(f"{self.name}_sum {_format_value(total)}")
+        lines.append(f"{self.name}_count {count}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    """Tập metric của process; cache stats được đọc từ callback khi snapshot/render"""
+
+    def __init__(self, prefix: str = METRICS_PREFIX):
+        self.prefix = prefix
+        self.started_at = time.time()
+        self._metrics = {}
+        self._caches: Dict[str, Callable[[], Tuple[int, int]]] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help, **kwargs):
+        full_name = f"{self.prefix}_{name}"
+        with self._lock:
+            metric = self._metrics.get(full_name)
+            if metric is None:
+                metric = cls(full_name, help, **kwargs)
+                self._metrics[full_name] = metric
+            return metric
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get_or_create(Counter, name, help)
+
+    def histogram(self, name: str, help: str = "", **kwargs) -> Histogram:
+        return self._get_or_create(Histogram, name, help, **kwargs)
+
+    def register_cache(self, name: str, stats: Callable[[], Tuple[int, int]]) -> None:
+        """
+        Đăng ký một cache
+
+        Args:
+            name: Tên cache (label cache="...")
+            stats: Hàm trả về (hits, misses), gọi mỗi lần snapshot/render
+        """
+        with self._lock:
+            self._caches[name] = stats
+
+    def _cache_stats(self):
+        with self._lock:
+            caches = dict(self._caches)
+        result = {}
+        for name, stats in caches.items():
+            try:
+                hits, misses = stats()
+            except Exception:
+                continue
+            total = hits + misses
+            result[name] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / total, 4) if total else None
+            }
+        return result
+
+    def snapshot(self) -> Dict:
+        """Tất cả metric dạng dict (nội dung debug://metrics)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        prefix_len = len(self.prefix) + 1
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "metrics": {metric.name[prefix_len:]: metric.snapshot() for metric in metrics},
+            "caches": self._cache_stats()
+        }
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            if metric.help:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+
+        caches = self._cache_stats()
+        for field in ("hits", "misses"):
+            name = f"{self.prefix}_cache_{field}_total"
+            lines.append(f"# HELP {name} Cache {field} by cache")
+            lines.append(f"# TYPE {name} counter")
+            for cache_name, stats in caches.items():
+                lines.append(f'{name}{{cache="{cache_name}"}} {stats[field]}')
+
+        name = f"{self.prefix}_uptime_seconds"
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {_format_value(round(time.time() - self.started_at, 3))}")
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    return _registry
@@ -0,0 +1,120 @@
+# Workspace name index for AI extension Tool
+import fnmatch
+import os
+import re
+from ..constants import TREE_INDEX_MAX_ENTRIES
+from .file_utils import normalize_path_unicode
+from .log import get_logger
+
+logger = get_logger("NameIndex")
+
+_GLOB_CHARS = re.compile(r'[*?\[]')
+
+
+class NameIndex:
+    """
+    Danh sách phẳng mọi entry (không bị ignore) trong workspace, dùng cho live filter.
+
+    Tên được lưu sẵn ở dạng casefold nên mỗi lần lọc chỉ là một lượt so khớp
+    chuỗi, không cần chạm tới disk.
+    """
+
+    def __init__(self, root_path):
+        self.root_path = os.path.normpath(root_path)
+        self.paths = []
+        self.names = []
+        self.truncated = False
+
+    def __len__(self):
+        return len(self.paths)
+
+    def add(self, path, name):
+        self.paths.append(path)
+        self.names.append(name.casefold())
+
+    def match(self, query):
+        """
+        Tìm các entry có tên khớp query (substring không phân biệt hoa thường,
+        hoặc glob nếu query có *, ? hoặc [)
+
+        Returns:
+            tuple: (matches theo thứ tự index, visible set = matches + các thư mục cha)
+        """
+        query = normalize_path_unicode(query.strip()).casefold()
+        if not query:
+            return [], set()
+
+        if _GLOB_CHARS.search(query):
+            regex = re.compile(fnmatch.translate(query))
+            matches = [path for path, name in zip(self.paths, self.names) if regex.match(name)]
+        else:
+            matches = [path for path, name in zip(self.paths, self.names) if query in name]
+
+        visible = set()
+        for path in matches:
+            while path not in visible:
+                visible.add(path)
+                if path == self.root_path:
+                    break
+                parent = os.path.dirname(path)
+                if parent == path:
+                    break
+                path = parent
+        visible.add(self.root_path)
+        return matches, visible
+
+
+def build_name_index(root_path, ignore_rules=None, is_cancelled=None, max_entries=TREE_INDEX_MAX_ENTRIES):
+    """
+    Duyệt workspace (breadth-first) để build NameIndex.
+    Bỏ qua hidden entries, không đi vào thư mục bị ignore hoặc symlink (tránh vòng lặp).
+
+    Returns:
+        NameIndex: index đã build, None nếu bị hủy giữa chừng
+    """
+    index = NameIndex(root_path)
+    pending = [index.root_path]
+
+    while pending:
+        if is_cancelled is not None and is_cancelled():
+            return None
+
+        next_level = []
+        for dir_path in pending:
+            entries = []
+            symlinks = set()
+            try:
+                with os.scandir(dir_path) as iterator:
+                    for entry in iterator:
+                        if entry.name.startswith('.'):
+                            continue
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        name = normalize_path_unicode(entry.name)
+                        if is_dir and entry.is_symlink():
+                            symlinks.add(name)
+                        entries.append((name, is_dir))
+            except OSError as e:
+                if not isinstance(e, FileNotFoundError):
+                    logger.warning(f"Không thể đọc thư mục {dir_path}: {str(e)}")
+                continue
+
+            if ignore_rules is not None:
+                entries = ignore_rules.filter_entries(dir_path, entries)
+
+            for name, is_dir in entries:
+                path = os.path.join(dir_path, name)
+                index.add(path, name)
+                if is_dir and name not in symlinks:
+                    next_level.append(path)
+                if len(index) >= max_entries:
+                    index.truncated = True
+                    return index
+
+            if is_cancelled is not None and is_cancelled():
+                return None
+        pending = next_level
+
+    return index
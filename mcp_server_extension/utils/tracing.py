@@ -0,0 +1,324 @@
+# Latency tracing for AI extension Tool
+"""
+Span-based tracing of one tool invocation
+
+Tracing is off by default and then span() returns a shared no-op context, so
+the instrumented code only pays for one global lookup. It is enabled by the
+AI_EXTENSION_TRACE environment variable (a JSONL file path, "1" for the
+default file, or "otel" to use an installed OpenTelemetry SDK) or by calling
+configure_tracing().
+
+JSONL records follow the OpenTelemetry span shape (traceId, spanId,
+parentSpanId, startTimeUnixNano, endTimeUnixNano, attributes, status) so they
+can be loaded by OTel tooling. Spans opened with human=True (waiting for the
+user) are summed per trace; the root span gets ai_extension.human_wait_ms and
+ai_extension.machine_ms so machine overhead can be separated from think time.
+
+Other subsystems (the memory profiler) can observe the same stage boundaries
+with add_span_hook(); hooks run even when tracing itself is off.
+"""
+
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from ..constants import TRACE_ENV_VAR, TRACE_DEFAULT_FILE, TRACE_SERVICE_NAME
+from .log import get_logger
+
+logger = get_logger("Tracing")
+
+HUMAN_WAIT_ATTRIBUTE = "ai_extension.human_wait"
+
+_current_span = contextvars.ContextVar("ai_extension_current_span", default=None)
+
+
+class _NoopSpan:
+    """Span dùng khi tracing tắt - mọi thao tác đều không làm gì"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+    def add_event(self, name, attributes=None):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """Một span đang chạy; kết thúc (và được export) khi thoát context"""
+
+    __slots__ = (
+        "tracer", "name", "trace_id", "span_id", "parent", "attributes", "events",
+        "start_ns", "end_ns", "status", "human", "human_wait_ns", "_token"
+    )
+
+    def __init__(self, tracer, name, attributes=None, human=False):
+        self.tracer = tracer
+        self.name = name
+        self.parent = _current_span.get()
+        self.trace_id = self.parent.trace_id if self.parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.attributes = dict(attributes or {})
+        self.events = []
+        self.start_ns = 0
+        self.end_ns = 0
+        self.status = ("OK", "")
+        self.human = human
+        self.human_wait_ns = 0
+        self._token = None
+        if human:
+            self.attributes[HUMAN_WAIT_ATTRIBUTE] = True
+
+    @property
+    def root(self):
+        span = self
+        while span.parent is not None:
+            span = span.parent
+        return span
+
+    @property
+    def duration_ns(self):
+        return (self.end_ns or time.time_ns()) - self.start_ns
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes):
+        self.attributes.update(attributes)
+
+    def add_event(self, name, attributes=None):
+        self.events.append({
+            "name": name,
+            "timeUnixNano": time.time_ns(),
+            "attributes": dict(attributes or {})
+        })
+
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.status = ("ERROR", f"{exc_type.__name__}: {exc_val}")
+
+        if self.human and self.parent is not None:
+            self.root.human_wait_ns += self.duration_ns
+        if self.parent is None:
+            human_ms = self.human_wait_ns / 1e6
+            self.attributes["ai_extension.human_wait_ms"] = round(human_ms, 3)
+            self.attributes["ai_extension.machine_ms"] = round(self.duration_ns / 1e6 - human_ms, 3)
+
+        self.tracer.export(self)
+        return False
+
+    def to_dict(self):
+        """Record theo dạng span của OpenTelemetry"""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent.span_id if self.parent is not None else "",
+            "name": self.name,
+            "kind": "INTERNAL",
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round(self.duration_ns / 1e6, 3),
+            "attributes": self.attributes,
+            "events": self.events,
+            "status": {"code": self.status[0], "message": self.status[1]},
+            "resource": {"service.name": TRACE_SERVICE_NAME, "process.pid": os.getpid()}
+        }
+
+
+class JsonlTracer:
+    """Ghi mỗi span đã kết thúc thành một dòng JSON trong file trace"""
+
+    def __init__(self, path):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self._lock = threading.Lock()
+
+    def start_span(self, name, attributes=None, human=False):
+        return Span(self, name, attributes, human)
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n"
+        try:
+            with self._lock:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+        except OSError as e:
+            logger.error(f"Không thể ghi trace vào {self.path}: {str(e)}")
+
+
+class OpenTelemetryTracer:
+    """Chuyển span sang OpenTelemetry SDK đã được cấu hình trong process"""
+
+    def __init__(self):
+        from opentelemetry import trace
+        self._tracer = trace.get_tracer(TRACE_SERVICE_NAME)
+
+    @contextlib.contextmanager
+    def start_span(self, name, attributes=None, human=False):
+        attributes = dict(attributes or {})
+        if human:
+            attributes[HUMAN_WAIT_ATTRIBUTE] = True
+        with self._tracer.start_as_current_span(name, attributes=attributes) as otel_span:
+            yield otel_span
+
+
+class _HookedSpan:
+    """Chạy các span hook (context manager) quanh span thật hoặc no-op span"""
+
+    __slots__ = ("_inner", "_hooks")
+
+    def __init__(self, inner, hooks):
+        self._inner = inner
+        self._hooks = hooks
+
+    def __enter__(self):
+        for hook in self._hooks:
+            hook.__enter__()
+        return self._inner.__enter__()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            return self._inner.__exit__(exc_type, exc_val, exc_tb)
+        finally:
+            for hook in reversed(self._hooks):
+                hook.__exit__(exc_type, exc_val, exc_tb)
+
+
+_tracer = None
+_configured = False
+_configure_lock = threading.Lock()
+_span_hooks = ()
+
+
+def add_span_hook(hook):
+    """
+    Đăng ký hook quan sát mọi span
+
+    Args:
+        hook: Callable(name) -> context manager, được enter/exit cùng span
+    """
+    global _span_hooks
+    with _configure_lock:
+        if hook not in _span_hooks:
+            _span_hooks = _span_hooks + (hook,)
+
+
+def remove_span_hook(hook):
+    global _span_hooks
+    with _configure_lock:
+        _span_hooks = tuple(h for h in _span_hooks if h is not hook)
+
+
+def configure_tracing(path=None, exporter="jsonl"):
+    """
+    Bật tracing
+
+    Args:
+        path (str): File JSONL (mặc định TRACE_DEFAULT_FILE)
+        exporter (str): "jsonl" hoặc "otel" (cần package opentelemetry)
+
+    Returns:
+        bool: True nếu tracing đã được bật
+    """
+    global _tracer, _configured
+    with _configure_lock:
+        _configured = True
+        if exporter == "otel":
+            try:
+                _tracer = OpenTelemetryTracer()
+            except ImportError:
+                logger.warning("opentelemetry chưa được cài, dùng JSONL exporter")
+                _tracer = JsonlTracer(path or TRACE_DEFAULT_FILE)
+        else:
+            _tracer = JsonlTracer(path or TRACE_DEFAULT_FILE)
+        return True
+
+
+def disable_tracing():
+    """Tắt tracing (span() trở lại no-op)"""
+    global _tracer, _configured
+    with _configure_lock:
+        _tracer = None
+        _configured = True
+
+
+def _configure_from_env():
+    global _configured
+    value = os.environ.get(TRACE_ENV_VAR, "").strip()
+    if not value or value.lower() in ("0", "false", "off"):
+        _configured = True
+        return
+    if value.lower() == "otel":
+        configure_tracing(exporter="otel")
+    elif value.lower() in ("1", "true", "on", "jsonl"):
+        configure_tracing()
+    else:
+        configure_tracing(path=value)
+
+
+def is_tracing_enabled():
+    if not _configured:
+        _configure_from_env()
+    return _tracer is not None
+
+
+def span(name, attributes=None, human=False):
+    """
+    Context manager đo một giai đoạn
+
+    Args:
+        name (str): Tên span, ví dụ "ui.dialog_construct"
+        attributes (dict): Attributes gắn vào span
+        human (bool): Span là thời gian chờ người dùng (không tính vào machine time)
+    """
+    if not _configured:
+        _configure_from_env()
+    inner = _NOOP_SPAN if _tracer is None else _tracer.start_span(name, attributes, human)
+    if _span_hooks:
+        return _HookedSpan(inner, [hook(name) for hook in _span_hooks])
+    return inner
+
+
+def traced(name=None, human=False):
+    """Decorator: chạy cả hàm trong một span (mặc định tên là module.function)"""
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, human=human):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span():
+    """Span đang active (no-op span nếu tracing tắt hoặc không có span nào)"""
+    if _tracer is None:
+        return _NOOP_SPAN
+    if isinstance(_tracer, OpenTelemetryTracer):
+        from opentelemetry import trace
+        return trace.get_current_span()
+    return _current_span.get() or _NOOP_SPAN
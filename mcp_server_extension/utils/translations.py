@@ -11,6 +11,8 @@ TRANSLATIONS = {
         "attach_btn": "Attach file",
         "clear_selected_btn": "Clear Selected",
         "clear_all_btn": "Clear All",
+        "recent_btn": "Recent",
+        "recent_tooltip": "Restore a set of files recently sent from this workspace",
         "attach_image_btn": "Attach Image",
         "clear_images_btn": "Clear Images",
         "save_image_btn": "Save Image",
@@ -19,7 +21,17 @@ TRANSLATIONS = {
         "continue_checkbox": "Continue conversation",
         "continue_warning": "NOTE: If continue conversation is checked, Agent MUST call this tool again!",
         "send_btn": "Send",
-        "close_btn": "Close"
+        "close_btn": "Close",
+        "select_all_in_folder": "Select all in folder",
+        "deselect_all_in_folder": "Deselect all in folder",
+        "select_matching": "Select files matching pattern...",
+        "select_matching_prompt": "Glob pattern for files under '{folder}' (e.g. *.py or src/*.ts):",
+        "invalid_selection_batch_msg": "{count} item(s) could not be selected:\n{errors}",
+        "tree_load_more": "Load {count} more...",
+        "tree_filter_placeholder": "Filter by name (e.g. config or *.py)",
+        "exclude_from_tree": "Hide from tree",
+        "edit_exclude_patterns": "Edit exclude patterns...",
+        "edit_exclude_patterns_prompt": "Patterns hidden from the tree, one per line (.gitignore syntax, relative to the workspace):"
     },
     "vi": {
         "window_title": "AI Interactive Tool",
@@ -29,6 +41,8 @@ TRANSLATIONS = {
         "attach_btn": "Đính kèm tệp",
         "clear_selected_btn": "Xóa đã chọn",
         "clear_all_btn": "Xóa tất cả",
+        "recent_btn": "Gần đây",
+        "recent_tooltip": "Khôi phục một bộ tệp đã gửi gần đây từ workspace này",
         "attach_image_btn": "Đính kèm ảnh",
         "clear_images_btn": "Xóa ảnh",
         "save_image_btn": "Lưu ảnh",
@@ -37,7 +51,17 @@ TRANSLATIONS = {
         "continue_checkbox": "Tiếp tục trò chuyện",
         "continue_warning": "LƯU Ý: Nếu chọn tiếp tục trò chuyện, Agent PHẢI gọi lại công cụ này!",
         "send_btn": "Gửi",
-        "close_btn": "Đóng"
+        "close_btn": "Đóng",
+        "select_all_in_folder": "Chọn tất cả trong thư mục",
+        "deselect_all_in_folder": "Bỏ chọn tất cả trong thư mục",
+        "select_matching": "Chọn các tệp khớp mẫu...",
+        "select_matching_prompt": "Mẫu glob cho các tệp trong '{folder}' (ví dụ *.py hoặc src/*.ts):",
+        "invalid_selection_batch_msg": "Không thể chọn {count} mục:\n{errors}",
+        "tree_load_more": "Tải thêm {count} mục...",
+        "tree_filter_placeholder": "Lọc theo tên (ví dụ config hoặc *.py)",
+        "exclude_from_tree": "Ẩn khỏi cây thư mục",
+        "edit_exclude_patterns": "Sửa mẫu loại trừ...",
+        "edit_exclude_patterns_prompt": "Các mẫu bị ẩn khỏi cây thư mục, mỗi dòng một mẫu (cú pháp .gitignore, tính từ workspace):"
     }
 }
 
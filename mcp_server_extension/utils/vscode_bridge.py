@@ -0,0 +1,292 @@
+"""
+IPC bridge between the MCP server and the VS Code extension UI
+Client side of a local socket (Unix domain socket / Windows named pipe) opened by the extension
+
+Wire format - every frame is a 9 byte header followed by the payload:
+
+    type (uint8) | request id (uint32, big endian) | payload length (uint32, big endian)
+
+    FRAME_JSON (1)    UTF-8 JSON object
+    FRAME_BINARY (2)  raw bytes (one attached image)
+
+Conversation for one tool call (all frames carry the same request id):
+
+    server -> extension   JSON {"type": "prompt", "protocol": 1, "workspace": ..., "language": ...}
+    extension -> server   JSON {"type": "response", "text": ..., "attached_files": [...],
+                                "continue_chat": bool, "language": ...,
+                                "images": [{"media_type": ..., "filename": ..., "size": n}, ...]}
+                          then one FRAME_BINARY per entry of "images", in order
+                     or   JSON {"type": "cancelled"}            (user dismissed the prompt)
+                     or   JSON {"type": "error", "message": ...}
+    server -> extension   JSON {"type": "cancel"}               (tool call cancelled / timed out)
+
+Images travel as binary frames, never as base64 inside JSON. Frames whose
+request id is not the one in flight (late answers to a cancelled prompt) are
+dropped.
+"""
+
+import atexit
+import itertools
+import json
+import os
+import select
+import socket
+import struct
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+from ..constants import (
+    VSCODE_BRIDGE_ENV_VAR,
+    VSCODE_BRIDGE_NAME,
+    VSCODE_BRIDGE_CONNECT_TIMEOUT,
+    VSCODE_BRIDGE_MAX_FRAME,
+    VSCODE_BRIDGE_POLL_INTERVAL
+)
+from .log import get_logger
+
+logger = get_logger("VSCodeBridge")
+
+PROTOCOL_VERSION = 1
+
+FRAME_HEADER = struct.Struct(">BII")
+FRAME_JSON = 1
+FRAME_BINARY = 2
+
+
+class BridgeError(Exception):
+    """Lỗi kết nối hoặc lỗi protocol với VS Code extension"""
+
+
+def default_bridge_path() -> str:
+    """Socket/pipe mặc định (VSCODE_BRIDGE_ENV_VAR ghi đè)"""
+    if os.name == "nt":
+        return rf"\\.\pipe\{VSCODE_BRIDGE_NAME}-{os.environ.get('USERNAME', 'user')}"
+    return os.path.join(tempfile.gettempdir(), f"{VSCODE_BRIDGE_NAME}-{os.getuid()}.sock")
+
+
+def get_bridge_path() -> str:
+    return os.environ.get(VSCODE_BRIDGE_ENV_VAR) or default_bridge_path()
+
+
+def encode_frame(frame_type: int, request_id: int, payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(frame_type, request_id, len(payload)) + payload
+
+
+def encode_json_frame(request_id: int, message: Dict[str, Any]) -> bytes:
+    return encode_frame(FRAME_JSON, request_id, json.dumps(message, ensure_ascii=False).encode("utf-8"))
+
+
+def _recv_exact(conn, size: int) -> bytes:
+    """Đọc đúng size byte (ConnectionError nếu bên kia đóng kết nối giữa chừng)"""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = conn.recv_into(view[received:])
+        if not count:
+            raise ConnectionError("VS Code bridge closed the connection")
+        received += count
+    return bytes(buffer)
+
+
+def read_frame(conn, max_frame: int = VSCODE_BRIDGE_MAX_FRAME):
+    """
+    Đọc một frame
+
+    Returns:
+        tuple: (frame_type, request_id, payload)
+    """
+    frame_type, request_id, length = FRAME_HEADER.unpack(_recv_exact(conn, FRAME_HEADER.size))
+    if length > max_frame:
+        raise BridgeError(f"Frame too large: {length} bytes (limit {max_frame})")
+    return frame_type, request_id, _recv_exact(conn, length) if length else b""
+
+
+class _PipeConnection:
+    """Windows named pipe mở như file, cùng interface với socket (sendall/recv_into/close)"""
+
+    def __init__(self, path):
+        self._file = open(path, "r+b", buffering=0)
+
+    def sendall(self, data):
+        self._file.write(data)
+
+    def recv_into(self, view):
+        return self._file.readinto(view)
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def close(self):
+        self._file.close()
+
+
+class VSCodeBridge:
+    """
+    Client của bridge: một kết nối giữ lại giữa các tool call, mỗi lần một prompt
+
+    Kết nối bị mất thì lần gọi sau tự kết nối lại.
+    """
+
+    def __init__(self, path: str = None, connect_timeout: float = VSCODE_BRIDGE_CONNECT_TIMEOUT):
+        """
+        Args:
+            path: Socket/pipe của extension (mặc định: get_bridge_path())
+            connect_timeout: Thời gian chờ kết nối tối đa (giây)
+        """
+        self.path = path or get_bridge_path()
+        self.connect_timeout = connect_timeout
+        self._conn = None
+        self._request_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def is_connected(self) -> bool:
+        return self._conn is not None
+
+    def connect(self) -> bool:
+        """Kết nối tới extension nếu chưa kết nối (False nếu extension không lắng nghe)"""
+        if self._conn is not None:
+            return True
+        try:
+            if os.name == "nt":
+                self._conn = _PipeConnection(self.path)
+            else:
+                conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                conn.settimeout(self.connect_timeout)
+                try:
+                    conn.connect(self.path)
+                except OSError:
+                    conn.close()
+                    raise
+                conn.settimeout(None)
+                self._conn = conn
+            return True
+        except OSError as e:
+            logger.debug(f"Cannot connect to {self.path}: {str(e)}")
+            return False
+
+    def close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except OSError:
+                pass
+            self._conn = None
+
+    def _wait_readable(self, timeout: float) -> bool:
+        if isinstance(self._conn, _PipeConnection):
+            # Pipe không hỗ trợ select(): đọc blocking, cancel chỉ được kiểm tra giữa các frame
+            return True
+        readable, _, _ = select.select([self._conn], [], [], timeout)
+        return bool(readable)
+
+    def _send_cancel(self, request_id: int) -> None:
+        try:
+            self._conn.sendall(encode_json_frame(request_id, {"type": "cancel"}))
+        except OSError:
+            self.close()
+
+    def request_input(self, timeout: Optional[float] = None, cancel_event: threading.Event = None,
+                      **prompt) -> Optional[Dict[str, Any]]:
+        """
+        Gửi prompt và chờ người dùng trả lời trong VS Code
+
+        Args:
+            timeout: Thời gian chờ tối đa (None = chờ đến khi người dùng trả lời)
+            cancel_event: Set event để hủy prompt (gửi frame cancel cho extension)
+            **prompt: Thêm vào message prompt (workspace, language...)
+
+        Returns:
+            Dict hoặc None: Message "response" (images là list dict có "data" bytes),
+            {"type": "cancelled"} nếu người dùng đóng prompt, None nếu bị hủy/timeout
+
+        Raises:
+            BridgeError: Mất kết nối hoặc extension trả lỗi
+        """
+        with self._lock:
+            if not self.connect():
+                raise BridgeError(f"VS Code bridge not available at {self.path}")
+
+            request_id = next(self._request_ids)
+            deadline = time.monotonic() + timeout if timeout is not None else None
+            message = {"type": "prompt", "protocol": PROTOCOL_VERSION}
+            message.update(prompt)
+            try:
+                self._conn.sendall(encode_json_frame(request_id, message))
+                return self._read_response(request_id, deadline, cancel_event)
+            except KeyboardInterrupt:
+                self._send_cancel(request_id)
+                raise
+            except (OSError, ValueError, struct.error) as e:
+                # Stream không còn đồng bộ được nữa - bỏ kết nối, lần sau kết nối lại
+                self.close()
+                raise BridgeError(f"VS Code bridge connection lost: {str(e)}") from e
+
+    def _read_response(self, request_id: int, deadline: Optional[float],
+                       cancel_event: Optional[threading.Event]) -> Optional[Dict[str, Any]]:
+        response = None
+        images = []
+        while True:
+            if response is None or len(images) < len(response["images"]):
+                # Chỉ kiểm tra cancel/timeout giữa các frame, không cắt ngang một frame
+                while True:
+                    if cancel_event is not None and cancel_event.is_set():
+                        self._send_cancel(request_id)
+                        return None
+                    wait = VSCODE_BRIDGE_POLL_INTERVAL
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            logger.warning(f"Prompt {request_id} timed out")
+                            self._send_cancel(request_id)
+                            return None
+                        wait = min(wait, remaining)
+                    if self._wait_readable(wait):
+                        break
+
+            frame_type, frame_id, payload = read_frame(self._conn)
+            if frame_id != request_id:
+                continue  # Trả lời muộn của prompt đã bị hủy
+
+            if frame_type == FRAME_BINARY:
+                if response is None:
+                    continue
+                info = response["images"][len(images)]
+                images.append({
+                    "data": payload,
+                    "media_type": info.get("media_type", "image/png"),
+                    "filename": info.get("filename", "image.png")
+                })
+            elif frame_type == FRAME_JSON:
+                message = json.loads(payload.decode("utf-8"))
+                kind = message.get("type")
+                if kind == "cancelled":
+                    return message
+                if kind == "error":
+                    raise BridgeError(f"VS Code extension error: {message.get('message', 'unknown error')}")
+                if kind == "response":
+                    response = message
+                    response.setdefault("images", [])
+            else:
+                logger.warning(f"Ignoring unknown frame type {frame_type}")
+
+            if response is not None and len(images) == len(response["images"]):
+                response["images"] = images
+                return response
+
+
+_bridge = None
+_bridge_lock = threading.Lock()
+
+
+def get_vscode_bridge() -> VSCodeBridge:
+    """Bridge dùng chung cho cả process (đóng khi thoát)"""
+    global _bridge
+    if _bridge is None:
+        with _bridge_lock:
+            if _bridge is None:
+                _bridge = VSCodeBridge()
+                atexit.register(_bridge.close)
+    return _bridge
@@ -3,20 +3,57 @@ VS Code specific engine for AI extension Tool
 Handles integration with VS Code extension UI
 """
 
-def run_vscode_ui():
+import json
+import os
+from .utils.tracing import span
+from .utils.vscode_bridge import BridgeError, get_vscode_bridge
+from .utils.log import get_logger
+
+logger = get_logger("VSCodeEngine")
+
+
+def run_vscode_ui(timeout=None, cancel_event=None):
     """
     Run the VS Code extension UI version of the tool
-    This function integrates with the VS Code webview panel
-    
+    Asks the user through the extension's webview over the VS Code bridge;
+    falls back to the Qt dialog when the extension is not listening
+
+    Args:
+        timeout: Seconds to wait for the user (None = no limit)
+        cancel_event: threading.Event that cancels the prompt when set
+
     Returns:
-        Dict containing the response data from the VS Code UI
+        Response in the same shape as run_ui (text with tags, or dict when images are attached)
     """
-    # The actual UI is handled by the VS Code extension
-    # This function just returns an empty response to allow the extension to take over
-    return {
-        'text': '',
-        'attached_files': [],
-        'attached_images': [],
-        'continue_chat': True,  # Default to true to keep the conversation going
-        'language': 'en'  # Default to English
-    } 
\ No newline at end of file
+    from .engine import build_ui_response, run_ui
+
+    bridge = get_vscode_bridge()
+    try:
+        with span("ui.wait_for_user", {"ui.backend": "vscode"}, human=True):
+            message = bridge.request_input(timeout=timeout, cancel_event=cancel_event, workspace=os.getcwd())
+    except BridgeError as e:
+        logger.warning(f"{str(e)} - falling back to the Qt dialog")
+        return run_ui()
+
+    if message is None or message.get("type") == "cancelled":
+        return build_ui_response("", False, False)
+
+    continue_chat = bool(message.get("continue_chat", False))
+    images = message.get("images", [])
+    if images:
+        # Ảnh giữ nguyên bytes từ binary frame, không qua base64
+        return {
+            'text_content': message.get("text", ""),
+            'attached_files': message.get("attached_files", []),
+            'attached_images': images,
+            'continue_chat': continue_chat,
+            'language': message.get("language", "en")
+        }
+
+    payload = {
+        "text": message.get("text", ""),
+        "attached_files": message.get("attached_files", []),
+        "attached_images": [],
+        "language": message.get("language", "en")
+    }
+    return build_ui_response(json.dumps(payload), continue_chat, True)
@@ -5,7 +5,7 @@ Tests both connection and tool functionality
 """
 
 from AI_EXTENSION_tool.utils.mcp_config import mcp_config_manager
-from AI_EXTENSION_tool.utils.mcp_client import test_mcp_connection_and_tools
+from AI_EXTENSION_tool.utils.mcp_client import test_mcp_connection_and_tools, test_mcp_pipelined_requests
 
 def main():
     """Main test function"""
@@ -36,6 +36,10 @@ def main():
     print("🔌 Testing MCP Connection and Tools...")
     success = test_mcp_connection_and_tools()
     
+    # Test many concurrent requests over a single connection
+    print("🔀 Testing pipelined requests (AsyncMCPClient)...")
+    success = test_mcp_pipelined_requests() and success
+    
     if success:
         print("🎉 All tests passed! The MCP server is working correctly.")
         return True